@@ -0,0 +1,291 @@
+"""
+Alert dispatch module with priority-ordered, durable delivery to message providers.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from PyQt5.QtCore import QObject, pyqtSignal
+import logging
+
+from app.core.alert_router import Alert
+from app.core.metrics import REGISTRY
+from app.core.outbox import Outbox, OutboxEntry
+from app.core.providers import MessageProvider
+from app.core.tracing import TRACER
+
+logger = logging.getLogger(__name__)
+
+QUEUED = REGISTRY.counter("alert_deliveries_queued_total", "Alert deliveries queued", ("provider",))
+DELIVERIES = REGISTRY.counter("alert_deliveries_total", "Alert delivery attempts by outcome", ("provider", "result"))
+DELIVERY_SECONDS = REGISTRY.histogram("alert_delivery_seconds", "Duration of one alert delivery attempt", ("provider",))
+QUEUE_DEPTH = REGISTRY.gauge("alert_queue_depth", "Alert deliveries waiting to be sent")
+
+# A sender takes (message, recipient) and returns the provider's message ID
+# (or None) on success. It raises DeliveryError, or any other exception, on failure.
+SendFunction = Callable[[str, str], Optional[str]]
+
+# Returns the recipients a provider sends to when a route names none
+RecipientsFunction = Callable[[], List[str]]
+
+
+class DeliveryError(Exception):
+    """Raised by a sender when a delivery fails."""
+
+    def __init__(self, message: str, retryable: bool = True):
+        """
+        Initialize the error.
+
+        Args:
+            message: Description of the failure
+            retryable: Whether sending again later could succeed
+        """
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class AlertDispatcher(QObject):
+    """
+    Delivers alerts to their providers from background worker threads.
+
+    Each alert is split into one delivery per provider and recipient and stored
+    in a durable outbox before this returns, so queued alerts survive a crash
+    and are resumed on the next start. Failed deliveries are retried with
+    exponential backoff while new alerts keep flowing.
+
+    Deliveries are taken most urgent first, so when the send path is saturated
+    critical alerts are sent before informational ones. When the queue is full,
+    the least urgent delivery is dropped to make room for a more urgent one.
+    """
+
+    # Define signals
+    status_update = pyqtSignal(str)
+    alert_dispatched = pyqtSignal(str, str, str, bool)  # alert_id, provider, recipient, success
+    alert_sent = pyqtSignal(str, str, str, str)  # alert_id, provider, recipient, message ID or ""
+
+    def __init__(self,
+                 outbox: Optional[Outbox] = None,
+                 max_queue_size: int = 1000,
+                 worker_count: int = 2):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            outbox: Outbox storing queued deliveries, or None for the default on-disk outbox
+            max_queue_size: Maximum number of deliveries waiting to be sent
+            worker_count: Number of threads sending deliveries concurrently
+        """
+        super().__init__()
+        self.outbox = outbox or Outbox()
+        self.max_queue_size = max_queue_size
+        self.worker_count = worker_count
+        self.senders: Dict[str, SendFunction] = {}
+        self.recipient_sources: Dict[str, RecipientsFunction] = {}
+        self.running = False
+        self.worker_threads = []
+        self._condition = threading.Condition()
+        # Held from the queue size check to the enqueue, so concurrent submits
+        # cannot both take the last free slot or both drop for the same one
+        self._room_lock = threading.Lock()
+        QUEUE_DEPTH.set_function(self.queue_depth)
+
+    def register_sender(self,
+                        provider: str,
+                        send_function: SendFunction,
+                        recipients_function: Optional[RecipientsFunction] = None):
+        """
+        Register the send function for a provider.
+
+        Args:
+            provider: Provider name used in routes (e.g. "sms", "discord")
+            send_function: Callable taking (message, recipient), see SendFunction
+            recipients_function: Callable returning the provider's default recipients
+        """
+        self.senders[provider] = send_function
+        if recipients_function:
+            self.recipient_sources[provider] = recipients_function
+
+    def register_provider(self, provider: MessageProvider, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """
+        Register a message provider under its name.
+
+        Args:
+            provider: The provider to send through
+            loop: Running event loop to send on with the provider's async send,
+                such as MessageService.loop; None sends with send_sync
+        """
+        def send_function(message: str, recipient: str) -> Optional[str]:
+            if loop is None:
+                result = provider.send_sync(recipient, message)
+            else:
+                result = asyncio.run_coroutine_threadsafe(provider.send(recipient, message), loop).result()
+            if not result.success:
+                raise DeliveryError(result.error or "Unknown error", result.retryable)
+            return result.message_id
+
+        self.register_sender(provider.name, send_function, provider.default_recipients)
+
+    def has_sender(self, provider: str) -> bool:
+        """Check whether a provider has a registered sender."""
+        return provider in self.senders
+
+    def queue_depth(self) -> int:
+        """Get the number of deliveries waiting to be sent."""
+        return self.outbox.pending_count()
+
+    def submit(self, alert: Alert) -> int:
+        """
+        Queue an alert for delivery.
+
+        Args:
+            alert: The alert to send
+
+        Returns:
+            int: The number of deliveries queued, 0 if none could be
+        """
+        queued = 0
+        for provider in alert.providers:
+            if provider not in self.senders:
+                self.status_update.emit(f"Provider '{provider}' is not available, alert not sent")
+                self.alert_dispatched.emit(alert.alert_id, provider, "", False)
+                continue
+
+            recipients = alert.recipients_for(provider)
+            if not recipients and provider in self.recipient_sources:
+                recipients = self.recipient_sources[provider]()
+            message = alert.message_for(provider)
+
+            for recipient in recipients:
+                with self._room_lock:
+                    if not self._make_room(alert):
+                        self.status_update.emit(
+                            f"Alert queue full, dropped {alert.priority} alert for pattern '{alert.pattern}'"
+                        )
+                        return queued
+                    added = self.outbox.enqueue(alert.alert_id, provider, recipient, message, alert.priority_value)
+
+                if added:
+                    QUEUED.labels(provider).inc()
+                    TRACER.start_span(alert.alert_id, "dispatch", f"{provider}:{recipient}", provider=provider)
+                    queued += 1
+
+        if queued:
+            with self._condition:
+                self._condition.notify_all()
+        return queued
+
+    def _make_room(self, alert: Alert) -> bool:
+        """
+        Drop a less urgent delivery if the queue is full. Returns False if there is no room.
+
+        Must be called with _room_lock held, up to the enqueue that uses the room.
+        """
+        if self.outbox.pending_count() < self.max_queue_size:
+            return True
+
+        dropped = self.outbox.drop_least_urgent(alert.priority_value)
+        if dropped is None:
+            return False
+
+        DELIVERIES.labels(dropped.provider, "dropped").inc()
+        self.status_update.emit(f"Alert queue full, dropped queued delivery to {dropped.recipient} via {dropped.provider}")
+        self.alert_dispatched.emit(dropped.alert_id, dropped.provider, dropped.recipient, False)
+        return True
+
+    def start(self):
+        """Start the dispatch worker threads, resuming deliveries left by a previous run."""
+        if self.running:
+            return
+
+        self.outbox.recover()
+        self.outbox.purge()
+        pending = self.outbox.pending_count()
+        if pending:
+            self.status_update.emit(f"Resuming {pending} queued alert deliveries")
+
+        self.running = True
+        self.worker_threads = []
+        for index in range(self.worker_count):
+            thread = threading.Thread(target=self._dispatch_loop, name=f"AlertDispatcher-{index}")
+            thread.daemon = True
+            thread.start()
+            self.worker_threads.append(thread)
+
+    def stop(self):
+        """Stop the dispatch worker threads. Queued deliveries stay in the outbox."""
+        with self._condition:
+            self.running = False
+            self._condition.notify_all()
+
+        for thread in self.worker_threads:
+            if thread.is_alive():
+                thread.join(1.0)
+
+    def _next_delivery(self) -> Optional[OutboxEntry]:
+        """Wait for and claim the most urgent due delivery, or None when stopping."""
+        with self._condition:
+            while self.running:
+                entry = self.outbox.claim_next()
+                if entry is not None:
+                    return entry
+
+                # Sleep until the next retry is due or a new alert arrives
+                due = self.outbox.next_due_time()
+                timeout = None if due is None else max(due - time.time(), 0.01)
+                self._condition.wait(timeout)
+
+            return None
+
+    def _dispatch_loop(self):
+        """Main dispatch loop that runs in each worker thread."""
+        while self.running:
+            entry = self._next_delivery()
+            if entry is None:
+                break
+
+            self._deliver(entry)
+
+    def _deliver(self, entry: OutboxEntry):
+        """Attempt one delivery and record the outcome in the outbox."""
+        send_function = self.senders.get(entry.provider)
+        TRACER.end_span(entry.alert_id, "dispatch", f"{entry.provider}:{entry.recipient}")
+        started = time.perf_counter()
+        try:
+            if send_function is None:
+                raise DeliveryError(f"Provider '{entry.provider}' is not available")
+
+            # The alert ID is the trace ID, so the provider's spans join the alert's trace
+            with TRACER.activate(entry.alert_id):
+                result_id = send_function(entry.message, entry.recipient)
+        except DeliveryError as e:
+            DELIVERY_SECONDS.labels(entry.provider).observe(time.perf_counter() - started)
+            self._record_failure(entry, str(e), e.retryable)
+            return
+        except Exception as e:
+            DELIVERY_SECONDS.labels(entry.provider).observe(time.perf_counter() - started)
+            logger.error(f"Error dispatching alert via {entry.provider}: {str(e)}")
+            self._record_failure(entry, str(e), True)
+            return
+
+        DELIVERY_SECONDS.labels(entry.provider).observe(time.perf_counter() - started)
+        DELIVERIES.labels(entry.provider, "sent").inc()
+        self.outbox.mark_sent(entry, result_id)
+        self.alert_sent.emit(entry.alert_id, entry.provider, entry.recipient, str(result_id or ""))
+        self.alert_dispatched.emit(entry.alert_id, entry.provider, entry.recipient, True)
+
+    def _record_failure(self, entry: OutboxEntry, error: str, retryable: bool):
+        """Schedule a retry for a failed delivery, or give up on it."""
+        if self.outbox.mark_failed(entry, error, retryable):
+            DELIVERIES.labels(entry.provider, "retry").inc()
+            delay = entry.next_attempt_at - time.time()
+            self.status_update.emit(
+                f"Delivery to {entry.recipient} via {entry.provider} failed ({error}), "
+                f"retry {entry.attempts + 1} in {delay:.0f}s"
+            )
+        else:
+            DELIVERIES.labels(entry.provider, "dead").inc()
+            self.status_update.emit(
+                f"Delivery to {entry.recipient} via {entry.provider} failed after {entry.attempts} attempt(s): {error}"
+            )
+            self.alert_dispatched.emit(entry.alert_id, entry.provider, entry.recipient, False)
@@ -0,0 +1,246 @@
+"""
+Alert routing module for mapping detected patterns to priorities, recipients and providers.
+"""
+
+import datetime
+import uuid
+from typing import List, Dict, Any, Optional
+
+
+# Priority levels, lower value is more urgent
+PRIORITY_LEVELS = {
+    "critical": 0,
+    "high": 1,
+    "normal": 2,
+    "info": 3,
+}
+DEFAULT_PRIORITY = "normal"
+DEFAULT_PROVIDERS = ["sms"]
+
+
+def priority_value(priority: str) -> int:
+    """
+    Convert a priority name to its numeric value.
+
+    Args:
+        priority: Priority name (critical, high, normal, info)
+
+    Returns:
+        int: Numeric priority, lower is more urgent
+    """
+    try:
+        return PRIORITY_LEVELS[priority.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown priority '{priority}' (use one of: {', '.join(PRIORITY_LEVELS)})")
+
+
+class AlertRoute:
+    """
+    Routing rule mapping a pattern or group of patterns to a priority,
+    a list of providers and the recipients of each provider.
+
+    Recipients are kept per provider, since a phone number means nothing to
+    Discord. A provider without recipients sends to all its configured recipients.
+    """
+
+    def __init__(self,
+                 patterns: List[str],
+                 priority: str = DEFAULT_PRIORITY,
+                 providers: Optional[List[str]] = None,
+                 recipients: Optional[Dict[str, List[str]]] = None):
+        """Initialize the route."""
+        self.patterns = patterns
+        self.priority = priority.lower()
+        self.priority_value = priority_value(priority)
+        self.providers = providers or list(DEFAULT_PROVIDERS)
+        self.recipients = recipients or {}
+
+    def recipients_for(self, provider: str) -> List[str]:
+        """Get the recipients of a provider, empty for all its configured recipients."""
+        return self.recipients.get(provider, [])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the route to a dictionary."""
+        return {
+            "patterns": self.patterns,
+            "priority": self.priority,
+            "providers": self.providers,
+            "recipients": self.recipients
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AlertRoute':
+        """Create a route from a dictionary."""
+        return cls(
+            data["patterns"],
+            data.get("priority", DEFAULT_PRIORITY),
+            data.get("providers"),
+            data.get("recipients")
+        )
+
+    @classmethod
+    def parse(cls, rule: str) -> 'AlertRoute':
+        """
+        Parse a routing rule written as 'priority | patterns | providers | recipients'.
+
+        Patterns, providers and recipients are comma-separated. Providers and
+        recipients may be omitted or left empty to use the defaults. When a
+        rule has several providers, each recipient names its provider, as in
+        'sms:+12125551234, discord:alice'.
+
+        Args:
+            rule: The rule text
+
+        Returns:
+            AlertRoute: The parsed route
+        """
+        fields = [field.strip() for field in rule.split("|")]
+        if len(fields) < 2 or len(fields) > 4:
+            raise ValueError(f"Invalid routing rule '{rule}' (use: priority | patterns | providers | recipients)")
+
+        fields += [""] * (4 - len(fields))
+        priority, patterns, providers, recipients = fields
+
+        pattern_list = _split_list(patterns)
+        if not pattern_list:
+            raise ValueError(f"Invalid routing rule '{rule}': no patterns given")
+
+        provider_list = [provider.lower() for provider in _split_list(providers)] or list(DEFAULT_PROVIDERS)
+        recipients_by_provider: Dict[str, List[str]] = {}
+        for recipient in _split_list(recipients):
+            prefix, separator, rest = recipient.partition(":")
+            if separator:
+                provider, recipient = prefix.strip().lower(), rest.strip()
+                if provider not in provider_list:
+                    raise ValueError(f"Invalid routing rule '{rule}': recipient '{recipient}' is for provider "
+                                     f"'{provider}', which the rule does not send through")
+            elif len(provider_list) == 1:
+                provider = provider_list[0]
+            else:
+                raise ValueError(f"Invalid routing rule '{rule}': give the provider of recipient '{recipient}', "
+                                 f"e.g. {provider_list[0]}:{recipient}")
+            recipients_by_provider.setdefault(provider, []).append(recipient)
+
+        return cls(
+            pattern_list,
+            priority or DEFAULT_PRIORITY,
+            provider_list,
+            recipients_by_provider
+        )
+
+
+class Alert:
+    """
+    Class to represent an alert waiting to be dispatched to its providers.
+    """
+
+    def __init__(self,
+                 pattern: str,
+                 line: str,
+                 message: str,
+                 route: AlertRoute,
+                 alert_id: Optional[str] = None,
+                 messages: Optional[Dict[str, str]] = None,
+                 recipients: Optional[Dict[str, List[str]]] = None):
+        """
+        Initialize the alert.
+
+        Args:
+            pattern: The pattern that was detected
+            line: The line containing the pattern
+            message: The message to send
+            route: The route resolved for the pattern
+            alert_id: ID to use, e.g. the trace ID of the match; a new one is generated if empty
+            messages: Messages sized for particular providers, used instead of message
+            recipients: Recipients of each provider to send to instead of the route's, e.g. with groups expanded
+        """
+        self.alert_id = alert_id or uuid.uuid4().hex
+        self.pattern = pattern
+        self.line = line
+        self.message = message
+        self.messages = messages or {}
+        self.priority = route.priority
+        self.priority_value = route.priority_value
+        self.providers = route.providers
+        self.recipients = route.recipients if recipients is None else recipients
+        self.created_at = datetime.datetime.now()
+
+    def recipients_for(self, provider: str) -> List[str]:
+        """Get the recipients of a provider, empty for all its configured recipients."""
+        return self.recipients.get(provider, [])
+
+    def message_for(self, provider: str) -> str:
+        """Get the message to send through a provider."""
+        return self.messages.get(provider, self.message)
+
+
+class AlertRouter:
+    """
+    Resolves the route for a detected pattern.
+
+    Routes are compiled into a dictionary keyed by the lower-cased pattern, so
+    resolution is a single lookup. When a pattern appears in several routes the
+    first route wins. Patterns without a route use the default route.
+    """
+
+    def __init__(self,
+                 routes: Optional[List[AlertRoute]] = None,
+                 default_route: Optional[AlertRoute] = None):
+        """Initialize the router."""
+        self.default_route = default_route or AlertRoute([])
+        self.routes = []
+        self._lookup = {}
+        self.configure(routes or [])
+
+    def configure(self, routes: List[AlertRoute]):
+        """
+        Replace the routing table.
+
+        Args:
+            routes: The routes, in order of precedence
+        """
+        lookup = {}
+        for route in routes:
+            for pattern in route.patterns:
+                lookup.setdefault(pattern.lower(), route)
+
+        self.routes = routes
+        self._lookup = lookup
+
+    def configure_from_rules(self, rules: List[str]) -> List[str]:
+        """
+        Replace the routing table from rule strings.
+
+        Args:
+            rules: Rule strings in the format accepted by AlertRoute.parse
+
+        Returns:
+            List of error messages for rules that could not be parsed
+        """
+        routes = []
+        errors = []
+        for rule in rules:
+            try:
+                routes.append(AlertRoute.parse(rule))
+            except ValueError as e:
+                errors.append(str(e))
+
+        self.configure(routes)
+        return errors
+
+    def route(self, pattern: str) -> AlertRoute:
+        """
+        Get the route for a pattern.
+
+        Args:
+            pattern: The pattern that was found
+
+        Returns:
+            AlertRoute: The matching route, or the default route
+        """
+        return self._lookup.get(pattern.lower(), self.default_route)
+
+
+def _split_list(text: str) -> List[str]:
+    """Split a comma-separated list, dropping empty entries."""
+    return [item.strip() for item in text.split(",") if item.strip()]
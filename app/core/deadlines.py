@@ -0,0 +1,272 @@
+"""
+Absence rules: alert when a pattern or any new log data has not been seen for a while.
+
+    no heartbeat for 5m    - the pattern "heartbeat" has not matched for 5 minutes
+    log idle for 10m       - the monitored file has not grown for 10 minutes
+
+Each rule is an expectation with a deadline. Deadlines live in a hashed timer
+wheel. A match or file write only moves its expectation's deadline forward,
+which is O(1) however many expectations there are; the wheel notices the
+moved deadline when the old slot comes round and re-arms the entry then.
+"""
+
+import re
+import time
+from typing import Dict, List, Optional
+
+LOG_IDLE = "log idle"
+
+_RULE = re.compile(r"^(?:no\s+(?P<pattern>.+?)|(?P<idle>log\s+idle))\s+for\s+(?P<timeout>\d+)\s*(?P<unit>[smh]?)$",
+                   re.IGNORECASE)
+_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600}
+
+
+def is_absence_rule(rule: str) -> bool:
+    """Check whether a rule is an absence rule rather than a rate rule."""
+    return bool(_RULE.match(rule.strip()))
+
+
+def format_duration(seconds: float) -> str:
+    """Format a duration as e.g. '45s', '5m' or '1h30m'."""
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    parts = [f"{value}{unit}" for value, unit in ((hours, "h"), (minutes, "m"), (seconds, "s")) if value]
+    return "".join(parts) or "0s"
+
+
+class Expectation:
+    """
+    Something expected to happen within a timeout, and when it is next due.
+    """
+
+    __slots__ = ("pattern", "timeout", "deadline", "last_seen", "expired", "wheel_tick")
+
+    def __init__(self, pattern: Optional[str], timeout: float, now: float):
+        """
+        Initialize the expectation.
+
+        Args:
+            pattern: The expected pattern, or None for new data in the log file
+            timeout: Seconds allowed between occurrences
+            now: Start time, the first deadline is now + timeout
+        """
+        self.pattern = pattern
+        self.timeout = timeout
+        self.deadline = now + timeout
+        self.last_seen = now
+        self.expired = False
+        self.wheel_tick = -1  # tick of the wheel slot holding it, -1 when not in the wheel
+
+    @classmethod
+    def parse(cls, rule: str, now: float) -> 'Expectation':
+        """
+        Parse a rule written as 'no <pattern> for <timeout>' or 'log idle for <timeout>'.
+
+        The timeout is in seconds, or in minutes or hours with an m or h suffix.
+
+        Args:
+            rule: The rule text
+            now: Start time
+
+        Returns:
+            Expectation: The parsed rule
+        """
+        match = _RULE.match(rule.strip())
+        if not match:
+            raise ValueError(f"Invalid absence rule '{rule}' (use: no pattern for 5m, or: log idle for 10m)")
+
+        timeout = int(match.group("timeout")) * _UNITS[match.group("unit").lower()]
+        if timeout <= 0:
+            raise ValueError(f"Invalid absence rule '{rule}': the time must be longer than 0 seconds")
+        return cls(None if match.group("idle") else match.group("pattern").strip(), timeout, now)
+
+    @property
+    def description(self) -> str:
+        """Get the rule as text."""
+        subject = f"no {self.pattern}" if self.pattern is not None else LOG_IDLE
+        return f"{subject} for {format_duration(self.timeout)}"
+
+
+class AbsenceTransition:
+    """
+    An expectation being missed, or met again after it was missed.
+    """
+
+    def __init__(self, expectation: Expectation, missed: bool, now: float):
+        """Initialize the transition."""
+        self.expectation = expectation
+        self.missed = missed
+        self.silence = now - expectation.last_seen
+
+    @property
+    def route_pattern(self) -> str:
+        """Get the pattern whose route the alert follows."""
+        return self.expectation.pattern if self.expectation.pattern is not None else LOG_IDLE
+
+    @property
+    def message(self) -> str:
+        """Get the alert text for the transition."""
+        subject = (f"'{self.expectation.pattern}' not seen" if self.expectation.pattern is not None
+                   else "No new data in the log")
+        if self.missed:
+            return f"Absence alert: {subject} for {format_duration(self.silence)}"
+        subject = (f"'{self.expectation.pattern}' seen" if self.expectation.pattern is not None
+                   else "New data in the log")
+        return f"Resolved: {subject} again after {format_duration(self.silence)}"
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel holding expectations by deadline.
+
+    Entries further away than one turn of the wheel wait in their slot for
+    the later turn. Slots are checked one tick at a time as time advances.
+    """
+
+    def __init__(self, tick: float = 1.0, slot_count: int = 512, now: Optional[float] = None):
+        """
+        Initialize the wheel.
+
+        Args:
+            tick: Seconds per slot, deadlines fire up to one tick late
+            slot_count: Number of slots
+            now: Start time, defaults to now
+        """
+        self.tick = tick
+        self.slot_count = slot_count
+        self._slots: List[List[Expectation]] = [[] for _ in range(slot_count)]
+        self._current = int((time.time() if now is None else now) // tick)
+
+    def schedule(self, expectation: Expectation):
+        """Put an expectation in the slot of its deadline."""
+        tick = max(int(expectation.deadline // self.tick), self._current + 1)
+        expectation.wheel_tick = tick
+        self._slots[tick % self.slot_count].append(expectation)
+
+    def advance(self, now: float) -> List[Expectation]:
+        """
+        Move the wheel to now.
+
+        Returns:
+            The expectations whose slot came due, with their deadline as it was scheduled
+        """
+        target = int(now // self.tick)
+        due = []
+        for step in range(1, min(target - self._current, self.slot_count) + 1):
+            index = (self._current + step) % self.slot_count
+            slot = self._slots[index]
+            if not slot:
+                continue
+            waiting = [expectation for expectation in slot if expectation.wheel_tick > target]
+            if len(waiting) < len(slot):
+                due.extend(expectation for expectation in slot if expectation.wheel_tick <= target)
+                self._slots[index] = waiting
+        self._current = max(self._current, target)
+
+        for expectation in due:
+            expectation.wheel_tick = -1
+        return due
+
+
+class AbsenceTracker:
+    """
+    Tracks absence rules and reports when they are missed and met again.
+
+    Patterns are looked up lower-cased, like AlertRouter.
+    """
+
+    def __init__(self, tick: float = 1.0):
+        """
+        Initialize the tracker with no rules.
+
+        Args:
+            tick: Timer wheel resolution in seconds
+        """
+        self.tick = tick
+        self.expectations: List[Expectation] = []
+        self._by_pattern: Dict[Optional[str], List[Expectation]] = {}
+        self._wheel = TimerWheel(tick)
+
+    def configure(self, expectations: List[Expectation], now: Optional[float] = None):
+        """Replace the rules, starting their timeouts now."""
+        now = time.time() if now is None else now
+        self._wheel = TimerWheel(self.tick, now=now)
+        by_pattern: Dict[Optional[str], List[Expectation]] = {}
+        for expectation in expectations:
+            expectation.deadline = now + expectation.timeout
+            expectation.last_seen = now
+            expectation.expired = False
+            key = expectation.pattern.lower() if expectation.pattern is not None else None
+            by_pattern.setdefault(key, []).append(expectation)
+            self._wheel.schedule(expectation)
+
+        self.expectations = expectations
+        self._by_pattern = by_pattern
+
+    def configure_from_rules(self, rules: List[str]) -> List[str]:
+        """
+        Replace the rules from rule strings.
+
+        Args:
+            rules: Rule strings in the format accepted by Expectation.parse
+
+        Returns:
+            List of error messages for rules that could not be parsed
+        """
+        now = time.time()
+        expectations = []
+        errors = []
+        for rule in rules:
+            try:
+                expectations.append(Expectation.parse(rule, now))
+            except ValueError as e:
+                errors.append(str(e))
+
+        self.configure(expectations, now)
+        return errors
+
+    def is_expected(self, pattern: str) -> bool:
+        """Check whether a pattern is watched by absence rules, so its matches are a healthy signal."""
+        return pattern.lower() in self._by_pattern
+
+    def seen(self, pattern: Optional[str], now: Optional[float] = None) -> List[AbsenceTransition]:
+        """
+        Record an occurrence of a pattern, or of new log data when pattern is None.
+
+        Returns:
+            Expectations that were missed and are now met again
+        """
+        expectations = self._by_pattern.get(pattern.lower() if pattern is not None else None)
+        if not expectations:
+            return []
+
+        now = time.time() if now is None else now
+        transitions = []
+        for expectation in expectations:
+            if expectation.expired:
+                transitions.append(AbsenceTransition(expectation, False, now))
+                expectation.expired = False
+            expectation.deadline = now + expectation.timeout
+            expectation.last_seen = now
+            if expectation.wheel_tick < 0:
+                self._wheel.schedule(expectation)
+        return transitions
+
+    def check(self, now: Optional[float] = None) -> List[AbsenceTransition]:
+        """
+        Advance to now; call this periodically.
+
+        Returns:
+            Expectations that have just been missed
+        """
+        now = time.time() if now is None else now
+        transitions = []
+        for expectation in self._wheel.advance(now):
+            if expectation.deadline > now:
+                # Seen since it was scheduled, wait for the new deadline
+                self._wheel.schedule(expectation)
+            elif not expectation.expired:
+                expectation.expired = True
+                transitions.append(AbsenceTransition(expectation, True, now))
+        return transitions
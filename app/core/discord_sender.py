@@ -1,4 +1,5 @@
 import os
+import time
 import asyncio
 import logging
 from typing import Dict, Optional
@@ -7,19 +8,52 @@ import discord
 from discord import app_commands
 from discord.ext import commands, tasks
 
+from app.core.metrics import REGISTRY
+from app.core.templates import DISCORD_MAX_LENGTH, LengthLimit
+
 logger = logging.getLogger(__name__)
 
+DISCORD_MESSAGES = REGISTRY.counter("discord_messages_total", "Discord direct messages by result", ("result",))
+DISCORD_SEND_SECONDS = REGISTRY.histogram("discord_send_seconds", "Duration of Discord direct message sends")
+
+def build_lean_intents() -> discord.Intents:
+    """Build the minimal gateway intents needed to send DMs and handle !register.
+    
+    Only guild metadata (kept so the library state stays consistent) and
+    direct messages are subscribed. Message content is delivered for DMs
+    without the privileged message content intent.
+    """
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.dm_messages = True
+    return intents
+
+
 class DiscordSender:
-    def __init__(self, token: str):
+    def __init__(self, token: str, lean_mode: bool = False):
         """Initialize the Discord sender with a bot token.
         
         Args:
             token: The Discord bot token
+            lean_mode: If True, connect with minimal intents, no member or
+                message cache and only the DM event handlers
         """
         self.token = token
-        self.bot = commands.Bot(command_prefix='!', intents=discord.Intents.all())
+        self.lean_mode = lean_mode
+        if lean_mode:
+            self.bot = commands.Bot(
+                command_prefix='!',
+                intents=build_lean_intents(),
+                member_cache_flags=discord.MemberCacheFlags.none(),
+                max_messages=None,
+                chunk_guilds_at_startup=False
+            )
+        else:
+            self.bot = commands.Bot(command_prefix='!', intents=discord.Intents.all())
         self._setup_commands()
         self.user_mapping: Dict[str, int] = {}  # Maps application user_id to Discord user_id
+        # Users fetched over HTTP; the lean client has no member cache to fall back on
+        self._user_cache: Dict[int, discord.User] = {}
         
     def _setup_commands(self):
         """Set up the Discord bot commands and events."""
@@ -38,22 +72,13 @@ class DiscordSender:
             # Process DMs to register users
             if isinstance(message.channel, discord.DMChannel):
                 if message.content.startswith('!register'):
-                    try:
-                        # Format should be: !register USER_ID
-                        parts = message.content.split()
-                        if len(parts) != 2:
-                            await message.channel.send("Please use format: !register YOUR_USER_ID")
-                            return
-                            
-                        user_id = parts[1]
-                        self.user_mapping[user_id] = message.author.id
-                        await message.channel.send(f"Successfully registered! You will now receive notifications for user ID: {user_id}")
-                        logger.info(f"Registered Discord user {message.author.id} with app user {user_id}")
-                    except Exception as e:
-                        logger.error(f"Registration error: {str(e)}")
-                        await message.channel.send("Registration failed. Please try again.")
+                    await self._handle_register_message(message)
+                    return
             
-            await self.bot.process_commands(message)
+            # No prefix commands are registered, so the lean client skips
+            # the command parser entirely
+            if not self.lean_mode:
+                await self.bot.process_commands(message)
             
         # Add a slash command for registration
         @self.bot.tree.command(name="register", description="Register to receive notifications")
@@ -70,6 +95,23 @@ class DiscordSender:
                 logger.error(f"Registration error: {str(e)}")
                 await interaction.response.send_message("Registration failed. Please try again.", ephemeral=True)
     
+    async def _handle_register_message(self, message):
+        """Register the author of a '!register USER_ID' direct message."""
+        try:
+            # Format should be: !register USER_ID
+            parts = message.content.split()
+            if len(parts) != 2:
+                await message.channel.send("Please use format: !register YOUR_USER_ID")
+                return
+                
+            user_id = parts[1]
+            self.user_mapping[user_id] = message.author.id
+            await message.channel.send(f"Successfully registered! You will now receive notifications for user ID: {user_id}")
+            logger.info(f"Registered Discord user {message.author.id} with app user {user_id}")
+        except Exception as e:
+            logger.error(f"Registration error: {str(e)}")
+            await message.channel.send("Registration failed. Please try again.")
+    
     async def start_bot(self):
         """Start the Discord bot."""
         try:
@@ -105,24 +147,58 @@ class DiscordSender:
             # Get the Discord user ID from our mapping
             discord_user_id = self.user_mapping.get(user_id)
             if not discord_user_id:
+                DISCORD_MESSAGES.labels("unmapped").inc()
                 logger.error(f"No Discord user mapping found for user_id: {user_id}")
                 return False
                 
             # Get the Discord user
-            user = self.bot.get_user(discord_user_id)
+            user = self.bot.get_user(discord_user_id) or self._user_cache.get(discord_user_id)
             if not user:
                 try:
                     user = await self.bot.fetch_user(discord_user_id)
+                    self._user_cache[discord_user_id] = user
                 except discord.NotFound:
+                    DISCORD_MESSAGES.labels("user_not_found").inc()
                     logger.error(f"Discord user with ID {discord_user_id} not found")
                     return False
                 except Exception as e:
+                    DISCORD_MESSAGES.labels("error").inc()
                     logger.error(f"Error fetching Discord user: {str(e)}")
                     return False
                     
+            # Discord rejects messages over 2000 characters
+            if len(message) > DISCORD_MAX_LENGTH:
+                message = LengthLimit(DISCORD_MAX_LENGTH).truncate(message)
+                
             # Send the message
+            started = time.perf_counter()
             await user.send(message)
+            DISCORD_SEND_SECONDS.observe(time.perf_counter() - started)
+            DISCORD_MESSAGES.labels("sent").inc()
             return True
+        except Exception as e:
+            DISCORD_MESSAGES.labels("error").inc()
+            logger.error(f"Failed to send Discord message: {str(e)}")
+            return False
+            
+    def send_message_sync(self, user_id: str, message: str, timeout: float = 30.0) -> bool:
+        """Send a direct message from synchronous code while the bot runs in its own thread.
+        
+        Args:
+            user_id: The application user ID (mapped to Discord user ID)
+            message: The message to send
+            timeout: Seconds to wait for the message to be sent
+            
+        Returns:
+            bool: True if message was sent successfully, False otherwise
+        """
+        if not self.bot.is_ready():
+            logger.error("Discord bot is not connected")
+            return False
+            
+        future = asyncio.run_coroutine_threadsafe(self.send_message(user_id, message), self.bot.loop)
+        try:
+            return future.result(timeout)
         except Exception as e:
             logger.error(f"Failed to send Discord message: {str(e)}")
             return False
@@ -0,0 +1,537 @@
+"""
+Escalation of alerts that are not confirmed delivered.
+
+    critical | sms @primary > 5m sms @secondary > 5m discord
+
+An escalation rule gives the steps for alerts of one priority. The first step
+is sent at once. If none of its messages is confirmed delivered within the time
+given before the next step, or all of them fail, the next step is sent, and so
+on. An alert stops escalating once any of its messages is delivered.
+
+Messages through providers that report delivery (TextBelt) are confirmed by
+polling their status; for the others, such as Discord, a successful send is
+taken as delivered.
+
+Each alert is a small state machine, and all alerts in flight share one
+scheduler thread. Step deadlines live in a heap, and message IDs waiting for a
+status check in a queue ordered by when they are next due, so a tick only
+touches alerts that have something to do, however many are in flight.
+"""
+
+import heapq
+import logging
+import re
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from app.core.alert_dispatcher import AlertDispatcher
+from app.core.alert_router import Alert, AlertRoute, PRIORITY_LEVELS
+from app.core.deadlines import format_duration
+from app.core.metrics import REGISTRY
+from app.core.oncall import RecipientDirectory, default_group
+from app.core.providers import MessageProvider
+
+logger = logging.getLogger(__name__)
+
+ESCALATIONS = REGISTRY.counter("alert_escalations_total", "Escalation steps sent and escalations ended, by outcome",
+                               ("result",))
+ESCALATIONS_IN_FLIGHT = REGISTRY.gauge("alert_escalations_in_flight", "Alerts waiting for delivery confirmation")
+
+# Delivery statuses, as TextBelt reports them
+DELIVERED = "DELIVERED"
+FAILED = "FAILED"
+
+# Escalation states
+WAITING = "waiting"      # the current step is sent, waiting for a delivery or its deadline
+DELIVERED_STATE = "delivered"
+EXHAUSTED = "exhausted"  # the last step went unconfirmed too
+CANCELLED = "cancelled"
+
+_STEP = re.compile(r"^(?:(?P<delay>\d+)\s*(?P<unit>[smh])\s+)?(?P<provider>[\w.\-]+)(?:\s+(?P<recipients>.*))?$",
+                   re.IGNORECASE)
+_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+# A status function takes a message ID and returns its delivery status, None if unknown
+StatusFunction = Callable[[str], Optional[str]]
+
+
+class EscalationStep:
+    """
+    Where an alert goes at one step of its escalation.
+    """
+
+    def __init__(self, provider: str, recipients: List[str], delay: float = 0):
+        """
+        Initialize the step.
+
+        Args:
+            provider: Provider to send through
+            recipients: Recipients, possibly @groups; empty for the provider's default recipients
+            delay: Seconds the previous step waits for a delivery before this one is sent
+        """
+        self.provider = provider
+        self.recipients = recipients
+        self.delay = delay
+
+    @property
+    def target(self) -> str:
+        """Get the provider and recipients as text."""
+        return " ".join([self.provider] + ([", ".join(self.recipients)] if self.recipients else []))
+
+    @property
+    def description(self) -> str:
+        """Get the step as text."""
+        return f"{format_duration(self.delay)} {self.target}" if self.delay else self.target
+
+
+class EscalationPolicy:
+    """
+    The escalation steps for alerts of a priority.
+    """
+
+    def __init__(self, priority: str, steps: List[EscalationStep], final_wait: float = 300):
+        """
+        Initialize the policy.
+
+        Args:
+            priority: Priority of the alerts it applies to
+            steps: The steps, in order
+            final_wait: Seconds the last step waits for a delivery before the alert is given up
+        """
+        self.priority = priority.lower()
+        self.steps = steps
+        self.final_wait = final_wait
+
+    @property
+    def providers(self) -> List[str]:
+        """Get the providers of all steps, without duplicates."""
+        return list(dict.fromkeys(step.provider for step in self.steps))
+
+    @property
+    def description(self) -> str:
+        """Get the policy as text."""
+        return f"{self.priority} | " + " > ".join(step.description for step in self.steps)
+
+    def wait_after(self, index: int) -> float:
+        """Get how long step index waits for a delivery."""
+        return self.steps[index + 1].delay if index + 1 < len(self.steps) else self.final_wait
+
+    @classmethod
+    def parse(cls, rule: str) -> 'EscalationPolicy':
+        """
+        Parse a rule written as 'priority | step > delay step > ...'.
+
+        A step is a provider followed by comma-separated recipients, which may
+        be omitted for the provider's default recipients. Every step but the
+        first starts with how long to wait for the previous step, in seconds,
+        minutes or hours (s, m, h). The last step waits as long as the one before it.
+
+        Args:
+            rule: The rule text
+
+        Returns:
+            EscalationPolicy: The parsed rule
+        """
+        fields = [field.strip() for field in rule.split("|")]
+        if len(fields) != 2 or not fields[1]:
+            raise ValueError(f"Invalid escalation rule '{rule}' (use: priority | sms @primary > 5m sms @secondary > 5m discord)")
+
+        priority = fields[0].lower()
+        if priority not in PRIORITY_LEVELS:
+            raise ValueError(f"Invalid escalation rule '{rule}': unknown priority '{fields[0]}' "
+                             f"(use one of: {', '.join(PRIORITY_LEVELS)})")
+
+        steps = []
+        for index, text in enumerate(part.strip() for part in fields[1].split(">")):
+            match = _STEP.match(text)
+            if not match:
+                raise ValueError(f"Invalid escalation rule '{rule}': cannot read step '{text}'")
+
+            delay = int(match.group("delay")) * _UNITS[match.group("unit").lower()] if match.group("delay") else 0
+            if index == 0 and match.group("delay"):
+                raise ValueError(f"Invalid escalation rule '{rule}': the first step is sent at once, remove its time")
+            if index > 0 and delay <= 0:
+                raise ValueError(f"Invalid escalation rule '{rule}': give the time to wait before step '{text}', e.g. 5m")
+
+            recipients = [recipient.strip() for recipient in (match.group("recipients") or "").split(",")
+                          if recipient.strip()]
+            steps.append(EscalationStep(match.group("provider").lower(), recipients, delay))
+
+        return cls(priority, steps, steps[-1].delay if len(steps) > 1 else 300)
+
+
+def parse_policies(rules: List[str]) -> Tuple[List[EscalationPolicy], List[str]]:
+    """
+    Parse escalation rules, at most one per priority.
+
+    Args:
+        rules: Rule strings in the format accepted by EscalationPolicy.parse
+
+    Returns:
+        Tuple of the policies and error messages for rules that could not be used
+    """
+    policies: List[EscalationPolicy] = []
+    errors = []
+    for rule in rules:
+        try:
+            policy = EscalationPolicy.parse(rule)
+        except ValueError as e:
+            errors.append(str(e))
+            continue
+        if any(existing.priority == policy.priority for existing in policies):
+            errors.append(f"Escalation rule for '{policy.priority}' alerts is given more than once")
+            continue
+        policies.append(policy)
+    return policies, errors
+
+
+class Escalation:
+    """
+    The escalation state of one alert.
+    """
+
+    __slots__ = ("alert", "policy", "step", "state", "deadline", "outstanding", "step_ids", "message_ids")
+
+    def __init__(self, alert: Alert, policy: EscalationPolicy):
+        """Initialize the escalation before its first step."""
+        self.alert = alert
+        self.policy = policy
+        self.step = -1
+        self.state = WAITING
+        self.deadline = 0.0
+        self.outstanding = 0  # deliveries of the current step not known to have failed
+        self.step_ids: List[str] = []
+        self.message_ids: List[str] = []
+
+    def step_id(self, index: int) -> str:
+        """Get the alert ID of a step's deliveries; the first step keeps the alert's ID."""
+        return self.alert.alert_id if index == 0 else f"{self.alert.alert_id}.{index + 1}"
+
+
+class EscalationEngine(QObject):
+    """
+    Sends alerts through their escalation steps until one is confirmed delivered.
+
+    Steps are queued through the alert dispatcher, so they are stored in its
+    outbox and retried like any other alert. The engine follows the dispatcher's
+    signals to learn message IDs and failures.
+    """
+
+    # Define signals
+    status_update = pyqtSignal(str)
+
+    def __init__(self,
+                 dispatcher: AlertDispatcher,
+                 recipient_directory: Optional[RecipientDirectory] = None,
+                 tick: float = 1.0,
+                 poll_interval: float = 30.0,
+                 max_checks_per_tick: int = 20):
+        """
+        Initialize the engine.
+
+        Args:
+            dispatcher: Dispatcher that sends the steps
+            recipient_directory: Directory expanding @groups in step recipients, resolved when each step is sent
+            tick: Scheduler resolution in seconds
+            poll_interval: Seconds between delivery status checks of one message
+            max_checks_per_tick: Status checks per tick at most, the rest wait for the next tick
+        """
+        super().__init__()
+        self.dispatcher = dispatcher
+        self.recipient_directory = recipient_directory or RecipientDirectory()
+        self.tick = tick
+        self.poll_interval = poll_interval
+        self.max_checks_per_tick = max_checks_per_tick
+        self.policies: Dict[str, EscalationPolicy] = {}
+        self.status_functions: Dict[str, StatusFunction] = {}
+        self.escalations: Dict[str, Escalation] = {}
+        self._by_step_id: Dict[str, Escalation] = {}
+        self._by_message_id: Dict[str, Tuple[Escalation, str]] = {}  # message ID -> (escalation, step ID)
+        self._polls: Deque[Tuple[float, str, str]] = deque()  # (due, provider, message ID), in order of due
+        # (deadline, sequence, escalation, step); entries for steps that are over are skipped when they come up
+        self._deadlines: List[Tuple[float, int, Escalation, int]] = []
+        self._sequence = 0
+        self._lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        ESCALATIONS_IN_FLIGHT.set_function(lambda: len(self.escalations))
+
+        dispatcher.alert_sent.connect(self.handle_sent)
+        dispatcher.alert_dispatched.connect(self.handle_dispatched)
+
+    def register_status(self, provider: str, status_function: StatusFunction):
+        """
+        Confirm deliveries through a provider by checking their status.
+
+        Args:
+            provider: Provider name
+            status_function: Callable taking a message ID, see StatusFunction
+        """
+        self.status_functions[provider] = status_function
+
+    def register_provider(self, provider: MessageProvider):
+        """
+        Confirm deliveries through a message provider, if it reports delivery.
+
+        Args:
+            provider: The provider
+        """
+        if provider.reports_delivery:
+            self.register_status(provider.name, provider.status_sync)
+
+    def configure(self, policies: List[EscalationPolicy]):
+        """Replace the escalation policies. Alerts in flight keep the policy they started with."""
+        with self._lock:
+            self.policies = {policy.priority: policy for policy in policies}
+
+    def configure_from_rules(self, rules: List[str]) -> List[str]:
+        """
+        Replace the escalation policies from rule strings.
+
+        Args:
+            rules: Rule strings in the format accepted by EscalationPolicy.parse
+
+        Returns:
+            List of error messages for rules that could not be parsed
+        """
+        policies, errors = parse_policies(rules)
+        self.configure(policies)
+        return errors
+
+    def policy_for(self, priority: str) -> Optional[EscalationPolicy]:
+        """Get the escalation policy of a priority, None if its alerts are not escalated."""
+        return self.policies.get(priority)
+
+    def escalate(self, alert: Alert, policy: Optional[EscalationPolicy] = None) -> bool:
+        """
+        Start escalating an alert by sending its first step.
+
+        Args:
+            alert: The alert; its messages should cover the providers of the policy
+            policy: Policy to follow, defaults to the policy of the alert's priority
+
+        Returns:
+            bool: True if the alert is escalating
+        """
+        policy = policy or self.policy_for(alert.priority)
+        if policy is None:
+            return False
+
+        with self._lock:
+            if alert.alert_id in self.escalations:
+                return True
+            escalation = Escalation(alert, policy)
+            self.escalations[alert.alert_id] = escalation
+            self._advance(escalation, time.time())
+            return escalation.state == WAITING
+
+    def cancel(self, alert_id: str) -> bool:
+        """
+        Stop escalating an alert, e.g. when someone acknowledged it another way.
+
+        Returns:
+            bool: True if the alert was escalating
+        """
+        with self._lock:
+            escalation = self.escalations.get(alert_id)
+            if escalation is None:
+                return False
+            self._finish(escalation, CANCELLED)
+            return True
+
+    def handle_sent(self, step_id: str, provider: str, recipient: str, message_id: str):
+        """
+        Follow a delivery that was sent; connected to AlertDispatcher.alert_sent.
+
+        Args:
+            step_id: Alert ID of the step's deliveries
+            provider: Provider it was sent through
+            recipient: Its recipient
+            message_id: The provider's message ID, empty if it has none
+        """
+        with self._lock:
+            escalation = self._by_step_id.get(step_id)
+            if escalation is None or escalation.state != WAITING:
+                return
+
+            if message_id and provider in self.status_functions:
+                escalation.message_ids.append(message_id)
+                self._by_message_id[message_id] = (escalation, step_id)
+                self._polls.append((time.time() + self.poll_interval, provider, message_id))
+            else:
+                # Nothing to confirm, being sent is as good as delivered
+                self._deliver(escalation, provider, recipient)
+
+    def handle_dispatched(self, step_id: str, provider: str, recipient: str, success: bool):
+        """
+        Follow the outcome of a delivery; connected to AlertDispatcher.alert_dispatched.
+
+        Only failures matter here, successful sends arrive through handle_sent.
+        """
+        if success:
+            return
+        with self._lock:
+            escalation = self._by_step_id.get(step_id)
+            if escalation is not None:
+                self._fail(escalation, step_id, time.time())
+
+    def handle_status(self, message_id: str, status: str):
+        """
+        Follow the delivery status of a message, e.g. from SMSSender.sms_status_updated.
+
+        Args:
+            message_id: The provider's message ID
+            status: The status, such as DELIVERED or FAILED
+        """
+        with self._lock:
+            entry = self._by_message_id.get(message_id)
+            if entry is None:
+                return
+            escalation, step_id = entry
+            if escalation.state != WAITING:
+                return
+
+            status = (status or "").upper()
+            if status == DELIVERED:
+                self._deliver(escalation, "", "")
+            elif status == FAILED:
+                del self._by_message_id[message_id]
+                self._fail(escalation, step_id, time.time())
+
+    def check(self, now: Optional[float] = None):
+        """Escalate alerts whose deadline has passed and check due delivery statuses; runs every tick."""
+        now = time.time() if now is None else now
+        with self._lock:
+            while self._deadlines and self._deadlines[0][0] <= now:
+                _, _, escalation, index = heapq.heappop(self._deadlines)
+                if escalation.state != WAITING or escalation.step != index:
+                    continue
+                step = escalation.policy.steps[escalation.step]
+                self._emit(f"Alert '{escalation.alert.pattern}' not confirmed delivered via {step.provider} "
+                           f"within {format_duration(escalation.policy.wait_after(escalation.step))}")
+                self._advance(escalation, now)
+
+            due = []
+            while self._polls and self._polls[0][0] <= now and len(due) < self.max_checks_per_tick:
+                _, provider, message_id = self._polls.popleft()
+                if message_id in self._by_message_id:
+                    due.append((provider, message_id))
+
+        # Status checks are network calls, made without holding the lock
+        for provider, message_id in due:
+            try:
+                status = self.status_functions[provider](message_id)
+            except Exception as e:
+                logger.error(f"Error checking delivery status of {message_id}: {str(e)}")
+                status = None
+
+            self.handle_status(message_id, status or "")
+            with self._lock:
+                if message_id in self._by_message_id:
+                    self._polls.append((time.time() + self.poll_interval, provider, message_id))
+
+    def start(self):
+        """Start the scheduler thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="EscalationScheduler")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop the scheduler thread. Alerts in flight are not escalated further."""
+        self._stop_event.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(1.0)
+
+    def _run(self):
+        """Scheduler loop."""
+        while not self._stop_event.wait(self.tick):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Error in escalation scheduler: {str(e)}")
+
+    def _advance(self, escalation: Escalation, now: float):
+        """Send the next step of an escalation, skipping steps that cannot be sent."""
+        steps = escalation.policy.steps
+        while escalation.step + 1 < len(steps):
+            escalation.step += 1
+            step = steps[escalation.step]
+            if self._send_step(escalation, step):
+                escalation.deadline = now + escalation.policy.wait_after(escalation.step)
+                self._sequence += 1
+                heapq.heappush(self._deadlines, (escalation.deadline, self._sequence, escalation, escalation.step))
+                return
+            self._emit(f"Escalation step '{step.description}' for '{escalation.alert.pattern}' could not be sent")
+
+        self._finish(escalation, EXHAUSTED)
+
+    def _send_step(self, escalation: Escalation, step: EscalationStep) -> bool:
+        """Queue one step through the dispatcher. Returns False if nothing was queued."""
+        if not self.dispatcher.has_sender(step.provider):
+            return False
+
+        for group in self.recipient_directory.unknown_groups(step.recipients):
+            self._emit(f"Recipient group {group} is not defined, skipped in escalation step '{step.description}'")
+        recipients = self.recipient_directory.resolve(step.recipients, default=default_group(step.provider))
+        if not recipients and step.provider in self.dispatcher.recipient_sources:
+            recipients = self.dispatcher.recipient_sources[step.provider]()
+        if not recipients:
+            return False
+
+        alert = escalation.alert
+        step_id = escalation.step_id(escalation.step)
+        route = AlertRoute([alert.pattern], alert.priority, [step.provider], {step.provider: recipients})
+        escalation.step_ids.append(step_id)
+        self._by_step_id[step_id] = escalation
+        if escalation.step > 0:
+            self._emit(f"Escalating alert '{alert.pattern}' to {step.target}")
+        # Deliveries dropped from a full queue will never report back, so only queued ones count
+        queued = self.dispatcher.submit(Alert(alert.pattern, alert.line, alert.message, route,
+                                              alert_id=step_id, messages=alert.messages))
+        if not queued:
+            return False
+        escalation.outstanding = queued
+
+        ESCALATIONS.labels("step").inc()
+        return True
+
+    def _fail(self, escalation: Escalation, step_id: str, now: float):
+        """Count a failed delivery; escalate at once when the whole current step has failed."""
+        if escalation.state != WAITING or step_id != escalation.step_id(escalation.step):
+            return
+        escalation.outstanding -= 1
+        if escalation.outstanding <= 0:
+            self._emit(f"All deliveries of alert '{escalation.alert.pattern}' via "
+                       f"{escalation.policy.steps[escalation.step].provider} failed")
+            self._advance(escalation, now)
+
+    def _deliver(self, escalation: Escalation, provider: str, recipient: str):
+        """End an escalation with a confirmed delivery."""
+        if recipient:
+            self._emit(f"Alert '{escalation.alert.pattern}' delivered via {provider} to {recipient}")
+        else:
+            self._emit(f"Alert '{escalation.alert.pattern}' confirmed delivered")
+        self._finish(escalation, DELIVERED_STATE)
+
+    def _finish(self, escalation: Escalation, state: str):
+        """End an escalation and forget it. Its pending deadline is skipped when it comes up."""
+        escalation.state = state
+        ESCALATIONS.labels(state).inc()
+        if state == EXHAUSTED:
+            self._emit(f"Alert '{escalation.alert.pattern}' was not confirmed delivered after "
+                       f"{len(escalation.policy.steps)} escalation step(s)")
+
+        self.escalations.pop(escalation.alert.alert_id, None)
+        for step_id in escalation.step_ids:
+            self._by_step_id.pop(step_id, None)
+        for message_id in escalation.message_ids:
+            self._by_message_id.pop(message_id, None)
+
+    def _emit(self, message: str):
+        self.status_update.emit(message)
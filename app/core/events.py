@@ -0,0 +1,91 @@
+"""
+Structured status events, emitted by the core classes in place of preformatted strings.
+
+An event carries a type, a level and its fields. The text shown to the user is
+only built from the template when something reads event.message, and senders
+drop events below their verbosity before creating them at all.
+"""
+
+import logging
+import time
+from typing import Any, Dict, Union
+
+# Event levels, shared with the logging module
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
+
+
+def parse_level(level: Union[int, str]) -> int:
+    """
+    Convert a level name such as "debug" or "INFO", or a number, to a level.
+
+    Args:
+        level: Level name or number
+
+    Returns:
+        int: The level
+
+    Raises:
+        ValueError: If the name is not a known level
+    """
+    if isinstance(level, int):
+        return level
+    if str(level).strip().isdigit():
+        return int(level)
+
+    value = logging.getLevelName(str(level).strip().upper())
+    if not isinstance(value, int):
+        raise ValueError(f"Unknown event level: {level}")
+    return value
+
+
+class StatusEvent:
+    """
+    A status event with a type, a level and the fields of its message.
+    """
+
+    __slots__ = ("event_type", "level", "template", "fields", "timestamp", "_message")
+
+    def __init__(self, event_type: str, level: int, template: str, fields: Dict[str, Any]):
+        """
+        Initialize the event.
+
+        Args:
+            event_type: Short machine-readable type, e.g. "sms_sent"
+            level: Event level, e.g. INFO
+            template: str.format template for the message, filled from fields
+            fields: Values describing the event
+        """
+        self.event_type = event_type
+        self.level = level
+        self.template = template
+        self.fields = fields
+        self.timestamp = time.time()
+        self._message = None
+
+    @property
+    def message(self) -> str:
+        """Get the human-readable message, formatting it on first use."""
+        if self._message is None:
+            self._message = self.template.format(**self.fields)
+        return self._message
+
+    @property
+    def level_name(self) -> str:
+        """Get the name of the event level."""
+        return logging.getLevelName(self.level)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the event to a dictionary."""
+        return {
+            "type": self.event_type,
+            "level": self.level_name,
+            "timestamp": self.timestamp,
+            "message": self.message,
+            "fields": self.fields
+        }
+
+    def __str__(self) -> str:
+        return self.message
@@ -3,11 +3,33 @@ File monitoring module for watching log files and detecting patterns.
 """
 
 import os
+import mmap
 import threading
 import time
 from typing import Callable, List, Dict, Optional
 from PyQt5.QtCore import QObject, pyqtSignal
 
+from app.core.log_reader import compression, open_log, read_blocks
+from app.core.matcher import Match, ParallelMatcher, decode_line, split_chunks
+from app.core.metrics import REGISTRY
+from app.core.records import RecordAssembler
+from app.core.structured import PatternSet
+from app.core.tracing import TRACER
+
+# Metrics updated once per read, not per line, to keep the loop cheap
+LINES_READ = REGISTRY.counter("monitor_lines_read_total", "Log lines read by the file monitor")
+BYTES_READ = REGISTRY.counter("monitor_bytes_read_total", "Bytes read by the file monitor")
+MATCHES = REGISTRY.counter("monitor_matches_total", "Pattern matches found by the file monitor", ("pattern",))
+READ_SECONDS = REGISTRY.histogram("monitor_read_seconds", "Time to read and match one batch of new data")
+ERRORS = REGISTRY.counter("monitor_errors_total", "Errors in the file monitor loop")
+
+# Unread regions at least this large are scanned as a backlog
+BACKLOG_THRESHOLD = 8 << 20
+# Bytes of backlog matched between pattern_found batches, so events and progress flow during long scans
+BACKLOG_SEGMENT = 64 << 20
+# Smaller appends are read into one bytes buffer, where mapping the file costs more than it saves
+MAPPED_READ_MIN = 64 << 10
+
 
 class FileMonitor(QObject):
     """
@@ -17,7 +39,8 @@ class FileMonitor(QObject):
     
     # Define signals
     file_updated = pyqtSignal(str)
-    pattern_found = pyqtSignal(str, str)
+    pattern_found = pyqtSignal(str, str, str)  # pattern, line, trace ID ("" when tracing is off)
+    record_found = pyqtSignal(list, str, str)  # patterns, record, trace ID, once per multi-line record
     status_update = pyqtSignal(str)
     
     def __init__(self):
@@ -28,26 +51,114 @@ class FileMonitor(QObject):
         self.running = False
         self.monitor_thread = None
         self.last_position = 0
+        self.parallel_matcher: Optional[ParallelMatcher] = None
+        self.record_assembler: Optional[RecordAssembler] = None
+        self._pending_record = b""
+        self.pattern_set = PatternSet([])
+        self._active = self.pattern_set  # the set used by the read in progress
+        self.generation = 0
+        self._requested_generation = 0
+        self._swap_lock = threading.Lock()
+        self.backlog_threshold = BACKLOG_THRESHOLD
+        self.mapped_reads = True
+        self.compression: Optional[str] = None
+        self._compression_checked = False
+        self._compressed_size = -1
+    
+    def set_parallel_matcher(self, parallel_matcher: Optional[ParallelMatcher]):
+        """
+        Match new data in a pool of worker processes instead of line by line in the monitor thread.
+        
+        Args:
+            parallel_matcher: The matcher to use, or None to match in the monitor thread
+        """
+        self.parallel_matcher = parallel_matcher
     
-    def configure(self, file_path: str, patterns: List[str]):
+    def set_record_assembler(self, record_assembler: Optional[RecordAssembler]):
+        """
+        Group lines into multi-line records, such as stack traces, and match whole records.
+        
+        Args:
+            record_assembler: The assembler to use, or None to match single lines
+        """
+        self.record_assembler = record_assembler
+        self._pending_record = b""
+    
+    def configure(self, file_path: str, patterns: List[str], scan_existing: bool = False):
         """
         Configure the file monitor with a file path and patterns to detect.
         
         Args:
             file_path: Path to the file to monitor
-            patterns: List of string patterns to look for
+            patterns: List of string patterns, or "where: ..." field conditions, to look for
+            scan_existing: If True, also match the content already in the file
+        
+        Raises:
+            ValueError: If a field condition is invalid
         """
+        pattern_set = PatternSet(patterns)
+        with self._swap_lock:
+            self._requested_generation += 1
+            self.generation = self._requested_generation
+            self.pattern_set = pattern_set
         self.file_path = file_path
         self.patterns = patterns
         self.last_position = 0
+        self._pending_record = b""
+        self.compression = None
+        self._compression_checked = False
+        self._compressed_size = -1
         
         # Reset position if file exists
         if os.path.exists(self.file_path):
-            self.last_position = os.path.getsize(self.file_path)
+            if not scan_existing:
+                self.last_position = os.path.getsize(self.file_path)
             self.status_update.emit(f"Monitor configured to watch {self.file_path}")
         else:
             self.status_update.emit(f"Warning: File {self.file_path} does not exist yet")
     
+    def update_patterns(self, patterns: List[str]) -> int:
+        """
+        Replace the patterns while the monitor keeps reading.
+        
+        The new set is compiled in a background thread and swapped in between
+        reads, so no data is skipped or matched twice. A read in progress
+        finishes with the set it started with. If patterns are updated again
+        before a compile finishes, only the newest set is swapped in.
+        
+        Args:
+            patterns: List of string patterns, or "where: ..." field conditions, to look for
+        
+        Returns:
+            int: The generation number the new set will have
+        """
+        with self._swap_lock:
+            self._requested_generation += 1
+            generation = self._requested_generation
+        
+        compiler = threading.Thread(target=self._compile_patterns, args=(list(patterns), generation),
+                                    name="PatternCompiler")
+        compiler.daemon = True
+        compiler.start()
+        return generation
+    
+    def _compile_patterns(self, patterns: List[str], generation: int):
+        """Compile a pattern set and swap it in unless a newer one already was."""
+        try:
+            pattern_set = PatternSet(patterns)
+        except ValueError as e:
+            self.status_update.emit(f"Error: {str(e)}")
+            return
+        
+        with self._swap_lock:
+            if generation <= self.generation:
+                return
+            self.pattern_set = pattern_set
+            self.patterns = patterns
+            self.generation = generation
+        
+        self.status_update.emit(f"Patterns updated (generation {generation})")
+    
     def start(self):
         """Start monitoring the file in a separate thread."""
         if not self.file_path:
@@ -59,7 +170,7 @@ class FileMonitor(QObject):
             return
         
         self.running = True
-        self.monitor_thread = threading.Thread(target=self._monitor_loop)
+        self.monitor_thread = threading.Thread(target=self._monitor_loop, name="FileMonitor")
         self.monitor_thread.daemon = True  # Thread will exit when main program exits
         self.monitor_thread.start()
         
@@ -81,25 +192,269 @@ class FileMonitor(QObject):
                     time.sleep(0.5)
                     continue
                 
-                current_size = os.path.getsize(self.file_path)
+                stat = os.stat(self.file_path)
+                current_size = stat.st_size
                 
                 if current_size > self.last_position:
-                    # File has grown, read the new data
-                    with open(self.file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        f.seek(self.last_position)
-                        new_data = f.read()
+                    if not self._compression_checked:
+                        self.compression = compression(self.file_path)
+                        self._compression_checked = True
                     
-                    self.last_position = current_size
-                    self.file_updated.emit(f"Read {len(new_data)} new characters")
-                    
-                    # Process the new data line by line
-                    for line in new_data.splitlines():
-                        for pattern in self.patterns:
-                            if pattern.lower() in line.lower():
-                                self.pattern_found.emit(pattern, line)
+                    if self.compression and current_size != self._compressed_size:
+                        # Wait for a compressed file to stop growing, a partly written stream cannot be read
+                        self._compressed_size = current_size
+                    else:
+                        self._process_new_data(stat, current_size)
+                elif self._pending_record:
+                    # Nothing was added for a poll, so the last record is complete
+                    self._flush_record(stat)
             
             except Exception as e:
+                ERRORS.inc()
                 self.status_update.emit(f"Error: {str(e)}")
                 
             # Sleep to avoid high CPU usage
-            time.sleep(0.5) 
\ No newline at end of file
+            time.sleep(0.5)
+    
+    def _process_new_data(self, stat: os.stat_result, current_size: int):
+        """Match the data written since the last read with the reader that suits it."""
+        started = time.perf_counter()
+        self._active = self.pattern_set
+        BYTES_READ.inc(current_size - self.last_position)
+        
+        if self.record_assembler is not None:
+            self._process_records(stat, current_size)
+        elif self.compression:
+            self._process_compressed(stat, current_size)
+        elif current_size - self.last_position >= self.backlog_threshold:
+            self._scan_backlog(stat, current_size)
+        elif self.parallel_matcher is not None:
+            self._process_parallel(stat, current_size)
+        elif self.mapped_reads or self._active.has_rules:
+            self._process_mapped(stat, current_size)
+        else:
+            self._process_text(stat, current_size)
+        
+        READ_SECONDS.observe(time.perf_counter() - started)
+    
+    def _process_mapped(self, stat: os.stat_result, current_size: int):
+        """
+        Match the new bytes in place, decoding only the matching lines.
+        
+        Large appends are searched through a memory map of the file and small
+        ones in a single bytes read, so lines that do not match never become
+        Python strings.
+        """
+        start = self.last_position
+        with open(self.file_path, 'rb') as f:
+            if current_size - start >= MAPPED_READ_MIN:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    read_at = time.time() if TRACER.enabled else 0.0
+                    end = min(current_size, len(data))
+                    matches, line_count = self._active.matcher.scan_with_count(data, start, end)
+                    self._emit_matches(data, matches, stat.st_mtime, read_at)
+                self.last_position = end
+            else:
+                f.seek(start)
+                data = f.read(current_size - start)
+                read_at = time.time() if TRACER.enabled else 0.0
+                matches, line_count = self._active.matcher.scan_with_count(data)
+                self._emit_matches(data, matches, stat.st_mtime, read_at)
+                self.last_position = start + len(data)
+        
+        self.file_updated.emit(f"Read {self.last_position - start} new bytes")
+        LINES_READ.inc(line_count)
+    
+    def _process_text(self, stat: os.stat_result, current_size: int):
+        """Read the new data as text and match it line by line, when mapped_reads is off and no pattern is a field condition."""
+        # File has grown, read the new data
+        with open(self.file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            f.seek(self.last_position)
+            new_data = f.read()
+        
+        read_at = time.time() if TRACER.enabled else 0.0
+        
+        self.last_position = current_size
+        self.file_updated.emit(f"Read {len(new_data)} new characters")
+        
+        # Process the new data line by line
+        lines = new_data.splitlines()
+        for line in lines:
+            for pattern in self._active.patterns:
+                if pattern.lower() in line.lower():
+                    self._emit_match(pattern, line, stat.st_mtime, read_at)
+        
+        LINES_READ.inc(len(lines))
+    
+    def _process_parallel(self, stat: os.stat_result, current_size: int):
+        """Read the new bytes and match them with the parallel matcher."""
+        with open(self.file_path, 'rb') as f:
+            f.seek(self.last_position)
+            new_data = f.read(current_size - self.last_position)
+        
+        read_at = time.time() if TRACER.enabled else 0.0
+        
+        self.last_position += len(new_data)
+        self.file_updated.emit(f"Read {len(new_data)} new bytes")
+        
+        matches = self.parallel_matcher.scan(self._active.literals, new_data)
+        self._emit_matches(new_data, matches, stat.st_mtime, read_at)
+        
+        LINES_READ.inc(new_data.count(b"\n"))
+    
+    def _scan_backlog(self, stat: os.stat_result, current_size: int):
+        """
+        Match a large unread region, e.g. an existing log or data written while stopped.
+        
+        The file is memory-mapped and matched as bytes in large blocks, so
+        lines that do not match are never decoded or copied into strings.
+        """
+        start = self.last_position
+        self.status_update.emit(f"Scanning {(current_size - start) / (1 << 20):.1f} MiB backlog of {self.file_path}")
+        
+        with open(self.file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            end = min(current_size, len(data))
+            for segment_start, segment_end in split_chunks(data, BACKLOG_SEGMENT, start, end):
+                if not self.running:
+                    break
+                
+                read_at = time.time() if TRACER.enabled else 0.0
+                if self.parallel_matcher is not None:
+                    matches, line_count = self.parallel_matcher.scan_file(
+                        self._active.literals, self.file_path, data, segment_start, segment_end
+                    )
+                else:
+                    matches, line_count = self._active.matcher.scan_with_count(data, segment_start, segment_end)
+                
+                self._emit_matches(data, matches, stat.st_mtime, read_at)
+                
+                self.last_position = segment_end
+                LINES_READ.inc(line_count)
+        
+        self.file_updated.emit(f"Scanned {self.last_position - start} bytes of backlog")
+    
+    def _process_compressed(self, stat: os.stat_result, current_size: int):
+        """
+        Decompress and match the new part of a compressed log, e.g. a rotated file.
+        
+        Compressed logs grow by whole appended streams, so reading continues from
+        the compressed size last seen. Data is decompressed a block at a time.
+        """
+        decompressed = 0
+        with open_log(self.file_path, self.last_position) as stream:
+            for block in read_blocks(stream):
+                if not self.running:
+                    return
+                
+                read_at = time.time() if TRACER.enabled else 0.0
+                if self.parallel_matcher is not None:
+                    matches, line_count = self.parallel_matcher.scan(self._active.literals, block), block.count(b"\n")
+                else:
+                    matches, line_count = self._active.matcher.scan_with_count(block)
+                
+                self._emit_matches(block, matches, stat.st_mtime, read_at)
+                decompressed += len(block)
+                LINES_READ.inc(line_count)
+        
+        self.last_position = current_size
+        self.file_updated.emit(f"Read {decompressed} bytes from {self.compression} file")
+    
+    def _process_records(self, stat: os.stat_result, current_size: int):
+        """
+        Read the new data in blocks, assemble it into records and match whole records.
+        
+        The last record of each read is held back until the next record starts
+        or the file is idle for a poll, as more of its lines may still come.
+        """
+        start = self.last_position
+        read = 0
+        with open_log(self.file_path, start) as stream:
+            for block in read_blocks(stream):
+                if not self.running:
+                    break
+                read += len(block)
+                data = self._pending_record + block if self._pending_record else block
+                
+                read_at = time.time() if TRACER.enabled else 0.0
+                matches, consumed, line_count = self.record_assembler.scan(self._active.matcher, data)
+                self._emit_records(data, matches, stat.st_mtime, read_at)
+                
+                self._pending_record = data[consumed:]
+                LINES_READ.inc(line_count)
+        
+        # A compressed file is read to its end, a plain one may have grown since stat
+        self.last_position = current_size if self.compression else start + read
+        self.file_updated.emit(f"Read {read} new bytes")
+    
+    def _flush_record(self, stat: os.stat_result):
+        """Match the record held back by _process_records."""
+        data = self._pending_record
+        self._pending_record = b""
+        self._active = self.pattern_set
+        
+        read_at = time.time() if TRACER.enabled else 0.0
+        matches, _, line_count = self.record_assembler.scan(self._active.matcher, data, final=True)
+        self._emit_records(data, matches, stat.st_mtime, read_at)
+        LINES_READ.inc(line_count)
+    
+    def _emit_matches(self, data, matches: List[Match], modified_at: float, read_at: float):
+        """
+        Decode the matching lines found in a buffer and emit their matches.
+        
+        Args:
+            data: The buffer that was scanned
+            matches: (line start, end, literal indices) from a scan with pattern_set.literals
+            modified_at: Modification time of the file when it was read
+            read_at: When the data was read, 0 when tracing is off
+        """
+        for line_start, line_end, indices in self._active.resolve(data, matches):
+            line = decode_line(data, line_start, line_end)
+            for index in indices:
+                self._emit_match(self._active.patterns[index], line, modified_at, read_at)
+    
+    def _emit_records(self, data, matches: List[Match], modified_at: float, read_at: float):
+        """
+        Decode the records found in a buffer and emit each once, with all the patterns it contains.
+        
+        Args:
+            data: The buffer that was scanned
+            matches: (record start, end, pattern indices) from a record assembler scan
+            modified_at: Modification time of the file when it was read
+            read_at: When the data was read, 0 when tracing is off
+        """
+        for record_start, record_end, indices in self._active.resolve(data, matches):
+            record = decode_line(data, record_start, record_end)
+            patterns = [self._active.patterns[index] for index in indices]
+            trace_id = self._count_match(patterns, modified_at, read_at)
+            self.record_found.emit(patterns, record, trace_id)
+    
+    def _emit_match(self, pattern: str, line: str, modified_at: float, read_at: float):
+        """
+        Count and emit a match, tracing it when tracing is on.
+        
+        Args:
+            pattern: The pattern found
+            line: The line containing it
+            modified_at: Modification time of the file when it was read
+            read_at: When the data was read, 0 when tracing is off
+        """
+        trace_id = self._count_match([pattern], modified_at, read_at)
+        self.pattern_found.emit(pattern, line, trace_id)
+    
+    def _count_match(self, patterns: List[str], modified_at: float, read_at: float) -> str:
+        """
+        Count the patterns found in a line or record and trace the match when tracing is on.
+        
+        Returns:
+            str: Trace ID of the match, empty when tracing is off
+        """
+        for pattern in patterns:
+            MATCHES.labels(pattern).inc()
+        if not read_at:
+            return ""
+        
+        # The file's modification time stands in for when the line was written
+        trace_id = TRACER.new_trace_id()
+        TRACER.record(trace_id, "detect", min(modified_at, read_at), read_at, file=self.file_path)
+        TRACER.record(trace_id, "match", read_at, time.time(), pattern=", ".join(patterns))
+        return trace_id 
\ No newline at end of file
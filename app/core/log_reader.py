@@ -0,0 +1,128 @@
+"""
+Readers for plain and compressed log files.
+
+Rotated logs are often compressed with gzip, bzip2 or xz. open_log gives the
+same binary stream interface for all of them, decompressing as it is read, and
+read_blocks turns any such stream into blocks of whole lines for the matchers.
+Memory stays bounded by the block size and no temporary files are written.
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+import os
+from typing import BinaryIO, Callable, Dict, Iterator, Optional
+
+# Compression formats by leading bytes of the file
+_MAGIC = {
+    "gzip": b"\x1f\x8b",
+    "bzip2": b"BZh",
+    "xz": b"\xfd7zXZ\x00",
+}
+
+_SUFFIXES = {
+    ".gz": "gzip",
+    ".bz2": "bzip2",
+    ".xz": "xz",
+}
+
+# Decompressing readers wrapping a raw binary file
+_DECOMPRESSORS: Dict[str, Callable[[BinaryIO], BinaryIO]] = {
+    "gzip": lambda raw: gzip.GzipFile(fileobj=raw, mode="rb"),
+    "bzip2": lambda raw: bz2.BZ2File(raw, "rb"),
+    "xz": lambda raw: lzma.LZMAFile(raw, "rb"),
+}
+
+DEFAULT_BLOCK_SIZE = 4 << 20
+
+
+def compression(path: str) -> Optional[str]:
+    """
+    Detect the compression of a file from its first bytes, or its suffix if it is empty.
+
+    Args:
+        path: Path of the file
+
+    Returns:
+        str: "gzip", "bzip2" or "xz", or None for a plain file
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(6)
+    except OSError:
+        head = b""
+
+    for name, magic in _MAGIC.items():
+        if head.startswith(magic):
+            return name
+    if not head:
+        return _SUFFIXES.get(os.path.splitext(path)[1].lower())
+    return None
+
+
+class _CompressedLog(io.BufferedReader):
+    """Decompressing stream that also closes the raw file it reads."""
+
+    def __init__(self, decompressed: BinaryIO, raw: BinaryIO):
+        super().__init__(decompressed)
+        self._raw = raw
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._raw.close()
+
+
+def open_log(path: str, offset: int = 0) -> BinaryIO:
+    """
+    Open a log file for reading as bytes, decompressing it if needed.
+
+    Compressed logs only grow by whole appended streams, which all three
+    formats read as one, so the size of the file when it was last read is a
+    valid offset to continue from.
+
+    Args:
+        path: Path of a plain, gzip, bzip2 or xz file
+        offset: Byte offset in the file to start at; for a compressed file it
+            must be the start of a compressed stream
+
+    Returns:
+        Binary stream of the uncompressed content from offset
+    """
+    decompressor = _DECOMPRESSORS.get(compression(path))
+    raw = open(path, "rb")
+    raw.seek(offset)
+    if decompressor is None:
+        return raw
+    return _CompressedLog(decompressor(raw), raw)
+
+
+def read_blocks(stream: BinaryIO, block_size: int = DEFAULT_BLOCK_SIZE) -> Iterator[bytes]:
+    """
+    Read a stream as blocks of whole lines.
+
+    Each block is about block_size bytes and ends with a newline, except the
+    last one when the stream does not end with a newline.
+
+    Args:
+        stream: Binary stream to read
+        block_size: Bytes read at a time
+
+    Yields:
+        bytes: The blocks
+    """
+    carry = b""
+    while True:
+        chunk = stream.read(block_size)
+        if not chunk:
+            break
+        data = carry + chunk if carry else chunk
+        cut = data.rfind(b"\n") + 1
+        if cut:
+            yield data[:cut]
+        carry = data[cut:]
+
+    if carry:
+        yield carry
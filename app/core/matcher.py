@@ -0,0 +1,343 @@
+"""
+Pattern matching over raw bytes, in this process or in a pool of worker processes.
+
+PatternMatcher finds the lines of a bytes-like buffer that contain any of the
+patterns, with the same case-insensitive substring rule as FileMonitor. Each
+block is lower-cased in one call and a single regular expression over all
+patterns skips non-matching data in C; only the lines that hit are sliced out
+and checked pattern by pattern. Lower-casing bytes only folds ASCII letters,
+so the expression accepts either case of other letters, and lines hit by a
+non-ASCII pattern are decoded and checked as text.
+
+ParallelMatcher spreads that work over several processes. The data is copied
+once into a shared memory block, split into chunks on line boundaries, and
+each worker, holding its compiled pattern sets, returns match offsets.
+"""
+
+import logging
+import mmap
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (line start, line end, indices of the patterns found in the line)
+Match = Tuple[int, int, List[int]]
+
+_NEWLINE = re.compile(b"\n")
+
+
+class PatternMatcher:
+    """
+    Finds lines containing any of a set of patterns in bytes-like data.
+
+    Matching is case-insensitive, as for text lower-cased with str.lower. Lines
+    end at b"\\n", and a trailing b"\\r" is not part of the line.
+    """
+
+    def __init__(self, patterns: Sequence[str], block_size: int = 4 << 20):
+        """
+        Initialize the matcher.
+
+        Args:
+            patterns: Patterns to look for
+            block_size: Bytes lower-cased and searched at a time
+        """
+        self.patterns = list(patterns)
+        self.block_size = block_size
+        self.lowered = [pattern.lower().encode("utf-8") for pattern in self.patterns]
+        # Patterns bytes.lower cannot fold, checked against the decoded line
+        self.text_patterns = {index: pattern.lower() for index, pattern in enumerate(self.patterns)
+                              if not pattern.isascii()}
+        # Searching lower-cased data with a case-sensitive expression is several
+        # times faster than re.IGNORECASE
+        alternatives = sorted({_byte_expression(pattern) for pattern in self.patterns if pattern}, key=len, reverse=True)
+        self.regex = re.compile(b"|".join(alternatives)) if alternatives else None
+
+    def scan(self, data, start: int = 0, end: Optional[int] = None) -> List[Match]:
+        """
+        Find the matching lines in data[start:end].
+
+        Args:
+            data: bytes, bytearray, mmap or memoryview; start must be at a line start
+            start: Offset to start at
+            end: Offset to stop at, defaults to the end of data
+
+        Returns:
+            List of (line start, line end, pattern indices), in file order
+        """
+        return self.scan_with_count(data, start, end)[0]
+
+    def scan_with_count(self, data, start: int = 0, end: Optional[int] = None) -> Tuple[List[Match], int]:
+        """
+        Find the matching lines in data[start:end] and count the newlines scanned.
+
+        Returns:
+            Tuple of the matches, as for scan, and the newline count
+        """
+        end = len(data) if end is None else end
+        results = []
+        line_count = 0
+        for block_start, block_end in split_chunks(data, self.block_size, start, end):
+            block = bytes(data[block_start:block_end]).lower()
+            line_count += block.count(b"\n")
+            if self.regex is not None:
+                self._scan_block(block, block_start, results)
+        return results, line_count
+
+    def _scan_block(self, block: bytes, offset: int, results: List[Match]):
+        """Scan one lower-cased block of whole lines, appending matches to results."""
+        search = self.regex.search
+        position = 0
+        while True:
+            hit = search(block, position)
+            if hit is None:
+                break
+
+            line_start = block.rfind(b"\n", 0, hit.start()) + 1
+            line_end = block.find(b"\n", hit.end())
+            position = line_end + 1
+            if line_end < 0:
+                line_end = position = len(block)
+
+            # Only matching lines are sliced out of the block
+            line = block[line_start:line_end]
+            if self.text_patterns:
+                text = line.decode("utf-8", errors="ignore").lower()
+                indices = [
+                    index for index, pattern in enumerate(self.lowered)
+                    if pattern and (self.text_patterns[index] in text if index in self.text_patterns else pattern in line)
+                ]
+                if not indices:
+                    # Another case of a letter than str.lower gives, e.g. a final sigma
+                    continue
+            else:
+                indices = [index for index, pattern in enumerate(self.lowered) if pattern and pattern in line]
+            if line.endswith(b"\r"):
+                line_end -= 1
+            results.append((offset + line_start, offset + line_end, indices))
+
+    def match_lines(self, data, start: int = 0, end: Optional[int] = None) -> List[Tuple[str, List[str]]]:
+        """
+        Find the matching lines and decode them.
+
+        Returns:
+            List of (line, patterns found in it)
+        """
+        return [
+            (decode_line(data, line_start, line_end), [self.patterns[index] for index in indices])
+            for line_start, line_end, indices in self.scan(data, start, end)
+        ]
+
+
+def _byte_expression(pattern: str) -> bytes:
+    """
+    Get the expression finding a pattern in data lower-cased with bytes.lower.
+
+    ASCII letters are lower-cased in the data already. Other letters may be in
+    any case there, so each one matches the UTF-8 of its lower and upper case.
+    """
+    if pattern.isascii():
+        return re.escape(pattern.lower().encode("utf-8"))
+    parts = []
+    for char in pattern.lower():
+        variants = sorted({variant.encode("utf-8") for variant in (char, char.upper()) if len(variant) == 1})
+        if char.isascii() or len(variants) == 1:
+            parts.append(re.escape(char.encode("utf-8")))
+        else:
+            parts.append(b"(?:" + b"|".join(re.escape(variant) for variant in variants) + b")")
+    return b"".join(parts)
+
+
+def decode_line(data, line_start: int, line_end: int) -> str:
+    """Decode one line of a buffer the way FileMonitor reads text."""
+    return bytes(data[line_start:line_end]).decode("utf-8", errors="ignore")
+
+
+def split_chunks(data, chunk_size: int, start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Split data[start:end] into ranges of about chunk_size bytes that end on line boundaries.
+
+    Returns:
+        List of (start, end) offsets
+    """
+    end = len(data) if end is None else end
+    chunks = []
+    while start < end:
+        stop = min(start + chunk_size, end)
+        if stop < end:
+            newline = _NEWLINE.search(data, stop, end)
+            stop = newline.end() if newline else end
+        chunks.append((start, stop))
+        start = stop
+    return chunks
+
+
+# Compiled pattern sets of a worker process, keyed by the pattern tuple
+_worker_matchers: Dict[Tuple[str, ...], PatternMatcher] = {}
+
+
+def _attach(name: str) -> SharedMemory:
+    """Attach to a shared memory block owned by the parent process."""
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no track argument
+        return SharedMemory(name=name)
+
+
+def _worker_matcher(patterns: Tuple[str, ...]) -> PatternMatcher:
+    """Get the compiled pattern set of a worker process."""
+    matcher = _worker_matchers.get(patterns)
+    if matcher is None:
+        matcher = _worker_matchers[patterns] = PatternMatcher(patterns)
+    return matcher
+
+
+def _scan_shared(patterns: Tuple[str, ...], name: str, start: int, end: int) -> List[Match]:
+    """Worker task: scan a range of a shared memory block."""
+    shm = _attach(name)
+    try:
+        return _worker_matcher(patterns).scan(shm.buf, start, end)
+    finally:
+        shm.close()
+
+
+def _scan_file(patterns: Tuple[str, ...], path: str, start: int, end: int) -> Tuple[List[Match], int]:
+    """Worker task: memory-map a file and scan a range of it."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return _worker_matcher(patterns).scan_with_count(data, start, end)
+
+
+class ParallelMatcher:
+    """
+    Matches large buffers in a pool of worker processes.
+
+    Buffers smaller than min_parallel_bytes are matched in the calling process,
+    where shipping them would cost more than it saves. One instance can be
+    shared by several monitors; scans are serialized on the shared memory block.
+    """
+
+    def __init__(self,
+                 workers: Optional[int] = None,
+                 chunk_size: int = 2 << 20,
+                 min_parallel_bytes: int = 1 << 20):
+        """
+        Initialize the matcher. Worker processes are started on first use.
+
+        Args:
+            workers: Number of worker processes, defaults to the CPU count
+            chunk_size: Approximate bytes per task
+            min_parallel_bytes: Smallest buffer sent to the pool
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.min_parallel_bytes = min_parallel_bytes
+        self._pool = None
+        self._shm = None
+        self._local_matchers: Dict[Tuple[str, ...], PatternMatcher] = {}
+        self._lock = threading.RLock()
+
+    def matcher(self, patterns: Sequence[str]) -> PatternMatcher:
+        """Get the in-process matcher for a pattern set."""
+        key = tuple(patterns)
+        matcher = self._local_matchers.get(key)
+        if matcher is None:
+            matcher = self._local_matchers[key] = PatternMatcher(key)
+        return matcher
+
+    def scan(self, patterns: Sequence[str], data) -> List[Match]:
+        """
+        Find the lines of data containing any of the patterns.
+
+        Args:
+            patterns: Patterns to look for
+            data: bytes-like buffer
+
+        Returns:
+            List of (line start, line end, pattern indices), in order
+        """
+        if len(data) < self.min_parallel_bytes or self.workers < 2:
+            return self.matcher(patterns).scan(data)
+
+        key = tuple(patterns)
+        with self._lock:
+            shm = self._buffer(len(data))
+            shm.buf[:len(data)] = data
+
+            futures = [
+                self._get_pool().submit(_scan_shared, key, shm.name, start, end)
+                for start, end in split_chunks(data, self.chunk_size)
+            ]
+            results = []
+            for future in futures:
+                results.extend(future.result())
+            return results
+
+    def scan_file(self, patterns: Sequence[str], path: str, data, start: int, end: int) -> Tuple[List[Match], int]:
+        """
+        Scan a range of a file, with each worker memory-mapping the file itself.
+
+        Nothing is copied between processes, so this suits large backlogs.
+
+        Args:
+            patterns: Patterns to look for
+            path: Path of the file
+            data: The file memory-mapped in this process, used to find line boundaries
+            start: Offset to start at, at a line start
+            end: Offset to stop at
+
+        Returns:
+            Tuple of the matches, as for scan, and the newline count
+        """
+        if end - start < self.min_parallel_bytes or self.workers < 2:
+            return self.matcher(patterns).scan_with_count(data, start, end)
+
+        key = tuple(patterns)
+        futures = [
+            self._get_pool().submit(_scan_file, key, path, chunk_start, chunk_end)
+            for chunk_start, chunk_end in split_chunks(data, self.chunk_size, start, end)
+        ]
+        results = []
+        line_count = 0
+        for future in futures:
+            matches, count = future.result()
+            results.extend(matches)
+            line_count += count
+        return results, line_count
+
+    def _buffer(self, size: int) -> SharedMemory:
+        """Get a shared memory block of at least size bytes, reusing the last one."""
+        if self._shm is None or self._shm.size < size:
+            previous = self._shm.size if self._shm else 0
+            self._release_buffer()
+            # Grow geometrically so a slowly growing backlog does not reallocate every read
+            self._shm = SharedMemory(create=True, size=max(size, 2 * previous, 1 << 20))
+        return self._shm
+
+    def _release_buffer(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # Spawn rather than fork, the parent runs Qt and other threads
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=get_context("spawn"))
+                logger.info(f"Started {self.workers} matching worker processes")
+            return self._pool
+
+    def close(self):
+        """Stop the worker processes and free the shared memory."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+            self._release_buffer()
@@ -1,14 +1,23 @@
+import asyncio
 import logging
 import os
+import threading
 from typing import Optional, Dict, Any, List
 
-from app.core.sms_sender import SMSSender
-from app.core.discord_sender import DiscordSender
+from app.core.metrics import REGISTRY
+from app.core.providers import MessageProvider, ProviderResult, create_provider, load_provider_plugins
 
 logger = logging.getLogger(__name__)
 
+MESSAGES = REGISTRY.counter("service_messages_total", "Messages sent through the message service", ("provider", "result"))
+
 class MessageService:
-    """A service to send messages via different providers."""
+    """A service to send messages via different providers.
+    
+    All providers run on one event loop in a background thread, which also
+    runs the Discord bot. Async providers such as SMS and Discord send from
+    that loop concurrently, without a thread per message.
+    """
     
     def __init__(self, config: Dict[str, Any]):
         """Initialize the message service.
@@ -18,16 +27,26 @@ class MessageService:
                 - sms_enabled: Whether SMS is enabled
                 - discord_enabled: Whether Discord is enabled
                 - discord_token: Discord bot token (required if discord_enabled is True)
+                - discord_lean_mode: Run the Discord bot with minimal intents and caches
                 - sms_config: Configuration for SMS sender (required if sms_enabled is True)
+                - provider_plugins: Module paths to import so plugin providers register themselves
+                - extra_providers: Mapping of registered provider name to its configuration
         """
         self.config = config
-        self.providers = {}
+        self.providers: Dict[str, MessageProvider] = {}
+        
+        # The event loop shared by all providers
+        self.loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self.loop.run_forever, name="MessageService", daemon=True)
+        self._loop_thread.start()
+        
+        load_provider_plugins(config.get('provider_plugins', []))
         
         # Initialize SMS provider if enabled
         if config.get('sms_enabled', False):
             try:
                 sms_config = config.get('sms_config', {})
-                self.providers['sms'] = SMSSender(**sms_config)
+                self.providers['sms'] = create_provider('sms', **sms_config)
                 logger.info("SMS provider initialized")
             except Exception as e:
                 logger.error(f"Failed to initialize SMS provider: {str(e)}")
@@ -39,66 +58,166 @@ class MessageService:
                 if not discord_token:
                     logger.error("Discord token not provided")
                 else:
-                    discord_sender = DiscordSender(discord_token)
+                    discord_provider = create_provider(
+                        'discord',
+                        token=discord_token,
+                        lean_mode=config.get('discord_lean_mode', False)
+                    )
+                    discord_sender = discord_provider.discord_sender
                     
                     # Load any existing user mappings
                     discord_sender.load_user_mapping()
                     
-                    # Start the bot in a separate thread
-                    discord_sender.run_bot_async()
+                    # Start the bot on the shared event loop
+                    asyncio.run_coroutine_threadsafe(discord_sender.start_bot(), self.loop)
                     
-                    self.providers['discord'] = discord_sender
+                    self.providers['discord'] = discord_provider
                     logger.info("Discord provider initialized")
             except Exception as e:
                 logger.error(f"Failed to initialize Discord provider: {str(e)}")
+        
+        # Initialize any other registered providers, such as plugins
+        for provider_name, provider_config in config.get('extra_providers', {}).items():
+            try:
+                self.providers[provider_name] = create_provider(provider_name, **provider_config)
+                logger.info(f"Provider {provider_name} initialized")
+            except Exception as e:
+                logger.error(f"Failed to initialize provider {provider_name}: {str(e)}")
     
-    def send_message(self, user_id: str, message: str, 
+    def add_provider(self, provider: MessageProvider, timeout: float = 5.0):
+        """Add a provider, replacing and closing any provider of the same name.
+        
+        Args:
+            provider: The provider, which then sends on the shared event loop
+            timeout: Seconds to wait for the replaced provider to close
+        """
+        previous = self.providers.get(provider.name)
+        self.providers[provider.name] = provider
+        if previous is not None and previous is not provider:
+            try:
+                self.run(previous.close_async(), timeout)
+            except Exception as e:
+                logger.error(f"Error closing replaced provider {provider.name}: {str(e)}")
+    
+    def send_message(self, user_id: str, message: str,
                      providers: Optional[List[str]] = None) -> Dict[str, bool]:
         """Send a message to a user via one or more providers.
         
         Args:
-            user_id: The user ID to send the message to
+            user_id: The user ID to send the message to (a phone number for SMS)
             message: The message to send
             providers: List of provider names to use, or None to use all available providers
-            
+        
         Returns:
             A dictionary mapping provider names to success status
         """
-        results = {}
+        return self.run(self.send_message_async(user_id, message, providers))
+    
+    async def send_message_async(self, user_id: str, message: str,
+                                 providers: Optional[List[str]] = None) -> Dict[str, bool]:
+        """Send a message to a user via one or more providers concurrently.
         
-        # Determine which providers to use
+        Args:
+            user_id: The user ID to send the message to (a phone number for SMS)
+            message: The message to send
+            providers: List of provider names to use, or None to use all available providers
+        
+        Returns:
+            A dictionary mapping provider names to success status
+        """
         use_providers = providers or list(self.providers.keys())
+        results = {name: False for name in use_providers if name not in self.providers}
+        for name in results:
+            logger.warning(f"Provider {name} not available")
         
-        # Send via each provider
-        for provider_name in use_providers:
-            provider = self.providers.get(provider_name)
-            if not provider:
-                logger.warning(f"Provider {provider_name} not available")
-                results[provider_name] = False
-                continue
-                
-            try:
-                if provider_name == 'sms':
-                    # Assume user_id is the phone number for SMS
-                    success = provider.send_sms(user_id, message)
-                elif provider_name == 'discord':
-                    # For Discord, we need to look up the Discord user ID
-                    success = False
-                    if hasattr(provider, 'send_message_sync'):
-                        success = provider.send_message_sync(user_id, message)
-                    else:
-                        # Use the helper function from discord_sender
-                        from app.core.discord_sender import send_message_sync
-                        discord_token = self.config.get('discord_token', '')
-                        success = send_message_sync(discord_token, user_id, message)
-                else:
-                    logger.warning(f"Unknown provider {provider_name}")
-                    success = False
-                    
-                results[provider_name] = success
-                logger.info(f"Message sent via {provider_name}: {success}")
-            except Exception as e:
-                logger.error(f"Error sending message via {provider_name}: {str(e)}")
+        available = [name for name in use_providers if name in self.providers]
+        outcomes = await asyncio.gather(
+            *(self.providers[name].send(user_id, message) for name in available),
+            return_exceptions=True
+        )
+        
+        for provider_name, outcome in zip(available, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Error sending message via {provider_name}: {str(outcome)}")
                 results[provider_name] = False
-                
-        return results 
\ No newline at end of file
+                MESSAGES.labels(provider_name, "error").inc()
+            else:
+                results[provider_name] = outcome.success
+                MESSAGES.labels(provider_name, "sent" if outcome.success else "failed").inc()
+                logger.info(f"Message sent via {provider_name}: {outcome.success}")
+        
+        return results
+    
+    async def send_bulk_async(self, user_ids: List[str], message: str,
+                              providers: Optional[List[str]] = None) -> Dict[str, List[ProviderResult]]:
+        """Send a message to many users via one or more providers concurrently.
+        
+        Each provider sends its batch concurrently, up to its own concurrency
+        limit, so thousands of sends share the event loop.
+        
+        Args:
+            user_ids: The user IDs to send the message to (phone numbers for SMS)
+            message: The message to send
+            providers: List of provider names to use, or None to use all available providers
+        
+        Returns:
+            A dictionary mapping provider names to the results, in the order of user_ids
+        """
+        use_providers = providers or list(self.providers.keys())
+        results = {}
+        for name in use_providers:
+            if name not in self.providers:
+                logger.warning(f"Provider {name} not available")
+                results[name] = [ProviderResult(user_id, False, error=f"Provider {name} not available", retryable=False)
+                                 for user_id in user_ids]
+        
+        available = [name for name in use_providers if name in self.providers]
+        outcomes = await asyncio.gather(
+            *(self.providers[name].send_batch(user_ids, message) for name in available),
+            return_exceptions=True
+        )
+        
+        for provider_name, outcome in zip(available, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Error sending messages via {provider_name}: {str(outcome)}")
+                outcome = [ProviderResult(user_id, False, error=str(outcome)) for user_id in user_ids]
+                MESSAGES.labels(provider_name, "error").inc(len(user_ids))
+            else:
+                sent = sum(1 for result in outcome if result.success)
+                MESSAGES.labels(provider_name, "sent").inc(sent)
+                MESSAGES.labels(provider_name, "failed").inc(len(outcome) - sent)
+            results[provider_name] = outcome
+        
+        return results
+    
+    def send_bulk(self, user_ids: List[str], message: str,
+                  providers: Optional[List[str]] = None) -> Dict[str, List[ProviderResult]]:
+        """Send a message to many users from synchronous code; see send_bulk_async."""
+        return self.run(self.send_bulk_async(user_ids, message, providers))
+    
+    def run(self, coroutine, timeout: Optional[float] = None):
+        """Run a coroutine on the shared event loop and wait for its result.
+        
+        Args:
+            coroutine: The coroutine to run
+            timeout: Seconds to wait, or None to wait until it finishes
+        
+        Returns:
+            The coroutine's result
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+    
+    def close(self, timeout: float = 5.0):
+        """Close the providers and stop the event loop."""
+        if not self.loop.is_running():
+            return
+        async def close_providers():
+            await asyncio.gather(*(provider.close_async() for provider in self.providers.values()),
+                                 return_exceptions=True)
+        
+        try:
+            self.run(close_providers(), timeout)
+        except Exception as e:
+            logger.error(f"Error closing message providers: {str(e)}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._loop_thread.join(timeout)
@@ -0,0 +1,375 @@
+"""
+Metrics registry with low-overhead counters, gauges and histograms.
+
+Metrics are exported in the Prometheus text format, either from a local HTTP
+endpoint (MetricsHTTPServer) or to a file rewritten periodically
+(MetricsFileWriter). Instrumented modules use the shared REGISTRY.
+"""
+
+import bisect
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Default histogram buckets in seconds, from 1ms to 30s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Metric:
+    """Base class for a metric family, holding one child per label value combination."""
+
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        """Initialize the metric family."""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], '_Metric'] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str, **kwargs: str) -> '_Metric':
+        """
+        Get the child metric for a set of label values, creating it if needed.
+
+        Args:
+            values: Label values in the order of labelnames
+            kwargs: Label values by name
+
+        Returns:
+            The child metric
+        """
+        if kwargs:
+            values = tuple(str(kwargs[name]) for name in self.labelnames)
+        else:
+            values = tuple(str(value) for value in values)
+
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._new_child()
+                    self._children[values] = child
+        return child
+
+    def _new_child(self) -> '_Metric':
+        """Create an unlabelled metric of the same type."""
+        raise NotImplementedError
+
+    def _samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """Get the (suffix, labels, value) samples of an unlabelled metric."""
+        raise NotImplementedError
+
+    def collect(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """Get all samples of the family as (name, labels, value)."""
+        if not self.labelnames:
+            return [(self.name + suffix, labels, value) for suffix, labels, value in self._samples()]
+
+        samples = []
+        for values, child in list(self._children.items()):
+            base = dict(zip(self.labelnames, values))
+            for suffix, labels, value in child._samples():
+                samples.append((self.name + suffix, dict(base, **labels), value))
+        return samples
+
+
+class Counter(_Metric):
+    """A value that only goes up."""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str = "", documentation: str = "", labelnames: Tuple[str, ...] = ()):
+        """Initialize the counter."""
+        super().__init__(name, documentation, labelnames)
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        """Increase the counter."""
+        with self._lock:
+            self.value += amount
+
+    def _new_child(self) -> 'Counter':
+        return Counter()
+
+    def _samples(self):
+        return [("", {}, self.value)]
+
+
+class Gauge(_Metric):
+    """A value that can go up and down, or be read from a function at export time."""
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str = "", documentation: str = "", labelnames: Tuple[str, ...] = ()):
+        """Initialize the gauge."""
+        super().__init__(name, documentation, labelnames)
+        self.value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        """Set the gauge."""
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        """Increase the gauge."""
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        """Decrease the gauge."""
+        with self._lock:
+            self.value -= amount
+
+    def set_function(self, function: Callable[[], float]):
+        """
+        Read the gauge from a function whenever metrics are exported.
+
+        Args:
+            function: Callable returning the current value
+        """
+        self._function = function
+
+    def _new_child(self) -> 'Gauge':
+        return Gauge()
+
+    def _samples(self):
+        if self._function is not None:
+            try:
+                return [("", {}, float(self._function()))]
+            except Exception as e:
+                logger.debug(f"Gauge function failed: {str(e)}")
+                return []
+        return [("", {}, self.value)]
+
+
+class Histogram(_Metric):
+    """Counts observations into cumulative buckets, with their sum and count."""
+
+    metric_type = "histogram"
+
+    def __init__(self, name: str = "", documentation: str = "", labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """Initialize the histogram."""
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.bucket_counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """Record an observation."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.bucket_counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def _new_child(self) -> 'Histogram':
+        return Histogram(buckets=self.buckets)
+
+    def _samples(self):
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.bucket_counts):
+            cumulative += count
+            samples.append(("_bucket", {"le": _format_value(bound)}, cumulative))
+        samples.append(("_sum", {}, self.sum))
+        samples.append(("_count", {}, self.count))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Holds metric families by name and renders them in the Prometheus text format.
+
+    Asking for a metric that already exists returns the existing one, so
+    modules can declare their metrics at import time.
+    """
+
+    def __init__(self, prefix: str = "fastsms_"):
+        """
+        Initialize the registry.
+
+        Args:
+            prefix: Prefix added to every metric name
+        """
+        self.prefix = prefix
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, metric_class, name: str, documentation: str, labelnames, **kwargs):
+        full_name = self.prefix + name
+        with self._lock:
+            metric = self._metrics.get(full_name)
+            if metric is None:
+                metric = metric_class(full_name, documentation, tuple(labelnames), **kwargs)
+                self._metrics[full_name] = metric
+            elif not isinstance(metric, metric_class):
+                raise ValueError(f"Metric {full_name} already registered as a {metric.metric_type}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        """Get or create a counter."""
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        """Get or create a gauge."""
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        """Get or create a histogram."""
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text
+        """
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.metric_type}")
+            for sample_name, labels, value in metric.collect():
+                if labels:
+                    label_text = ",".join(f'{key}="{_escape(value_)}"' for key, value_ in labels.items())
+                    lines.append(f"{sample_name}{{{label_text}}} {_format_value(value)}")
+                else:
+                    lines.append(f"{sample_name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Shared registry used by the instrumented modules
+REGISTRY = MetricsRegistry()
+
+
+class MetricsHTTPServer:
+    """
+    Serves the registry at http://host:port/metrics from a background thread.
+    """
+
+    def __init__(self, port: int, host: str = "127.0.0.1", registry: MetricsRegistry = REGISTRY):
+        """
+        Initialize the server.
+
+        Args:
+            port: Port to listen on, 0 picks a free port
+            host: Interface to listen on
+            registry: Registry to export
+        """
+        registry_ = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                payload = registry_.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        """Get the port the server is listening on."""
+        return self.httpd.server_address[1]
+
+    def start(self) -> 'MetricsHTTPServer':
+        """Start serving in a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="MetricsHTTPServer")
+        self._thread.daemon = True
+        self._thread.start()
+        logger.info(f"Serving metrics on http://{self.httpd.server_address[0]}:{self.port}/metrics")
+        return self
+
+    def stop(self):
+        """Stop serving."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class MetricsFileWriter:
+    """
+    Rewrites a file with the registry contents at a fixed interval.
+
+    Each write goes to a temporary file that then replaces the target, so
+    readers such as the node_exporter textfile collector never see a partial file.
+    """
+
+    def __init__(self, path: str, interval: float = 15.0, registry: MetricsRegistry = REGISTRY):
+        """
+        Initialize the writer.
+
+        Args:
+            path: File to write
+            interval: Seconds between writes
+            registry: Registry to export
+        """
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def write(self):
+        """Write the metrics file now."""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.registry.render())
+        os.replace(temp_path, self.path)
+
+    def start(self) -> 'MetricsFileWriter':
+        """Start writing in a background thread."""
+        self._thread = threading.Thread(target=self._run, name="MetricsFileWriter")
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop writing, after one final write."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(1.0)
+
+    def _run(self):
+        while True:
+            try:
+                self.write()
+            except Exception as e:
+                logger.error(f"Failed to write metrics file: {str(e)}")
+            if self._stop_event.wait(self.interval):
+                break
+        try:
+            self.write()
+        except Exception as e:
+            logger.error(f"Failed to write metrics file: {str(e)}")
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value the way Prometheus expects."""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
@@ -0,0 +1,216 @@
+"""
+Local stand-in for the TextBelt API, for load-testing the alert pipeline offline.
+
+Implements the endpoints SMSSender uses:
+    POST /text              - send a message (form fields: phone, message, key)
+    GET  /status/<textId>   - delivery status (also accepts ?textId=<id>)
+
+Responses follow TextBelt's JSON format. Latency, failure rate and the time
+until a message reports DELIVERED are configurable. Nothing leaves the machine.
+
+Usage:
+    python -m app.core.mock_textbelt [--port 8787] [--latency-ms 0] [--failure-rate 0]
+
+Then point the SMS sender at it, e.g. in config.ini:
+    [Messaging]
+    TextBeltURL = http://127.0.0.1:8787/text
+    TextBeltStatusURL = http://127.0.0.1:8787/status
+"""
+
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+class MockTextBeltServer:
+    """
+    Threaded HTTP server imitating the TextBelt API.
+    """
+
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 latency: float = 0.0,
+                 failure_rate: float = 0.0,
+                 server_error_rate: float = 0.0,
+                 delivery_delay: float = 0.0,
+                 quota: int = 1000000):
+        """
+        Initialize the server.
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on, 0 picks a free port
+            latency: Seconds to wait before answering each request
+            failure_rate: Fraction of sends answered with success=false
+            server_error_rate: Fraction of sends answered with HTTP 503
+            delivery_delay: Seconds after sending before status reports DELIVERED
+            quota: Starting quotaRemaining value
+        """
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.server_error_rate = server_error_rate
+        self.delivery_delay = delivery_delay
+        self.quota = quota
+        self.sent: Dict[str, float] = {}  # textId -> time sent
+        self.request_count = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._thread = None
+
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        """Get the base URL the server is listening on."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self) -> str:
+        """Get the URL to use as SMSSender's api_url."""
+        return f"{self.base_url}/text"
+
+    @property
+    def status_url(self) -> str:
+        """Get the URL to use as SMSSender's status_url."""
+        return f"{self.base_url}/status"
+
+    def start(self) -> 'MockTextBeltServer':
+        """Start serving in a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="MockTextBelt")
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join(1.0)
+
+    def handle_send(self, fields: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        """
+        Produce the response to a send request.
+
+        Args:
+            fields: Form fields of the request
+
+        Returns:
+            Tuple of HTTP status code and JSON body
+        """
+        roll = random.random()
+        if roll < self.server_error_rate:
+            return 503, {"success": False, "error": "Service temporarily unavailable"}
+        if not fields.get("phone") or not fields.get("message") or not fields.get("key"):
+            return 400, {"success": False, "error": "Incomplete request"}
+        if roll < self.server_error_rate + self.failure_rate:
+            return 200, {"success": False, "error": "Simulated delivery failure", "quotaRemaining": self.quota}
+
+        with self._lock:
+            text_id = str(next(self._ids))
+            self.sent[text_id] = time.time()
+            if fields.get("test") != "1":
+                self.quota -= 1
+            quota = self.quota
+        return 200, {"success": True, "textId": text_id, "quotaRemaining": quota}
+
+    def handle_status(self, text_id: Optional[str]) -> Tuple[int, Dict[str, Any]]:
+        """
+        Produce the response to a status request.
+
+        Args:
+            text_id: The message ID, or None
+
+        Returns:
+            Tuple of HTTP status code and JSON body
+        """
+        sent_at = self.sent.get(text_id) if text_id else None
+        if sent_at is None:
+            return 404, {"success": False, "error": "Message not found"}
+
+        status = "DELIVERED" if time.time() - sent_at >= self.delivery_delay else "SENT"
+        return 200, {"success": True, "status": status}
+
+    def _make_handler(self):
+        """Build the request handler class bound to this server."""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep connections alive so clients can reuse them
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length).decode("utf-8")
+                if urlparse(self.path).path.rstrip("/") != "/text":
+                    self._respond(404, {"success": False, "error": "Not found"})
+                    return
+                fields = {key: values[0] for key, values in parse_qs(body).items()}
+                self._respond(*server.handle_send(fields))
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                parts = url.path.strip("/").split("/")
+                if parts[0] != "status":
+                    self._respond(404, {"success": False, "error": "Not found"})
+                    return
+                text_id = parts[1] if len(parts) > 1 else parse_qs(url.query).get("textId", [None])[0]
+                self._respond(*server.handle_status(text_id))
+
+            def _respond(self, code: int, data: Dict[str, Any]):
+                with server._lock:
+                    server.request_count += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                payload = json.dumps(data).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                # Stay quiet under load
+                pass
+
+        return Handler
+
+
+def main():
+    """Run the mock server in the foreground."""
+    parser = argparse.ArgumentParser(description="Local stand-in for the TextBelt API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay before each response")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of sends that fail")
+    parser.add_argument("--server-error-rate", type=float, default=0.0, help="Fraction of sends answered with HTTP 503")
+    parser.add_argument("--delivery-delay", type=float, default=0.0, help="Seconds until status is DELIVERED")
+    args = parser.parse_args()
+
+    server = MockTextBeltServer(
+        args.host, args.port,
+        latency=args.latency_ms / 1000.0,
+        failure_rate=args.failure_rate,
+        server_error_rate=args.server_error_rate,
+        delivery_delay=args.delivery_delay
+    )
+    print(f"Mock TextBelt listening on {server.base_url} (send: {server.api_url}, status: {server.status_url})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
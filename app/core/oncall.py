@@ -0,0 +1,247 @@
+"""
+Recipient groups and on-call rotations, referenced from routing rules as @name.
+
+    ops = +12125551234, +13105550123
+    primary = +12125551234, +13105550123, +16465550199 rotate 7d from 2026-01-05 09:00
+
+A group always means all of its members. A rotation means one member at a
+time: the first for the first shift from the start time, then the next, and
+round again. Shifts are given in hours, days or weeks (h, d, w), and are
+counted in local wall-clock time, so a daily 09:00 handoff stays at 09:00
+across daylight saving changes.
+
+A group or rotation named "default" receives SMS alerts whose route names no
+recipients, instead of everyone configured. Other providers have their own,
+such as "discord-default", since their recipients are not phone numbers.
+A reference to a name that is not defined is skipped, never sent to as a
+recipient; a list left with no recipients goes to the default group.
+
+Definitions are compiled when they are configured, and the recipient lists of
+routes the first time they are used, into a fixed list of recipients plus the
+rotations involved. Finding who gets an alert is then a dictionary lookup and
+one division per rotation, however many groups and members there are.
+"""
+
+import datetime
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_GROUP = "default"
+GROUP_PREFIX = "@"
+
+_DEFINITION = re.compile(
+    r"^(?P<name>[\w.\-]+)\s*=\s*(?P<members>.*?)"
+    r"(?:\s+rotate\s+(?P<shift>\d+)\s*(?P<unit>[hdw])(?:\s+from\s+(?P<start>\d{4}-\d{2}-\d{2}(?:[ T]\d{1,2}:\d{2})?))?)?$",
+    re.IGNORECASE
+)
+_UNITS = {"h": 3600, "d": 86400, "w": 604800}
+
+# Rotations without a start time hand over at midnight, counted from a Monday
+_DEFAULT_START = datetime.datetime(2024, 1, 1)
+
+
+def default_group(provider: str) -> str:
+    """Get the name of the group receiving a provider's alerts when a route names no recipients."""
+    return DEFAULT_GROUP if provider == "sms" else f"{provider}-{DEFAULT_GROUP}"
+
+
+class Rotation:
+    """
+    Members taking turns on call, one shift each.
+    """
+
+    def __init__(self, name: str, members: List[str], shift: float, start: datetime.datetime):
+        """
+        Initialize the rotation.
+
+        Args:
+            name: Rotation name
+            members: Recipients in the order they take over
+            shift: Shift length in seconds of wall-clock time
+            start: When the first member's first shift starts, as naive local time
+        """
+        self.name = name
+        self.members = members
+        self.shift = shift
+        self.start = start
+
+    def on_call(self, now: float) -> str:
+        """Get the member on call at a time, in seconds since the epoch."""
+        # Elapsed local wall-clock time, which skips or repeats an hour when
+        # daylight saving time starts or ends, so handoffs keep their time of day
+        elapsed = (datetime.datetime.fromtimestamp(now) - self.start).total_seconds()
+        return self.members[int(elapsed // self.shift) % len(self.members)]
+
+
+class _Targets:
+    """A recipient list compiled into fixed recipients and rotations."""
+
+    __slots__ = ("fixed", "rotations")
+
+    def __init__(self, fixed: List[str], rotations: List[Rotation]):
+        self.fixed = fixed
+        self.rotations = rotations
+
+    def resolve(self, now: float) -> List[str]:
+        if not self.rotations:
+            return self.fixed
+        recipients = list(self.fixed)
+        for rotation in self.rotations:
+            member = rotation.on_call(now)
+            if member not in recipients:
+                recipients.append(member)
+        return recipients
+
+
+def parse_definition(line: str) -> Tuple[str, List[str], Optional[Rotation]]:
+    """
+    Parse a group or rotation definition.
+
+    Args:
+        line: 'name = members' or 'name = members rotate <shift> [from <YYYY-MM-DD HH:MM>]'
+
+    Returns:
+        Tuple of the name, the members and the Rotation, or None for a group
+    """
+    match = _DEFINITION.match(line.strip())
+    if not match:
+        raise ValueError(f"Invalid recipient group '{line}' (use: name = recipient, recipient [rotate 7d from 2026-01-05 09:00])")
+
+    name = match.group("name").lower()
+    members = [member.strip() for member in match.group("members").split(",") if member.strip()]
+    if not members:
+        raise ValueError(f"Invalid recipient group '{line}': no members given")
+    nested = [member for member in members if member.startswith(GROUP_PREFIX)]
+    if nested:
+        raise ValueError(f"Invalid recipient group '{line}': members must be recipients, not groups ({nested[0]})")
+
+    if not match.group("shift"):
+        return name, members, None
+
+    shift = int(match.group("shift")) * _UNITS[match.group("unit").lower()]
+    if shift <= 0:
+        raise ValueError(f"Invalid rotation '{line}': the shift must be longer than 0")
+    start = _DEFAULT_START
+    if match.group("start"):
+        text = match.group("start").replace("T", " ")
+        try:
+            start = datetime.datetime.strptime(text, "%Y-%m-%d %H:%M" if " " in text else "%Y-%m-%d")
+        except ValueError:
+            raise ValueError(f"Invalid rotation '{line}': bad start time '{match.group('start')}'")
+    return name, members, Rotation(name, members, shift, start)
+
+
+class RecipientDirectory:
+    """
+    Expands @group and @rotation references in recipient lists.
+
+    Names are case-insensitive. A reference to a name that is not defined is
+    skipped when resolving; unknown_groups reports such references.
+    """
+
+    def __init__(self):
+        """Initialize the directory with no groups."""
+        self.groups: Dict[str, List[str]] = {}
+        self.rotations: Dict[str, Rotation] = {}
+        self._compiled: Dict[Tuple[str, ...], _Targets] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, groups: Dict[str, List[str]], rotations: Dict[str, Rotation]):
+        """Replace the groups and rotations."""
+        with self._lock:
+            self.groups = groups
+            self.rotations = rotations
+            self._compiled = {}
+
+    def configure_from_rules(self, rules: List[str]) -> List[str]:
+        """
+        Replace the groups and rotations from definition strings.
+
+        Args:
+            rules: Definitions in the format accepted by parse_definition
+
+        Returns:
+            List of error messages for definitions that could not be parsed
+        """
+        groups: Dict[str, List[str]] = {}
+        rotations: Dict[str, Rotation] = {}
+        errors = []
+        for rule in rules:
+            try:
+                name, members, rotation = parse_definition(rule)
+            except ValueError as e:
+                errors.append(str(e))
+                continue
+            if name in groups or name in rotations:
+                errors.append(f"Recipient group '{name}' is defined more than once")
+                continue
+            if rotation is None:
+                groups[name] = members
+            else:
+                rotations[name] = rotation
+
+        self.configure(groups, rotations)
+        return errors
+
+    @property
+    def names(self) -> List[str]:
+        """Get the names of all groups and rotations."""
+        return sorted(list(self.groups) + list(self.rotations))
+
+    def unknown_groups(self, recipients: List[str]) -> List[str]:
+        """Get the @references in a recipient list that name no group or rotation."""
+        return [
+            recipient for recipient in recipients
+            if recipient.startswith(GROUP_PREFIX)
+            and recipient[1:].lower() not in self.groups and recipient[1:].lower() not in self.rotations
+        ]
+
+    def resolve(self, recipients: List[str], now: Optional[float] = None, default: str = DEFAULT_GROUP) -> List[str]:
+        """
+        Get the recipients an alert goes to.
+
+        Args:
+            recipients: Recipients of a route, possibly with @references;
+                empty means the default group, if there is one
+            now: Time of the alert, defaults to now
+            default: Name of the default group, see default_group
+
+        Returns:
+            The recipients, or an empty list for everyone configured for the provider
+        """
+        key = (default,) + tuple(recipients)
+        targets = self._compiled.get(key)
+        if targets is None:
+            targets = self._compile(key)
+        return targets.resolve(time.time() if now is None else now)
+
+    def _compile(self, key: Tuple[str, ...]) -> _Targets:
+        """Compile a (default group, recipients...) key into fixed recipients and rotations."""
+        default, recipients = key[0], key[1:]
+        targets = self._expand(recipients)
+        if not targets.fixed and not targets.rotations:
+            # No recipients, or only unknown groups: the default group, or everyone configured without one
+            targets = self._expand((GROUP_PREFIX + default,))
+
+        with self._lock:
+            self._compiled[key] = targets
+        return targets
+
+    def _expand(self, recipients: Tuple[str, ...]) -> _Targets:
+        """Expand the @references of a recipient list, skipping unknown ones."""
+        fixed: List[str] = []
+        rotations: List[Rotation] = []
+        for recipient in recipients:
+            if not recipient.startswith(GROUP_PREFIX):
+                members = [recipient]
+            elif recipient[1:].lower() in self.groups:
+                members = self.groups[recipient[1:].lower()]
+            else:
+                rotation = self.rotations.get(recipient[1:].lower())
+                if rotation is not None and rotation not in rotations:
+                    rotations.append(rotation)
+                continue
+            fixed.extend(member for member in members if member not in fixed)
+        return _Targets(fixed, rotations)
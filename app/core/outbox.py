@@ -0,0 +1,328 @@
+"""
+Durable outbound queue for alert deliveries, backed by SQLite.
+"""
+
+import hashlib
+import random
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, Any
+
+from app.utils.paths import get_data_path
+
+
+class OutboxEntry:
+    """
+    Class to represent one delivery (one alert, one provider, one recipient) in the outbox.
+    """
+
+    def __init__(self, row: sqlite3.Row):
+        """Initialize the entry from a database row."""
+        self.entry_id = row["id"]
+        self.idempotency_key = row["idempotency_key"]
+        self.alert_id = row["alert_id"]
+        self.provider = row["provider"]
+        self.recipient = row["recipient"]
+        self.message = row["message"]
+        self.priority = row["priority"]
+        self.status = row["status"]
+        self.attempts = row["attempts"]
+        self.next_attempt_at = row["next_attempt_at"]
+        self.last_error = row["last_error"]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the entry to a dictionary."""
+        return {
+            "id": self.entry_id,
+            "idempotency_key": self.idempotency_key,
+            "alert_id": self.alert_id,
+            "provider": self.provider,
+            "recipient": self.recipient,
+            "message": self.message,
+            "priority": self.priority,
+            "status": self.status,
+            "attempts": self.attempts,
+            "next_attempt_at": self.next_attempt_at,
+            "last_error": self.last_error
+        }
+
+
+class Outbox:
+    """
+    SQLite-backed outbox holding deliveries until they succeed or give up.
+
+    Every delivery has an idempotency key derived from the alert, provider and
+    recipient, so submitting the same alert twice does not queue it twice and a
+    delivery that was recorded as sent is never sent again. Deliveries that were
+    in flight when the process died are returned to the queue on start, so
+    delivery is at-least-once.
+
+    Failed deliveries are retried with exponential backoff and jitter until
+    max_attempts is reached, after which they are marked dead.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_INFLIGHT = "inflight"
+    STATUS_SENT = "sent"
+    STATUS_DEAD = "dead"
+    STATUS_DROPPED = "dropped"
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 max_attempts: int = 8,
+                 base_delay: float = 2.0,
+                 max_delay: float = 300.0):
+        """
+        Initialize the outbox.
+
+        Args:
+            path: Database file path, ":memory:" for a non-durable outbox, or None
+                for outbox.db in the application data directory
+            max_attempts: Attempts before a delivery is marked dead
+            base_delay: Delay in seconds before the first retry
+            max_delay: Upper bound for the retry delay in seconds
+        """
+        self.path = path or get_data_path("outbox.db")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        """Create the outbox table if it doesn't exist."""
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    idempotency_key TEXT NOT NULL UNIQUE,
+                    alert_id TEXT NOT NULL,
+                    provider TEXT NOT NULL,
+                    recipient TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    priority INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    last_error TEXT,
+                    result_id TEXT
+                )
+            """)
+            self._conn.execute("""
+                CREATE INDEX IF NOT EXISTS outbox_due
+                ON outbox (status, priority, next_attempt_at, id)
+            """)
+
+    @staticmethod
+    def make_idempotency_key(alert_id: str, provider: str, recipient: str) -> str:
+        """
+        Build the idempotency key for a delivery.
+
+        Args:
+            alert_id: The alert ID
+            provider: The provider name
+            recipient: The recipient identifier
+
+        Returns:
+            str: Hex digest identifying the delivery
+        """
+        return hashlib.sha256(f"{alert_id}\0{provider}\0{recipient}".encode("utf-8")).hexdigest()
+
+    def backoff_delay(self, attempts: int) -> float:
+        """
+        Get the delay before the next attempt.
+
+        Args:
+            attempts: Number of attempts made so far
+
+        Returns:
+            float: Delay in seconds, with +/-20% jitter
+        """
+        delay = min(self.max_delay, self.base_delay * (2 ** max(attempts - 1, 0)))
+        return delay * random.uniform(0.8, 1.2)
+
+    def enqueue(self,
+                alert_id: str,
+                provider: str,
+                recipient: str,
+                message: str,
+                priority: int) -> bool:
+        """
+        Add a delivery to the outbox.
+
+        Args:
+            alert_id: The alert ID
+            provider: The provider name
+            recipient: The recipient identifier
+            message: The message to send
+            priority: Numeric priority, lower is more urgent
+
+        Returns:
+            bool: True if queued, False if the delivery was already in the outbox
+        """
+        now = time.time()
+        key = self.make_idempotency_key(alert_id, provider, recipient)
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO outbox (idempotency_key, alert_id, provider, recipient, message, "
+                "priority, status, next_attempt_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, alert_id, provider, recipient, message, priority, self.STATUS_PENDING, now, now, now)
+            )
+            return cursor.rowcount == 1
+
+    def recover(self) -> int:
+        """
+        Return deliveries left in flight by a previous run to the queue.
+
+        Returns:
+            int: Number of deliveries recovered
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE outbox SET status = ?, updated_at = ? WHERE status = ?",
+                (self.STATUS_PENDING, time.time(), self.STATUS_INFLIGHT)
+            )
+            return cursor.rowcount
+
+    def pending_count(self) -> int:
+        """Get the number of deliveries waiting to be sent, including those backing off."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE status = ?", (self.STATUS_PENDING,)
+            ).fetchone()
+            return row[0]
+
+    def claim_next(self) -> Optional[OutboxEntry]:
+        """
+        Claim the most urgent delivery that is due now.
+
+        Returns:
+            OutboxEntry: The claimed delivery, now in flight, or None if nothing is due
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT * FROM outbox WHERE status = ? AND next_attempt_at <= ? "
+                "ORDER BY priority, next_attempt_at, id LIMIT 1",
+                (self.STATUS_PENDING, now)
+            ).fetchone()
+            if row is None:
+                return None
+
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (self.STATUS_INFLIGHT, now, row["id"])
+            )
+            entry = OutboxEntry(row)
+            entry.status = self.STATUS_INFLIGHT
+            entry.attempts += 1
+            return entry
+
+    def next_due_time(self) -> Optional[float]:
+        """Get the time the next pending delivery becomes due, or None if the queue is empty."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_attempt_at) FROM outbox WHERE status = ?", (self.STATUS_PENDING,)
+            ).fetchone()
+            return row[0]
+
+    def mark_sent(self, entry: OutboxEntry, result_id: Optional[str] = None):
+        """
+        Record a successful delivery.
+
+        Args:
+            entry: The delivery
+            result_id: Provider message ID, if any
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, result_id = ?, last_error = NULL, updated_at = ? WHERE id = ?",
+                (self.STATUS_SENT, result_id, time.time(), entry.entry_id)
+            )
+        entry.status = self.STATUS_SENT
+
+    def mark_failed(self, entry: OutboxEntry, error: str, retryable: bool = True) -> bool:
+        """
+        Record a failed delivery attempt and schedule a retry if allowed.
+
+        Args:
+            entry: The delivery
+            error: Error message from the provider
+            retryable: Whether sending again could succeed
+
+        Returns:
+            bool: True if a retry was scheduled, False if the delivery is dead
+        """
+        now = time.time()
+        retry = retryable and entry.attempts < self.max_attempts
+        status = self.STATUS_PENDING if retry else self.STATUS_DEAD
+        next_attempt_at = now + self.backoff_delay(entry.attempts) if retry else now
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, next_attempt_at = ?, last_error = ?, updated_at = ? WHERE id = ?",
+                (status, next_attempt_at, error, now, entry.entry_id)
+            )
+
+        entry.status = status
+        entry.next_attempt_at = next_attempt_at
+        entry.last_error = error
+        return retry
+
+    def drop_least_urgent(self, priority: int) -> Optional[OutboxEntry]:
+        """
+        Drop the newest pending delivery that is less urgent than the given priority.
+
+        Args:
+            priority: Numeric priority of the delivery that needs room
+
+        Returns:
+            OutboxEntry: The dropped delivery, or None if none is less urgent
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT * FROM outbox WHERE status = ? AND priority > ? "
+                "ORDER BY priority DESC, id DESC LIMIT 1",
+                (self.STATUS_PENDING, priority)
+            ).fetchone()
+            if row is None:
+                return None
+
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, updated_at = ? WHERE id = ?",
+                (self.STATUS_DROPPED, time.time(), row["id"])
+            )
+            entry = OutboxEntry(row)
+            entry.status = self.STATUS_DROPPED
+            return entry
+
+    def purge(self, older_than: float = 7 * 24 * 3600) -> int:
+        """
+        Delete finished deliveries.
+
+        Args:
+            older_than: Age in seconds after which sent, dead and dropped deliveries are deleted
+
+        Returns:
+            int: Number of deliveries deleted
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM outbox WHERE status IN (?, ?, ?) AND updated_at < ?",
+                (self.STATUS_SENT, self.STATUS_DEAD, self.STATUS_DROPPED, time.time() - older_than)
+            )
+            return cursor.rowcount
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,165 @@
+"""
+Sampling profiler that can be switched on and off while the application runs.
+
+A background thread periodically samples the stacks of the file monitor, Qt
+main thread and alert dispatcher workers. Samples are written in the folded
+stack format read by flamegraph.pl, speedscope and inferno:
+
+    MainThread;main (main.py:12);exec_ (...) 42
+
+It can be toggled from the Tools menu, by sending SIGUSR2 to the process, or
+started at launch with --profile.
+"""
+
+import datetime
+import logging
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Optional, Tuple
+
+from app.utils.paths import get_data_path
+
+logger = logging.getLogger(__name__)
+
+# Threads sampled by default, matched by name prefix
+PROFILED_THREADS = ("MainThread", "FileMonitor", "AlertDispatcher")
+
+
+class SamplingProfiler:
+    """
+    Samples thread stacks at a fixed interval and aggregates them as folded stacks.
+    """
+
+    def __init__(self,
+                 interval: float = 0.01,
+                 thread_names: Optional[Tuple[str, ...]] = PROFILED_THREADS):
+        """
+        Initialize the profiler.
+
+        Args:
+            interval: Seconds between samples
+            thread_names: Name prefixes of the threads to sample, or None for all threads
+        """
+        self.interval = interval
+        self.thread_names = thread_names
+        self.samples: Counter = Counter()  # folded stack -> sample count
+        self.sample_count = 0
+        self.started_at = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        """Check whether the profiler is sampling."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start sampling, discarding samples from any previous run."""
+        with self._lock:
+            if self.running:
+                return
+            self.samples = Counter()
+            self.sample_count = 0
+            self.started_at = datetime.datetime.now()
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="SamplingProfiler")
+            self._thread.daemon = True
+            self._thread.start()
+        logger.info(f"Profiler started, sampling every {self.interval * 1000:.0f} ms")
+
+    def stop(self, path: Optional[str] = None) -> Optional[str]:
+        """
+        Stop sampling and write the folded stacks.
+
+        Args:
+            path: File to write, defaults to a timestamped file under the data directory
+
+        Returns:
+            str: Path of the written file, or None if the profiler was not running
+        """
+        with self._lock:
+            if not self.running:
+                return None
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+
+        path = path or get_data_path("profiles", f"profile-{self.started_at:%Y%m%d-%H%M%S}.folded")
+        self.dump(path)
+        logger.info(f"Profiler stopped after {self.sample_count} samples, wrote {path}")
+        return path
+
+    def toggle(self, path: Optional[str] = None) -> Optional[str]:
+        """
+        Start the profiler if it is stopped, otherwise stop it and write its output.
+
+        Returns:
+            str: Path of the written file when stopping, None when starting
+        """
+        if self.running:
+            return self.stop(path)
+        self.start()
+        return None
+
+    def dump(self, path: str):
+        """Write the samples collected so far as folded stacks, most frequent first."""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def _run(self):
+        """Sampling loop that runs in its own thread."""
+        own_ident = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                name = names.get(ident, str(ident))
+                if self.thread_names and not name.startswith(self.thread_names):
+                    continue
+                self.samples[self._fold(name, frame)] += 1
+            self.sample_count += 1
+
+    @staticmethod
+    def _fold(thread_name: str, frame) -> str:
+        """Fold a stack into 'thread;outermost;...;innermost'."""
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        # Merge numbered worker threads such as AlertDispatcher-0 and AlertDispatcher-1
+        base, _, number = thread_name.rpartition("-")
+        names.append(base if base and number.isdigit() else thread_name)
+        return ";".join(reversed(names))
+
+
+# Shared profiler toggled from the UI, the signal handler and the command line
+PROFILER = SamplingProfiler()
+
+
+def install_signal_handler(signal_number: Optional[int] = None) -> bool:
+    """
+    Toggle the shared profiler when the process receives a signal (SIGUSR2 by default).
+
+    Python only runs signal handlers in the main thread between bytecodes, so a
+    Qt application also needs a timer that periodically returns to Python.
+
+    Returns:
+        bool: True if the handler was installed, False where the signal does not exist
+    """
+    import signal
+
+    signal_number = signal_number or getattr(signal, "SIGUSR2", None)
+    if signal_number is None:
+        return False
+
+    def handle_signal(signum, frame):
+        PROFILER.toggle()
+
+    signal.signal(signal_number, handle_signal)
+    return True
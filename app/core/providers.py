@@ -0,0 +1,355 @@
+"""
+Message provider plugin interface and the built-in SMS and Discord providers.
+
+Providers register themselves under a name with the register_provider
+decorator. MessageService creates providers by name, so a plugin only needs to
+define a MessageProvider subclass in a module that gets imported (see
+load_provider_plugins).
+"""
+
+import asyncio
+import importlib
+import logging
+from typing import Any, Callable, Dict, List, Optional, Type
+
+logger = logging.getLogger(__name__)
+
+# Maps provider names to provider classes
+PROVIDER_REGISTRY: Dict[str, Type['MessageProvider']] = {}
+
+
+class ProviderResult:
+    """
+    Class to represent the outcome of sending one message through a provider.
+    """
+
+    def __init__(self,
+                 recipient: str,
+                 success: bool,
+                 message_id: Optional[str] = None,
+                 error: Optional[str] = None,
+                 retryable: bool = True):
+        """Initialize the result."""
+        self.recipient = recipient
+        self.success = success
+        self.message_id = message_id
+        self.error = error
+        self.retryable = retryable
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the result to a dictionary."""
+        return {
+            "recipient": self.recipient,
+            "success": self.success,
+            "message_id": self.message_id,
+            "error": self.error,
+            "retryable": self.retryable
+        }
+
+
+class MessageProvider:
+    """
+    Base class for message providers.
+
+    Subclasses implement the async send method and may override send_batch
+    and status. Providers whose underlying client is synchronous should also
+    override send_sync so thread-based callers don't pay for an event loop.
+    """
+
+    name = ""
+    # Whether status reports when a sent message is delivered, rather than only sent
+    reports_delivery = False
+
+    def __init__(self, **config):
+        """
+        Initialize the provider.
+
+        Args:
+            config: Provider-specific configuration
+        """
+        self.config = config
+
+    async def send(self, recipient: str, message: str) -> ProviderResult:
+        """
+        Send a message to one recipient.
+
+        Args:
+            recipient: Provider-specific recipient identifier
+            message: The message to send
+
+        Returns:
+            ProviderResult: The outcome of the send
+        """
+        raise NotImplementedError
+
+    async def send_batch(self, recipients: List[str], message: str) -> List[ProviderResult]:
+        """
+        Send the same message to several recipients concurrently.
+
+        Args:
+            recipients: Recipient identifiers
+            message: The message to send
+
+        Returns:
+            List of results, in the order of recipients
+        """
+        return list(await asyncio.gather(*(self.send(recipient, message) for recipient in recipients)))
+
+    async def status(self, message_id: str) -> Optional[str]:
+        """
+        Get the delivery status of a sent message.
+
+        Args:
+            message_id: The message ID returned by send
+
+        Returns:
+            The provider's status string, or None if unknown or unsupported
+        """
+        return None
+
+    def send_sync(self, recipient: str, message: str) -> ProviderResult:
+        """
+        Send a message to one recipient from synchronous code.
+
+        Args:
+            recipient: Provider-specific recipient identifier
+            message: The message to send
+
+        Returns:
+            ProviderResult: The outcome of the send
+        """
+        return asyncio.run(self.send(recipient, message))
+
+    def status_sync(self, message_id: str) -> Optional[str]:
+        """
+        Get the delivery status of a sent message from synchronous code.
+
+        Args:
+            message_id: The message ID returned by send
+
+        Returns:
+            The provider's status string, or None if unknown or unsupported
+        """
+        return asyncio.run(self.status(message_id))
+
+    def default_recipients(self) -> List[str]:
+        """Get the recipients to use when an alert names none."""
+        return []
+
+    def close(self):
+        """Release any resources held by the provider."""
+
+    async def close_async(self):
+        """Release resources from the event loop the provider sends on; defaults to close."""
+        self.close()
+
+
+def register_provider(name: str) -> Callable[[Type[MessageProvider]], Type[MessageProvider]]:
+    """
+    Class decorator registering a provider under a name.
+
+    Args:
+        name: The provider name used in configuration and alert routes
+
+    Returns:
+        The decorator
+    """
+    def decorator(cls: Type[MessageProvider]) -> Type[MessageProvider]:
+        cls.name = name
+        PROVIDER_REGISTRY[name] = cls
+        return cls
+    return decorator
+
+
+def create_provider(name: str, **config) -> MessageProvider:
+    """
+    Create a registered provider.
+
+    Args:
+        name: The provider name
+        config: Provider-specific configuration
+
+    Returns:
+        MessageProvider: The new provider
+    """
+    try:
+        provider_class = PROVIDER_REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"Unknown provider '{name}' (registered: {', '.join(sorted(PROVIDER_REGISTRY))})")
+    return provider_class(**config)
+
+
+def load_provider_plugins(module_names: List[str]) -> List[str]:
+    """
+    Import plugin modules so their providers register themselves.
+
+    Args:
+        module_names: Dotted module paths
+
+    Returns:
+        List of error messages for modules that failed to import
+    """
+    errors = []
+    for module_name in module_names:
+        try:
+            importlib.import_module(module_name)
+        except Exception as e:
+            errors.append(f"Failed to load provider plugin {module_name}: {str(e)}")
+            logger.error(errors[-1])
+    return errors
+
+
+@register_provider("sms")
+class TextBeltProvider(MessageProvider):
+    """
+    SMS provider sending through the TextBelt HTTP API.
+
+    The endpoint is configurable (api_url, status_url), so the provider can be
+    pointed at a local stand-in server such as app.core.mock_textbelt.
+
+    Synchronous sends go through SMSSender. Async sends and status checks use
+    an AsyncTextBeltClient with the same key and recipients, so they run on the
+    caller's event loop without a thread per request; async sends are still
+    recorded in the SMSSender's history, where their status can be checked.
+    """
+
+    reports_delivery = True
+
+    def __init__(self, sms_sender=None, **config):
+        """
+        Initialize the provider.
+
+        Args:
+            sms_sender: Existing SMSSender to send through, or None to create one
+            config: SMSSender configuration (api_key, recipients, api_url, status_url, request_timeout),
+                and the async client's max_connections and max_concurrency
+        """
+        super().__init__(**config)
+        if sms_sender is None:
+            from app.core.sms_sender import SMSSender
+            sms_sender = SMSSender(**config)
+            if config.get('api_key') and config.get('recipients'):
+                sms_sender.configure(config['api_key'], config['recipients'])
+        self.sms_sender = sms_sender
+
+        from app.core.textbelt_async import AsyncTextBeltClient
+        self.client = AsyncTextBeltClient(
+            api_url=sms_sender.api_url,
+            status_url=sms_sender.status_url,
+            request_timeout=sms_sender.request_timeout,
+            max_connections=config.get('max_connections', 100),
+            max_concurrency=config.get('max_concurrency', 50),
+            registry=sms_sender.registry
+        )
+
+    def send_sync(self, recipient: str, message: str) -> ProviderResult:
+        """Send an SMS to one recipient from synchronous code."""
+        if not self.sms_sender.is_configured:
+            return ProviderResult(recipient, False, error="SMS sender not configured")
+
+        sms_message = self.sms_sender.send_single(recipient, message)
+        if sms_message is None:
+            return ProviderResult(recipient, False, error=f"Invalid phone number: {recipient}", retryable=False)
+        if sms_message.status != "sent":
+            return ProviderResult(recipient, False, error=sms_message.error, retryable=sms_message.retryable)
+        return ProviderResult(recipient, True, message_id=sms_message.text_id)
+
+    async def send(self, recipient: str, message: str) -> ProviderResult:
+        """Send an SMS to one recipient without blocking the event loop."""
+        if not self.sms_sender.is_configured:
+            return ProviderResult(recipient, False, error="SMS sender not configured")
+        result = await self._client().send(recipient, message)
+        self.sms_sender.record_result(result, message)
+        return result
+
+    async def send_batch(self, recipients: List[str], message: str) -> List[ProviderResult]:
+        """Send an SMS to several recipients concurrently, within the client's concurrency limit."""
+        if not self.sms_sender.is_configured:
+            return [ProviderResult(recipient, False, error="SMS sender not configured") for recipient in recipients]
+        results = await self._client().send_batch(recipients, message)
+        for result in results:
+            self.sms_sender.record_result(result, message)
+        return results
+
+    async def status(self, message_id: str) -> Optional[str]:
+        """Get the TextBelt delivery status of a message."""
+        data = await self._client().status(message_id)
+        return data.get('status') if data else None
+
+    async def test_connection(self) -> bool:
+        """Test the TextBelt connection without sending an SMS."""
+        return await self._client().test_connection()
+
+    def status_sync(self, message_id: str) -> Optional[str]:
+        """Get the TextBelt delivery status of a message from synchronous code."""
+        data = self.sms_sender.check_message_status(message_id)
+        return data.get('status') if data else None
+
+    def default_recipients(self) -> List[str]:
+        """Get the configured phone numbers."""
+        return list(self.sms_sender.recipients)
+
+    def close(self):
+        """Close the HTTP sessions."""
+        self.sms_sender.close()
+
+    async def close_async(self):
+        """Close the HTTP sessions and the async client's connections."""
+        self.close()
+        await self.client.close()
+
+    def _client(self):
+        """Get the async client, using the key the sender is configured with."""
+        self.client.api_key = self.sms_sender.api_key
+        return self.client
+
+
+@register_provider("discord")
+class DiscordProvider(MessageProvider):
+    """
+    Discord provider sending direct messages to users registered with the bot.
+
+    Recipients are application user IDs that users registered with '!register'.
+    """
+
+    def __init__(self, discord_sender=None, **config):
+        """
+        Initialize the provider.
+
+        Args:
+            discord_sender: Existing DiscordSender to send through, or None to create one
+            config: DiscordSender configuration (token, lean_mode)
+        """
+        super().__init__(**config)
+        if discord_sender is None:
+            from app.core.discord_sender import DiscordSender
+            discord_sender = DiscordSender(config['token'], lean_mode=config.get('lean_mode', False))
+        self.discord_sender = discord_sender
+
+    async def send(self, recipient: str, message: str) -> ProviderResult:
+        """Send a direct message, on the bot's event loop if called from another loop."""
+        bot = self.discord_sender.bot
+        if not bot.is_ready():
+            logger.error("Discord bot is not connected")
+            success = False
+        elif bot.loop is asyncio.get_running_loop():
+            success = await self.discord_sender.send_message(recipient, message)
+        else:
+            future = asyncio.run_coroutine_threadsafe(self.discord_sender.send_message(recipient, message), bot.loop)
+            success = await asyncio.wrap_future(future)
+        return self._result(recipient, success)
+
+    def send_sync(self, recipient: str, message: str) -> ProviderResult:
+        """Send a direct message from synchronous code."""
+        return self._result(recipient, self.discord_sender.send_message_sync(recipient, message))
+
+    def default_recipients(self) -> List[str]:
+        """Get every application user ID registered with the bot."""
+        return list(self.discord_sender.user_mapping.keys())
+
+    @staticmethod
+    def _result(recipient: str, success: bool) -> ProviderResult:
+        """Build the result of a Discord send."""
+        if success:
+            return ProviderResult(recipient, True)
+        return ProviderResult(recipient, False, error=f"Discord message to user {recipient} was not delivered")
@@ -0,0 +1,225 @@
+"""
+Threshold rules that alert on how often a pattern is seen, not on each match.
+
+A rule such as "timeout > 50 in 60s" counts the matches of a pattern over a
+sliding window. It fires once when the count goes above the threshold and
+resolves once when it falls back, and only these transitions produce alerts;
+the matches themselves are just counted.
+
+Counts are kept per rule in a ring of at most BUCKETS time buckets, so
+recording a match is O(1) and memory does not grow with the match rate.
+"""
+
+import re
+import time
+from typing import Dict, List, Optional
+
+# Time buckets per window, the window slides in steps of window / BUCKETS
+BUCKETS = 60
+
+_RULE = re.compile(r"^(?P<pattern>.+?)\s*>\s*(?P<threshold>\d+)\s+in\s+(?P<window>\d+)\s*(?P<unit>[smh]?)$",
+                   re.IGNORECASE)
+_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600}
+
+
+class RateRule:
+    """
+    Alert when a pattern is seen more than threshold times within a window.
+    """
+
+    def __init__(self, pattern: str, threshold: int, window: float):
+        """
+        Initialize the rule.
+
+        Args:
+            pattern: The pattern counted
+            threshold: The rule fires when the count goes above this
+            window: Window length in seconds
+        """
+        if window <= 0:
+            raise ValueError(f"Invalid rate rule for '{pattern}': the window must be longer than 0 seconds")
+
+        self.pattern = pattern
+        self.threshold = threshold
+        self.window = window
+        self.firing = False
+        self.last_line = ""
+
+        self.bucket_count = max(1, min(BUCKETS, int(window)))
+        self.resolution = window / self.bucket_count
+        self._buckets = [0] * self.bucket_count
+        self._current = 0  # index of the newest bucket, in resolution steps since the epoch
+        self._total = 0
+
+    @classmethod
+    def parse(cls, rule: str) -> 'RateRule':
+        """
+        Parse a rule written as 'pattern > count in window', e.g. 'timeout > 50 in 60s'.
+
+        The window is in seconds, or in minutes or hours with an m or h suffix.
+
+        Args:
+            rule: The rule text
+
+        Returns:
+            RateRule: The parsed rule
+        """
+        match = _RULE.match(rule.strip())
+        if not match:
+            raise ValueError(f"Invalid rate rule '{rule}' (use: pattern > count in 60s)")
+
+        window = int(match.group("window")) * _UNITS[match.group("unit").lower()]
+        return cls(match.group("pattern").strip(), int(match.group("threshold")), window)
+
+    @property
+    def description(self) -> str:
+        """Get the rule as text."""
+        return f"{self.pattern} > {self.threshold} in {self.window:g}s"
+
+    def count(self, now: float) -> int:
+        """Get the number of matches within the window ending now."""
+        self._advance(int(now // self.resolution))
+        return self._total
+
+    def record(self, now: float, line: str = "") -> bool:
+        """
+        Count a match.
+
+        Args:
+            now: Time of the match, seconds since the epoch
+            line: The matching line, kept for the alert message
+
+        Returns:
+            bool: True if the rule started firing
+        """
+        index = int(now // self.resolution)
+        if index <= self._current - self.bucket_count:
+            # Older than the window, e.g. after the system clock was set back
+            return False
+        self._advance(index)
+        self._buckets[index % self.bucket_count] += 1
+        self._total += 1
+        self.last_line = line
+
+        if not self.firing and self._total > self.threshold:
+            self.firing = True
+            return True
+        return False
+
+    def check(self, now: float) -> bool:
+        """
+        Slide the window to now.
+
+        Returns:
+            bool: True if the rule stopped firing
+        """
+        if self.firing and self.count(now) <= self.threshold:
+            self.firing = False
+            return True
+        return False
+
+    def _advance(self, index: int):
+        """Empty the buckets that fell out of the window since the newest one."""
+        if index <= self._current:
+            return
+        for step in range(1, min(index - self._current, self.bucket_count) + 1):
+            slot = (self._current + step) % self.bucket_count
+            self._total -= self._buckets[slot]
+            self._buckets[slot] = 0
+        self._current = index
+
+
+class RateTransition:
+    """
+    A rate rule starting or stopping to fire.
+    """
+
+    def __init__(self, rule: RateRule, firing: bool, count: int):
+        """Initialize the transition."""
+        self.rule = rule
+        self.firing = firing
+        self.count = count
+
+    @property
+    def message(self) -> str:
+        """Get the alert text for the transition."""
+        if self.firing:
+            return (f"Rate alert: '{self.rule.pattern}' seen {self.count} times in {self.rule.window:g}s "
+                    f"(threshold {self.rule.threshold})\nLast: {self.rule.last_line}")
+        return f"Resolved: '{self.rule.pattern}' back to {self.count} times in {self.rule.window:g}s"
+
+
+class RateRuleEngine:
+    """
+    Counts matches of rated patterns and reports rule transitions.
+
+    Patterns are looked up lower-cased, like AlertRouter. A pattern may have
+    several rules, e.g. a warning and a critical rate.
+    """
+
+    def __init__(self):
+        """Initialize the engine with no rules."""
+        self.rules: List[RateRule] = []
+        self._lookup: Dict[str, List[RateRule]] = {}
+
+    def configure(self, rules: List[RateRule]):
+        """Replace the rules, forgetting all counts."""
+        lookup: Dict[str, List[RateRule]] = {}
+        for rule in rules:
+            lookup.setdefault(rule.pattern.lower(), []).append(rule)
+        self.rules = rules
+        self._lookup = lookup
+
+    def configure_from_rules(self, rules: List[str]) -> List[str]:
+        """
+        Replace the rules from rule strings.
+
+        Args:
+            rules: Rule strings in the format accepted by RateRule.parse
+
+        Returns:
+            List of error messages for rules that could not be parsed
+        """
+        parsed = []
+        errors = []
+        for rule in rules:
+            try:
+                parsed.append(RateRule.parse(rule))
+            except ValueError as e:
+                errors.append(str(e))
+
+        self.configure(parsed)
+        return errors
+
+    def is_rated(self, pattern: str) -> bool:
+        """Check whether matches of a pattern are counted by rules instead of alerting one by one."""
+        return pattern.lower() in self._lookup
+
+    def record(self, pattern: str, line: str = "", now: Optional[float] = None) -> List[RateTransition]:
+        """
+        Count a match of a pattern.
+
+        Args:
+            pattern: The pattern found
+            line: The matching line
+            now: Time of the match, defaults to now
+
+        Returns:
+            Rules that started firing
+        """
+        now = time.time() if now is None else now
+        return [
+            RateTransition(rule, True, rule.count(now))
+            for rule in self._lookup.get(pattern.lower(), [])
+            if rule.record(now, line)
+        ]
+
+    def check(self, now: Optional[float] = None) -> List[RateTransition]:
+        """
+        Slide all windows to now; call this periodically.
+
+        Returns:
+            Rules that stopped firing
+        """
+        now = time.time() if now is None else now
+        return [RateTransition(rule, False, rule.count(now)) for rule in self.rules if rule.check(now)]
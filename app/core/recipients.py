@@ -0,0 +1,124 @@
+"""
+Phone number validation and the registry of SMS recipients.
+
+Numbers are validated and converted to E.164 (+ country code and digits, as
+TextBelt expects) once, when recipients are configured. Sending then looks the
+precomputed form up instead of parsing each number again for every alert.
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+MIN_DIGITS = 8
+MAX_DIGITS = 15
+
+# Numbers given at send time, e.g. in routing rules, are remembered up to this many
+MAX_CACHED_NUMBERS = 4096
+
+
+def validate_phone_number(phone: str) -> Tuple[bool, Optional[str], Optional[str]]:
+    """
+    Validate a phone number and convert it to E.164 format.
+
+    Numbers starting with + keep their country code. Without one, 10-digit
+    numbers and 11-digit numbers starting with 1 are taken as US/Canada.
+
+    Args:
+        phone: The phone number as entered
+
+    Returns:
+        tuple: (is_valid, formatted_number, error_message)
+            - is_valid: True if the number is valid
+            - formatted_number: The E.164 number if valid, None otherwise
+            - error_message: Why the number is invalid, None if it is valid
+    """
+    phone = phone.strip()
+    digits_only = ''.join(filter(str.isdigit, phone))
+
+    if len(digits_only) < MIN_DIGITS:
+        return False, None, f"too few digits (min {MIN_DIGITS})"
+
+    # Longer numbers are likely a mistake
+    if len(digits_only) > MAX_DIGITS:
+        return False, None, f"too many digits (max {MAX_DIGITS})"
+
+    if phone.startswith('+'):
+        return True, '+' + digits_only, None
+    if digits_only.startswith('1') and len(digits_only) >= 10:
+        # Looks like a US/Canada number with country code
+        return True, '+' + digits_only, None
+    if len(digits_only) == 10:
+        # 10-digit number without country code, assume US/Canada
+        return True, '+1' + digits_only, None
+    return False, None, "missing country code (use +XX format)"
+
+
+class RecipientRegistry:
+    """
+    The configured SMS recipients, validated, converted to E.164 and deduplicated.
+
+    Every number the registry has seen, configured or not, maps to its E.164
+    form or its error in a dictionary, so resolving a number is one lookup.
+    """
+
+    def __init__(self):
+        """Initialize the registry with no recipients."""
+        self.numbers: List[str] = []
+        self.invalid: List[Tuple[str, str]] = []  # (number as entered, error)
+        self._resolved: Dict[str, Tuple[Optional[str], Optional[str]]] = {}  # number -> (E.164, error)
+        self._lock = threading.Lock()
+
+    def configure(self, numbers: List[str]) -> List[str]:
+        """
+        Replace the recipients.
+
+        Args:
+            numbers: Phone numbers as entered
+
+        Returns:
+            List of error messages for numbers that are invalid
+        """
+        resolved: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        valid: List[str] = []
+        invalid: List[Tuple[str, str]] = []
+        seen = set()
+        for number in numbers:
+            is_valid, formatted, error = validate_phone_number(number)
+            if not is_valid:
+                resolved[number] = (None, f"Invalid phone number: {number} - {error}")
+                invalid.append((number, error))
+                continue
+            resolved[number] = (formatted, None)
+            if formatted not in seen:
+                seen.add(formatted)
+                valid.append(formatted)
+
+        for formatted in valid:
+            resolved[formatted] = (formatted, None)
+
+        with self._lock:
+            self.numbers = valid
+            self.invalid = invalid
+            self._resolved = resolved
+        return [resolved[number][1] for number, _ in invalid]
+
+    def resolve(self, number: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Get the E.164 form of a number.
+
+        Args:
+            number: A configured number, or any other number, which is validated and remembered
+
+        Returns:
+            Tuple of the E.164 number, or None if invalid, and the error message, or None if valid
+        """
+        result = self._resolved.get(number)
+        if result is not None:
+            return result
+
+        is_valid, formatted, error = validate_phone_number(number)
+        result = (formatted, None if is_valid else f"Invalid phone number: {number} - {error}")
+        with self._lock:
+            if len(self._resolved) < MAX_CACHED_NUMBERS:
+                self._resolved[number] = result
+        return result
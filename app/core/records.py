@@ -0,0 +1,152 @@
+"""
+Assembly of multi-line log records, such as stack traces, before matching.
+
+A record starts at a line matching the start-of-record expression, or, with
+indent continuation, at any line that does not begin with a space or tab.
+Following lines belong to it until the next record starts, so a Java stack
+trace and its "at ..." lines become one record, matched and alerted once.
+
+Record starts are found with one regular expression over the whole buffer, so
+lines inside a record cost no Python work. Lines are still matched with
+PatternMatcher and each hit is then mapped to its record.
+"""
+
+import re
+from bisect import bisect_right
+from typing import Dict, List, Tuple
+
+from app.core.matcher import Match, PatternMatcher
+
+
+class RecordAssembler:
+    """
+    Splits bytes into multi-line records and finds the records containing patterns.
+
+    The assembler holds no state. Callers keep the bytes of the last, possibly
+    unfinished, record and pass them back in front of the next data.
+    """
+
+    def __init__(self,
+                 start_pattern: str = "",
+                 indent_continuation: bool = True,
+                 max_lines: int = 100,
+                 max_bytes: int = 16384):
+        """
+        Initialize the assembler.
+
+        Args:
+            start_pattern: Regular expression matching the beginning of a record's first line
+            indent_continuation: Whether lines starting with a space or tab continue a record
+            max_lines: Records longer than this are split
+            max_bytes: Records larger than this are split, at a line boundary
+
+        Raises:
+            ValueError: If neither rule is given or the expression is invalid
+        """
+        if not start_pattern and not indent_continuation:
+            raise ValueError("A record assembler needs a start pattern or indent continuation")
+
+        self.start_pattern = start_pattern
+        self.indent_continuation = indent_continuation
+        self.max_lines = max(1, max_lines)
+        self.max_bytes = max(1, max_bytes)
+
+        if start_pattern:
+            prefix = rb"(?![ \t])" if indent_continuation else b""
+            expression = rb"(?m)^" + prefix + rb"(?:" + start_pattern.encode("utf-8") + rb")"
+        else:
+            expression = rb"(?m)^(?=[^ \t\r\n])"
+        try:
+            self.start_regex = re.compile(expression)
+        except re.error as e:
+            raise ValueError(f"Invalid record start pattern '{start_pattern}': {e}")
+
+    def split(self, data, final: bool = False) -> Tuple[List[Tuple[int, int]], int]:
+        """
+        Split whole lines of data into records.
+
+        Args:
+            data: bytes-like buffer starting at a record boundary
+            final: If True, the last record is complete; otherwise it may
+                continue in data not read yet and is left out
+
+        Returns:
+            Tuple of the (start, end) ranges of the complete records, and the
+            offset where the unfinished record starts (len(data) if final)
+        """
+        starts = [match.start() for match in self.start_regex.finditer(data)]
+        if not starts or starts[0] != 0:
+            # Continuation lines with no start before them form a record of their own
+            starts.insert(0, 0)
+        ends = starts[1:] + [len(data)]
+
+        records = []
+        for start, end in zip(starts, ends):
+            records.extend(self._limit(data, start, end))
+
+        if final or not records:
+            return records, len(data)
+
+        pending_start = records.pop()[0]
+        return records, pending_start
+
+    def _limit(self, data, start: int, end: int) -> List[Tuple[int, int]]:
+        """Split a record longer than max_lines or max_bytes into pieces of whole lines."""
+        if end - start <= self.max_bytes and data.count(b"\n", start, end) <= self.max_lines:
+            return [(start, end)]
+
+        pieces = []
+        piece_start = position = start
+        lines = 0
+        while position < end:
+            newline = data.find(b"\n", position, end)
+            line_end = end if newline < 0 else newline + 1
+            if position > piece_start and (lines >= self.max_lines or line_end - piece_start > self.max_bytes):
+                pieces.append((piece_start, position))
+                piece_start = position
+                lines = 0
+            lines += 1
+            position = line_end
+        pieces.append((piece_start, end))
+        return pieces
+
+    def scan(self, matcher: PatternMatcher, data, final: bool = False) -> Tuple[List[Match], int, int]:
+        """
+        Find the complete records of data containing any of the matcher's patterns.
+
+        Args:
+            matcher: Matcher with the patterns to look for
+            data: bytes-like buffer starting at a record boundary
+            final: If True, the last record is complete, see split
+
+        Returns:
+            Tuple of the matches as (record start, record end, pattern indices),
+            one per record, the offset where the unfinished record starts, and
+            the number of lines in the complete records
+        """
+        records, consumed = self.split(data, final)
+        line_matches, line_count = matcher.scan_with_count(data, 0, consumed)
+        if not line_matches:
+            return [], consumed, line_count
+
+        record_starts = [start for start, _ in records]
+        found: Dict[int, List[int]] = {}
+        for line_start, _, indices in line_matches:
+            record_indices = found.setdefault(bisect_right(record_starts, line_start) - 1, [])
+            record_indices.extend(index for index in indices if index not in record_indices)
+
+        matches = []
+        for record, indices in found.items():
+            start, end = records[record]
+            matches.append((start, _strip_newline(data, start, end), sorted(indices)))
+        return matches, consumed, line_count
+
+
+def _strip_newline(data, start: int, end: int) -> int:
+    """Get the end of a record without its trailing line break."""
+    if end > start and data[end - 1:end] == b"\n":
+        end -= 1
+    if end > start and data[end - 1:end] == b"\r":
+        end -= 1
+    return end
+
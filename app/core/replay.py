@@ -0,0 +1,252 @@
+"""
+Replay archived logs through the matching and routing pipeline without sending anything.
+
+Useful for checking a pattern list before deploying it: how often each pattern
+hits, how many alerts that would have fired, and by priority. Plain and
+compressed (gzip, bzip2, xz) files are streamed in large blocks and matched as bytes with the same
+PatternMatcher as FileMonitor, so only matching lines are decoded.
+
+The live pipeline fires one alert per pattern found in a line. Replay also
+reports the count after coalescing: further matches of a pattern within
+coalesce_lines lines of the alert it last fired are folded into that alert,
+so a burst such as a stack trace counts once.
+
+    python -m app.core.replay app.log.2.gz app.log.1.gz app.log -p error -p timeout
+"""
+
+import argparse
+import json
+import logging
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.core.alert_router import AlertRouter
+from app.core.log_reader import DEFAULT_BLOCK_SIZE, open_log, read_blocks
+from app.core.structured import PatternSet
+from app.core.matcher import Match, ParallelMatcher
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COALESCE_LINES = 100
+
+
+class ReplayResult:
+    """
+    Counts collected by a replay.
+    """
+
+    def __init__(self, patterns: Sequence[str]):
+        """Initialize the result for a pattern set."""
+        self.files = 0
+        self.lines = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.hits: Counter = Counter({pattern: 0 for pattern in patterns})
+        self.alerts: Counter = Counter({pattern: 0 for pattern in patterns})
+        self.priorities: Counter = Counter()
+
+    @property
+    def total_hits(self) -> int:
+        """Get the number of alerts the live pipeline would have fired."""
+        return sum(self.hits.values())
+
+    @property
+    def total_alerts(self) -> int:
+        """Get the number of alerts after coalescing."""
+        return sum(self.alerts.values())
+
+    @property
+    def lines_per_second(self) -> float:
+        """Get the replay throughput in lines per second."""
+        return self.lines / self.seconds if self.seconds else 0.0
+
+    @property
+    def mib_per_second(self) -> float:
+        """Get the replay throughput in MiB of uncompressed log per second."""
+        return self.bytes / (1 << 20) / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the result to a dictionary."""
+        return {
+            "files": self.files,
+            "lines": self.lines,
+            "bytes": self.bytes,
+            "seconds": round(self.seconds, 3),
+            "lines_per_second": round(self.lines_per_second, 1),
+            "mib_per_second": round(self.mib_per_second, 1),
+            "hits": dict(self.hits),
+            "alerts": dict(self.alerts),
+            "alerts_by_priority": dict(self.priorities),
+            "total_hits": self.total_hits,
+            "total_alerts": self.total_alerts
+        }
+
+
+class ReplayEngine:
+    """
+    Streams log files through a pattern set and counts the alerts it would fire.
+    """
+
+    def __init__(self,
+                 patterns: Sequence[str],
+                 router: Optional[AlertRouter] = None,
+                 coalesce_lines: int = DEFAULT_COALESCE_LINES,
+                 parallel_matcher: Optional[ParallelMatcher] = None,
+                 block_size: int = DEFAULT_BLOCK_SIZE):
+        """
+        Initialize the engine.
+
+        Args:
+            patterns: Patterns or "where: ..." field conditions to look for
+            router: Router giving each pattern its priority, defaults to normal for all
+            coalesce_lines: Lines after an alert within which repeats of its pattern are folded into it
+            parallel_matcher: Matcher to spread each block over worker processes, or None
+            block_size: Bytes read and matched at a time
+
+        Raises:
+            ValueError: If a field condition is invalid
+        """
+        self.patterns = list(patterns)
+        self.router = router or AlertRouter()
+        self.coalesce_lines = coalesce_lines
+        self.parallel_matcher = parallel_matcher
+        self.block_size = block_size
+        self.pattern_set = PatternSet(self.patterns)
+        self.matcher = self.pattern_set.matcher
+        self.priorities = [self.router.route(pattern).priority for pattern in self.patterns]
+
+    def run(self, paths: Sequence[str]) -> ReplayResult:
+        """
+        Replay files in order, as one continuous log.
+
+        Args:
+            paths: Log files, plain or compressed, oldest first
+
+        Returns:
+            ReplayResult: The counts
+        """
+        result = ReplayResult(self.patterns)
+        last_alert_line: Dict[int, int] = {}
+        started = time.perf_counter()
+
+        for path in paths:
+            with open_log(path) as stream:
+                for block in read_blocks(stream, self.block_size):
+                    result.bytes += len(block)
+                    self._replay_block(block, result, last_alert_line)
+            result.files += 1
+            logger.info(f"Replayed {path}, {result.lines} lines so far")
+
+        result.seconds = time.perf_counter() - started
+        return result
+
+    def _replay_block(self, data: bytes, result: ReplayResult, last_alert_line: Dict[int, int]):
+        """Count the matches of a block of whole lines."""
+        if self.parallel_matcher is not None:
+            matches: List[Match] = self.parallel_matcher.scan(self.pattern_set.literals, data)
+            line_count = data.count(b"\n")
+        else:
+            matches, line_count = self.matcher.scan_with_count(data)
+        matches = self.pattern_set.resolve(data, matches)
+
+        line_number = result.lines
+        position = 0
+        for line_start, _, indices in matches:
+            line_number += data.count(b"\n", position, line_start)
+            position = line_start
+            for index in indices:
+                pattern = self.patterns[index]
+                result.hits[pattern] += 1
+                last = last_alert_line.get(index)
+                if last is None or line_number - last > self.coalesce_lines:
+                    last_alert_line[index] = line_number
+                    result.alerts[pattern] += 1
+                    result.priorities[self.priorities[index]] += 1
+
+        if not data.endswith(b"\n"):
+            # Last line of a file without a newline
+            line_count += 1
+        result.lines += line_count
+
+
+def format_report(result: ReplayResult) -> str:
+    """Format a replay result as a text table."""
+    width = max([len("pattern")] + [len(pattern) for pattern in result.hits])
+    lines = [f"{'pattern':<{width}} {'hits':>10} {'alerts':>10}"]
+    for pattern, hits in result.hits.most_common():
+        lines.append(f"{pattern:<{width}} {hits:>10} {result.alerts[pattern]:>10}")
+    lines.append(f"{'total':<{width}} {result.total_hits:>10} {result.total_alerts:>10}")
+    lines.append("")
+    if result.priorities:
+        lines.append("Alerts by priority: " + ", ".join(
+            f"{priority} {count}" for priority, count in sorted(result.priorities.items())
+        ))
+    lines.append(
+        f"{result.files} files, {result.lines} lines, {result.bytes / (1 << 20):.1f} MiB in {result.seconds:.2f} s "
+        f"({result.lines_per_second:,.0f} lines/s, {result.mib_per_second:.1f} MiB/s)"
+    )
+    return "\n".join(lines)
+
+
+def _load_saved_settings() -> Dict[str, Any]:
+    """Load the monitor settings saved by the application."""
+    # Imported here so replaying with explicit patterns does not need Qt
+    from app.utils.config import Config
+    return Config().load_monitor_settings()
+
+
+def main():
+    """Replay log files and print the alert report."""
+    parser = argparse.ArgumentParser(description="Count the alerts a pattern set would fire on archived logs")
+    parser.add_argument("paths", nargs="+", help="Log files, plain, .gz, .bz2 or .xz, oldest first")
+    parser.add_argument("-p", "--pattern", action="append", default=[],
+                        help="Pattern to match, may be repeated (default: the saved monitor patterns)")
+    parser.add_argument("--patterns-file", help="File with one pattern per line")
+    parser.add_argument("--rules-file",
+                        help="File with one routing rule per line (default: the saved rules with the saved patterns)")
+    parser.add_argument("--coalesce-lines", type=int, default=DEFAULT_COALESCE_LINES,
+                        help="Lines within which repeats of a pattern count as one alert")
+    parser.add_argument("--workers", type=int, default=0, help="Match in this many worker processes")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    patterns = list(args.pattern)
+    if args.patterns_file:
+        with open(args.patterns_file, encoding="utf-8") as f:
+            patterns += [line.strip() for line in f if line.strip()]
+
+    rules = None
+    if args.rules_file:
+        with open(args.rules_file, encoding="utf-8") as f:
+            rules = [line.strip() for line in f if line.strip()]
+
+    if not patterns:
+        settings = _load_saved_settings()
+        patterns = settings["patterns"]
+        rules = settings["routing_rules"] if rules is None else rules
+    if not patterns:
+        parser.error("no patterns given and none saved in the application")
+
+    router = AlertRouter()
+    for error in router.configure_from_rules(rules or []):
+        logger.warning(error)
+
+    try:
+        engine = ReplayEngine(patterns, router, args.coalesce_lines)
+    except ValueError as e:
+        parser.error(str(e))
+
+    parallel_matcher = ParallelMatcher(args.workers) if args.workers > 1 else None
+    engine.parallel_matcher = parallel_matcher
+    try:
+        result = engine.run(args.paths)
+    finally:
+        if parallel_matcher is not None:
+            parallel_matcher.close()
+
+    print(json.dumps(result.to_dict(), indent=2) if args.json else format_report(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,28 +3,44 @@ SMS notification module using TextBelt.
 """
 
 import time
+import threading
 import requests
 import datetime
+from collections import deque
 from typing import List, Dict, Any, Optional
 from PyQt5.QtCore import QObject, pyqtSignal
 import logging
 
+from app.core.events import DEBUG, ERROR, INFO, WARNING, StatusEvent, parse_level
+from app.core.metrics import REGISTRY
+from app.core.recipients import RecipientRegistry
+from app.core.tracing import TRACER
+
 logger = logging.getLogger(__name__)
 
+SMS_SENT = REGISTRY.counter("sms_messages_total", "SMS send attempts by result", ("result",))
+SMS_REQUEST_SECONDS = REGISTRY.histogram("sms_request_seconds", "Duration of TextBelt send requests")
+SMS_STATUS_CHECKS = REGISTRY.counter("sms_status_checks_total", "TextBelt delivery status checks")
+
+# Sent messages kept for the history tab and status checks, oldest are discarded first
+MAX_HISTORY = 10000
+
 
 class SMSMessage:
     """
     Class to represent an SMS message with tracking information.
     """
     
-    def __init__(self, recipient: str, message: str, text_id: Optional[str] = None):
+    def __init__(self, recipient: str, message: str, text_id: Optional[str] = None, trace_id: str = ""):
         """Initialize the SMS message."""
         self.recipient = recipient
         self.message = message
         self.text_id = text_id
+        self.trace_id = trace_id  # Correlation ID shared with the match and alert that caused it
         self.timestamp = datetime.datetime.now()
         self.status = "pending"  # pending, sent, delivered, failed
         self.error = None
+        self.retryable = True  # Whether a failed send may succeed if tried again
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert the message to a dictionary."""
@@ -34,13 +50,14 @@ class SMSMessage:
             "text_id": self.text_id,
             "timestamp": self.timestamp.isoformat(),
             "status": self.status,
-            "error": self.error
+            "error": self.error,
+            "trace_id": self.trace_id
         }
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'SMSMessage':
         """Create a message from a dictionary."""
-        message = cls(data["recipient"], data["message"], data["text_id"])
+        message = cls(data["recipient"], data["message"], data["text_id"], data.get("trace_id", ""))
         message.timestamp = datetime.datetime.fromisoformat(data["timestamp"])
         message.status = data["status"]
         message.error = data["error"]
@@ -54,7 +71,7 @@ class SMSSender(QObject):
     """
     
     # Define signals
-    status_update = pyqtSignal(str)
+    status_event = pyqtSignal(object)  # StatusEvent
     sms_sent = pyqtSignal(str, int)  # message, recipient count
     sms_status_updated = pyqtSignal(str, str)  # text_id, status
     
@@ -63,16 +80,91 @@ class SMSSender(QObject):
     STATUS_URL = "https://textbelt.com/status"
     
     def __init__(self, **kwargs):
-        """Initialize the SMS sender with any required configuration."""
+        """
+        Initialize the SMS sender with any required configuration.
+        
+        Args:
+            api_url: TextBelt send endpoint, defaults to API_URL
+            status_url: TextBelt status endpoint, defaults to STATUS_URL
+            request_timeout: Seconds to wait for a TextBelt response
+            verbosity: Lowest level of status events to emit, as a name or number (default INFO)
+            max_history: Number of sent messages kept, defaults to MAX_HISTORY
+        """
         super().__init__()
         self.config = kwargs
+        self.api_url = kwargs.get('api_url') or self.API_URL
+        self.status_url = kwargs.get('status_url') or self.STATUS_URL
+        # Reuse connections across sends instead of opening one per request. Sessions are
+        # not thread-safe and the alert dispatcher sends from several threads, so each
+        # thread gets its own.
+        self._local = threading.local()
+        self._sessions: List[requests.Session] = []
         self.api_key = "textbelt"  # Default key for free tier
-        self.recipients = []
+        self.registry = RecipientRegistry()
+        self.recipients = []  # Valid configured numbers in E.164 format, without duplicates
         self.is_configured = False
         self.is_free_tier = True
-        self.message_history = []
+        self.message_history = deque(maxlen=kwargs.get('max_history') or MAX_HISTORY)
+        self._messages_by_id: Dict[str, SMSMessage] = {}  # text_id -> message, for status checks
+        self._lock = threading.Lock()
+        self.request_timeout = kwargs.get('request_timeout', 10.0)
+        self.verbosity = parse_level(kwargs.get('verbosity') or INFO)
         logger.info("SMS Sender initialized")
     
+    @property
+    def session(self) -> requests.Session:
+        """Get the HTTP session of the calling thread, creating it on first use."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+    
+    def close(self):
+        """Close the HTTP sessions of all threads."""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        self._local = threading.local()
+    
+    def _record(self, sms_message: SMSMessage):
+        """Add a message to the history, forgetting the oldest one if the history is full."""
+        with self._lock:
+            if len(self.message_history) == self.message_history.maxlen:
+                oldest = self.message_history[0]
+                if oldest.text_id is not None and self._messages_by_id.get(str(oldest.text_id)) is oldest:
+                    del self._messages_by_id[str(oldest.text_id)]
+            self.message_history.append(sms_message)
+            if sms_message.text_id is not None:
+                self._messages_by_id[str(sms_message.text_id)] = sms_message
+    
+    def set_verbosity(self, level):
+        """
+        Set the lowest level of status events to emit.
+        
+        Args:
+            level: Level name (e.g. "debug") or number
+        """
+        self.verbosity = parse_level(level)
+    
+    def is_enabled(self, level: int) -> bool:
+        """Check whether status events at a level are emitted."""
+        return level >= self.verbosity
+    
+    def _emit(self, level: int, event_type: str, template: str, **fields):
+        """
+        Emit a status event, unless it is below the verbosity.
+        
+        The check comes first, so filtered events cost no formatting and no
+        cross-thread signal.
+        """
+        if level < self.verbosity:
+            return
+        self.status_event.emit(StatusEvent(event_type, level, template, fields))
+    
     def configure(self, 
                   api_key: str, 
                   recipients: List[str]) -> bool:
@@ -87,7 +179,15 @@ class SMSSender(QObject):
             bool: True if configuration was successful, False otherwise
         """
         self.api_key = api_key
-        self.recipients = recipients
+        
+        # Validate and format the numbers once, not on every send
+        errors = self.registry.configure(recipients)
+        self.recipients = self.registry.numbers
+        if errors:
+            self._emit(WARNING, "invalid_numbers",
+                       "The following numbers are invalid and will not receive SMS:\n{summary}",
+                       numbers=[number for number, _ in self.registry.invalid],
+                       summary="".join(f"• {error}\n" for error in errors))
         
         # Check if using free tier
         self.is_free_tier = (api_key.lower() == "textbelt")
@@ -95,23 +195,25 @@ class SMSSender(QObject):
         # Validate configuration
         if not self.api_key:
             self.is_configured = False
-            self.status_update.emit("Error: API key not provided")
+            self._emit(ERROR, "config_error", "Error: API key not provided")
             return False
             
         if not self.recipients:
             self.is_configured = False
-            self.status_update.emit("Error: No recipients configured")
+            self._emit(ERROR, "config_error", "Error: No valid recipients configured")
             return False
         
         self.is_configured = True
         tier_type = "free" if self.is_free_tier else "paid"
-        self.status_update.emit(f"SMS sender configured successfully (using {tier_type} tier)")
+        self._emit(INFO, "configured", "SMS sender configured successfully (using {tier} tier)", tier=tier_type)
         return True
     
     def validate_phone_number(self, phone: str) -> tuple:
         """
         Validate and format a phone number according to TextBelt's requirements.
         
+        Configured numbers were validated by configure, so this is a lookup for them.
+        
         Args:
             phone: The phone number to validate and format
             
@@ -121,153 +223,215 @@ class SMSSender(QObject):
                 - formatted_number: The formatted E.164 number if valid, None otherwise
                 - error_message: Error message if invalid, None otherwise
         """
-        # Remove all non-digit characters for validation
-        digits_only = ''.join(filter(str.isdigit, phone))
-        
-        # Handle empty or very short phone numbers
-        if not digits_only or len(digits_only) < 8:
-            return False, None, f"Invalid phone number: {phone} - too few digits"
-        
-        # Handle very long phone numbers (likely a mistake)
-        if len(digits_only) > 15:
-            return False, None, f"Invalid phone number: {phone} - too many digits"
-        
-        # Format the number according to E.164 format
-        if phone.startswith('+'):
-            # Already has a plus, just remove any non-digit characters except the leading +
-            formatted = '+' + digits_only
-        else:
-            # No plus sign, need to add proper country code
-            if digits_only.startswith('1') and len(digits_only) >= 10:
-                # Looks like a US/Canada number with country code
-                formatted = '+' + digits_only
-            elif len(digits_only) == 10:
-                # 10-digit number without country code, assume US/Canada
-                formatted = '+1' + digits_only
-            else:
-                # Not clearly a US number and no country code specified
-                return False, None, f"Invalid phone number: {phone} - missing country code (use +XX format)"
-        
-        return True, formatted, None
+        formatted, error = self.registry.resolve(phone)
+        return formatted is not None, formatted, error
 
-    def send_message(self, message: str, force_production: bool = True) -> bool:
+    def send_message(self, message: str, force_production: bool = True,
+                     recipients: Optional[List[str]] = None, trace_id: Optional[str] = None) -> bool:
         """
         Send an SMS message to all configured recipients.
         
         Args:
             message: The message content to send
             force_production: If True, ensures messages are sent as real messages
+            recipients: Phone numbers to send to instead of the configured recipients
+            trace_id: Correlation ID for tracing, defaults to the current trace
             
         Returns:
             bool: True if messages were sent successfully, False otherwise
         """
         if not self.is_configured:
-            self.status_update.emit("Error: SMS sender not configured")
+            self._emit(ERROR, "config_error", "Error: SMS sender not configured")
             return False
         
-        if not self.recipients:
-            self.status_update.emit("Error: No recipients configured")
+        recipients = recipients or self.recipients
+        if not recipients:
+            self._emit(ERROR, "config_error", "Error: No recipients configured")
             return False
         
         success_count = 0
         invalid_numbers = []
         
         try:
-            for recipient in self.recipients:
-                # Validate and format the phone number
-                is_valid, formatted_number, error_msg = self.validate_phone_number(recipient)
+            for recipient in recipients:
+                sms_message = self.send_single(recipient, message, force_production, trace_id)
                 
-                if not is_valid:
-                    self.status_update.emit(error_msg)
-                    invalid_numbers.append((recipient, error_msg))
+                if sms_message is None:
+                    invalid_numbers.append((recipient, self.registry.resolve(recipient)[1]))
                     continue
-                    
-                # Create a message object to track this SMS
-                sms_message = SMSMessage(recipient, message)
-                
-                self.status_update.emit(f"Sending SMS to formatted number: {formatted_number}")
-                
-                # Prepare the payload
-                payload = {
-                    'phone': formatted_number,
-                    'message': message,
-                    'key': self.api_key
-                }
                 
-                # Log whether this is production or test mode
-                if force_production:
-                    self.status_update.emit("Sending in PRODUCTION mode - real message will be sent")
-                
-                self.status_update.emit(f"Sending request to: {self.API_URL}")
-                self.status_update.emit(f"Payload: phone={formatted_number[:3]}...{formatted_number[-3:]}, message length={len(message)}, key={self.api_key[:4]}...")
-                
-                # Send the request
-                response = requests.post(self.API_URL, data=payload)
-                self.status_update.emit(f"Response status code: {response.status_code}")
-                
-                try:
-                    response_data = response.json()
-                    self.status_update.emit(f"Response data: {response_data}")
-                except:
-                    self.status_update.emit(f"Failed to parse response as JSON: {response.text}")
-                    response_data = {"success": False, "error": "Failed to parse response"}
-                
-                if response_data.get('success'):
-                    # Update message with text_id and status
-                    text_id = response_data.get('textId')
-                    sms_message.text_id = text_id
-                    sms_message.status = "sent"
-                    
+                if sms_message.status == "sent":
                     success_count += 1
-                    self.status_update.emit(f"SMS sent to {recipient}, Message ID: {text_id}")
-                    
-                    if 'quotaRemaining' in response_data:
-                        self.status_update.emit(f"Remaining quota: {response_data.get('quotaRemaining', 'unknown')}")
-                    
-                    # Start checking delivery status in the future
-                    self.status_update.emit(f"Message ID: {text_id} - Can check delivery status")
-                else:
-                    error_msg = response_data.get('error', 'Unknown error')
-                    sms_message.status = "failed"
-                    sms_message.error = error_msg
-                    
-                    # Provide more detailed error information
-                    if "disabled for this country" in error_msg:
-                        self.status_update.emit(f"Failed to send SMS to {recipient}: Free SMS are disabled for this country.")
-                        self.status_update.emit("To send to this country, you need to purchase TextBelt credits.")
-                    elif "quota" in error_msg.lower():
-                        self.status_update.emit(f"Failed to send SMS to {recipient}: {error_msg}")
-                        self.status_update.emit("You've exceeded your SMS quota. Purchase credits at textbelt.com")
-                    else:
-                        self.status_update.emit(f"Failed to send SMS to {recipient}: {error_msg}")
-                
-                # Add to message history
-                self.message_history.append(sms_message)
                     
                 # Add a small delay to avoid rate limiting
                 time.sleep(0.1)
             
             # Show summary of invalid numbers if any
             if invalid_numbers:
-                invalid_summary = "The following numbers were invalid and SMS were not sent:\n"
-                for num, err in invalid_numbers:
-                    invalid_summary += f"• {num}: {err}\n"
-                self.status_update.emit(invalid_summary)
+                self._emit(WARNING, "invalid_numbers",
+                           "The following numbers were invalid and SMS were not sent:\n{summary}",
+                           numbers=[num for num, _ in invalid_numbers],
+                           summary="".join(f"• {num}: {err}\n" for num, err in invalid_numbers))
                 
                 # If all numbers were invalid, report failure
                 if success_count == 0:
-                    self.status_update.emit("No valid phone numbers found. Please check your recipient list.")
+                    self._emit(ERROR, "no_valid_numbers", "No valid phone numbers found. Please check your recipient list.")
                     return False
             
             self.sms_sent.emit(message, success_count)
             return success_count > 0
             
         except Exception as e:
-            self.status_update.emit(f"Error sending SMS: {str(e)}")
-            import traceback
-            self.status_update.emit(f"Traceback: {traceback.format_exc()}")
+            self._emit(ERROR, "send_error", "Error sending SMS: {error}", error=str(e))
+            if self.is_enabled(DEBUG):
+                import traceback
+                self._emit(DEBUG, "traceback", "Traceback: {traceback}", traceback=traceback.format_exc())
             return False
     
+    def send_single(self, recipient: str, message: str,
+                    force_production: bool = True, trace_id: Optional[str] = None) -> Optional[SMSMessage]:
+        """
+        Send an SMS message to a single recipient.
+        
+        Network errors and TextBelt errors are recorded on the returned message
+        rather than raised. The message's retryable flag tells whether sending
+        again later could succeed.
+        
+        Args:
+            recipient: The phone number to send to
+            message: The message content to send
+            force_production: If True, ensures messages are sent as real messages
+            trace_id: Correlation ID for tracing, defaults to the current trace
+            
+        Returns:
+            SMSMessage: The tracked message, or None if the phone number is invalid
+        """
+        # Look up the E.164 form of the phone number
+        formatted_number, error_msg = self.registry.resolve(recipient)
+        
+        if formatted_number is None:
+            SMS_SENT.labels("invalid").inc()
+            self._emit(WARNING, "invalid_number", "{error}", recipient=recipient, error=error_msg)
+            return None
+            
+        # Create a message object to track this SMS
+        sms_message = SMSMessage(recipient, message, trace_id=trace_id or TRACER.current_trace_id())
+        
+        # Prepare the payload
+        payload = {
+            'phone': formatted_number,
+            'message': message,
+            'key': self.api_key
+        }
+        
+        if self.is_enabled(DEBUG):
+            self._emit(DEBUG, "sms_request",
+                       "Sending SMS to {phone_start}...{phone_end}{mode} via {url} "
+                       "(message length={length}, key={key}...)",
+                       phone_start=formatted_number[:3], phone_end=formatted_number[-3:],
+                       mode=" in PRODUCTION mode" if force_production else "",
+                       url=self.api_url, length=len(message), key=self.api_key[:4])
+        
+        # Send the request
+        started = time.perf_counter()
+        sent_at = time.time()
+        try:
+            response = self.session.post(self.api_url, data=payload, timeout=self.request_timeout)
+        except requests.RequestException as e:
+            SMS_REQUEST_SECONDS.observe(time.perf_counter() - started)
+            TRACER.record(sms_message.trace_id, "send", sent_at, time.time(), recipient=recipient, error=str(e))
+            SMS_SENT.labels("error").inc()
+            sms_message.status = "failed"
+            sms_message.error = str(e)
+            sms_message.retryable = True
+            self._emit(ERROR, "sms_failed", "Failed to send SMS to {recipient}: {error}",
+                       recipient=recipient, error=str(e))
+            self._record(sms_message)
+            return sms_message
+        
+        SMS_REQUEST_SECONDS.observe(time.perf_counter() - started)
+        TRACER.record(sms_message.trace_id, "send", sent_at, time.time(),
+                      recipient=recipient, status_code=response.status_code)
+        
+        try:
+            response_data = response.json()
+            self._emit(DEBUG, "sms_response", "Response {status_code}: {data}",
+                       status_code=response.status_code, data=response_data)
+        except:
+            self._emit(WARNING, "bad_response", "Failed to parse response as JSON (HTTP {status_code}): {body}",
+                       status_code=response.status_code, body=response.text)
+            response_data = {"success": False, "error": "Failed to parse response"}
+        
+        if response_data.get('success'):
+            # Update message with text_id and status
+            text_id = response_data.get('textId')
+            sms_message.text_id = text_id
+            sms_message.status = "sent"
+            SMS_SENT.labels("sent").inc()
+            TRACER.start_span(sms_message.trace_id, "confirm", str(text_id), recipient=recipient)
+            
+            self._emit(INFO, "sms_sent", "SMS sent to {recipient}, Message ID: {text_id}",
+                       recipient=recipient, text_id=text_id)
+            
+            if 'quotaRemaining' in response_data:
+                self._emit(DEBUG, "quota", "Remaining quota: {quota}", quota=response_data['quotaRemaining'])
+        else:
+            error_msg = response_data.get('error', 'Unknown error')
+            sms_message.status = "failed"
+            sms_message.error = error_msg
+            SMS_SENT.labels("failed").inc()
+            
+            # Provide more detailed error information
+            if "disabled for this country" in error_msg:
+                self._emit(ERROR, "sms_failed", "Failed to send SMS to {recipient}: Free SMS are disabled for this country.\n"
+                           "To send to this country, you need to purchase TextBelt credits.",
+                           recipient=recipient, error=error_msg)
+            elif "quota" in error_msg.lower():
+                self._emit(ERROR, "sms_failed", "Failed to send SMS to {recipient}: {error}\n"
+                           "You've exceeded your SMS quota. Purchase credits at textbelt.com",
+                           recipient=recipient, error=error_msg)
+            else:
+                self._emit(ERROR, "sms_failed", "Failed to send SMS to {recipient}: {error}",
+                           recipient=recipient, error=error_msg)
+            
+            # Server errors, rate limiting and exhausted quota may clear up; other rejections will not
+            if response.status_code < 500 and response.status_code != 429 and "quota" not in error_msg.lower():
+                sms_message.retryable = False
+        
+        # Add to message history
+        self._record(sms_message)
+        return sms_message
+    
+    def record_result(self, result, message: str, trace_id: Optional[str] = None) -> SMSMessage:
+        """
+        Add a message sent by another client, such as AsyncTextBeltClient, to the history.
+        
+        The message then shows in the history and its status can be checked,
+        as if it was sent with send_single.
+        
+        Args:
+            result: The ProviderResult of the send
+            message: The message content that was sent
+            trace_id: Correlation ID for tracing, defaults to the current trace
+            
+        Returns:
+            SMSMessage: The tracked message
+        """
+        sms_message = SMSMessage(result.recipient, message, result.message_id,
+                                 trace_id=trace_id or TRACER.current_trace_id())
+        if result.success:
+            sms_message.status = "sent"
+            self._emit(INFO, "sms_sent", "SMS sent to {recipient}, Message ID: {text_id}",
+                       recipient=result.recipient, text_id=result.message_id)
+        else:
+            sms_message.status = "failed"
+            sms_message.error = result.error
+            sms_message.retryable = result.retryable
+            self._emit(ERROR, "sms_failed", "Failed to send SMS to {recipient}: {error}",
+                       recipient=result.recipient, error=result.error)
+        self._record(sms_message)
+        return sms_message
+    
     def check_message_status(self, text_id: str) -> Optional[Dict[str, Any]]:
         """
         Check the delivery status of a message.
@@ -279,12 +443,12 @@ class SMSSender(QObject):
             Dict containing the status information, or None if the check failed
         """
         if not self.api_key:
-            self.status_update.emit("Error: API key not provided")
+            self._emit(ERROR, "config_error", "Error: API key not provided")
             return None
         
         try:
             # Log details for debugging
-            self.status_update.emit(f"Checking status for message ID: {text_id}")
+            self._emit(DEBUG, "status_check", "Checking status for message ID: {text_id}", text_id=text_id)
             
             # Prepare the payload
             payload = {
@@ -293,59 +457,72 @@ class SMSSender(QObject):
             }
             
             # Log request details
-            self.status_update.emit(f"Sending request to: {self.STATUS_URL} with payload: {payload}")
+            self._emit(DEBUG, "status_request", "Sending request to: {url} with payload: {payload}",
+                       url=self.status_url, payload=payload)
             
             # Send the request
-            response = requests.get(self.STATUS_URL, params=payload)
+            SMS_STATUS_CHECKS.inc()
+            response = self.session.get(self.status_url, params=payload, timeout=self.request_timeout)
             
             # Log the complete response
-            self.status_update.emit(f"Response status code: {response.status_code}")
-            self.status_update.emit(f"Response content: {response.text[:200]}...")
+            if self.is_enabled(DEBUG):
+                self._emit(DEBUG, "status_response", "Response {status_code}: {body}...",
+                           status_code=response.status_code, body=response.text[:200])
             
             if response.status_code == 200:
                 data = response.json()
                 
                 # Update message in history
-                for message in self.message_history:
-                    if message.text_id == text_id:
-                        message.status = data.get('status', message.status)
-                        
-                        # Emit signal for status update
-                        self.sms_status_updated.emit(text_id, data.get('status', 'unknown'))
-                        
-                        if data.get('status') == 'DELIVERED':
-                            self.status_update.emit(f"Message {text_id} delivered successfully")
-                        elif data.get('status') == 'FAILED':
-                            self.status_update.emit(f"Message {text_id} failed to deliver")
-                        else:
-                            self.status_update.emit(f"Message {text_id} status: {data.get('status')}")
+                message = self._messages_by_id.get(str(text_id))
+                if message is not None:
+                    message.status = data.get('status', message.status)
+                    
+                    # Emit signal for status update
+                    self.sms_status_updated.emit(text_id, data.get('status', 'unknown'))
+                    
+                    if data.get('status') == 'DELIVERED':
+                        TRACER.end_span(message.trace_id, "confirm", str(text_id))
+                        self._emit(INFO, "delivery_status", "Message {text_id} delivered successfully",
+                                   text_id=text_id, status='DELIVERED')
+                    elif data.get('status') == 'FAILED':
+                        self._emit(WARNING, "delivery_status", "Message {text_id} failed to deliver",
+                                   text_id=text_id, status='FAILED')
+                    else:
+                        self._emit(INFO, "delivery_status", "Message {text_id} status: {status}",
+                                   text_id=text_id, status=data.get('status'))
                 
                 return data
             elif response.status_code == 404:
                 # Special handling for 404 errors
-                self.status_update.emit(f"Status check failed: HTTP 404 - Message ID '{text_id}' not found.")
-                self.status_update.emit("Note: According to TextBelt documentation, status checks are only available for messages sent in the last 24-48 hours.")
+                self._emit(WARNING, "status_failed",
+                           "Status check failed: HTTP 404 - Message ID '{text_id}' not found.\n"
+                           "Note: According to TextBelt documentation, status checks are only available "
+                           "for messages sent in the last 24-48 hours.",
+                           text_id=text_id, status_code=404)
                 
                 # Try a test request to see if the endpoint is working at all
-                self.status_update.emit("Testing status endpoint availability...")
-                test_response = requests.get("https://textbelt.com/status", params={'key': self.api_key})
-                self.status_update.emit(f"Test response status: {test_response.status_code}")
+                test_response = self.session.get(self.status_url, params={'key': self.api_key}, timeout=self.request_timeout)
+                self._emit(DEBUG, "status_endpoint_test", "Status endpoint test response: HTTP {status_code}",
+                           status_code=test_response.status_code)
                 
                 return None
             else:
-                self.status_update.emit(f"Status check failed: HTTP {response.status_code}")
-                self.status_update.emit(f"Response body: {response.text}")
+                self._emit(WARNING, "status_failed", "Status check failed: HTTP {status_code}\nResponse body: {body}",
+                           text_id=text_id, status_code=response.status_code, body=response.text)
                 return None
                 
         except Exception as e:
-            self.status_update.emit(f"Error checking message status: {str(e)}")
-            import traceback
-            self.status_update.emit(f"Traceback: {traceback.format_exc()}")
+            self._emit(ERROR, "status_error", "Error checking message status: {error}", error=str(e))
+            if self.is_enabled(DEBUG):
+                import traceback
+                self._emit(DEBUG, "traceback", "Traceback: {traceback}", traceback=traceback.format_exc())
             return None
     
     def check_all_pending_messages(self):
         """Check the status of all pending messages."""
-        for message in self.message_history:
+        with self._lock:
+            messages = list(self.message_history)
+        for message in messages:
             if message.text_id and message.status not in ["DELIVERED", "FAILED"]:
                 self.check_message_status(message.text_id)
                 # Add a small delay to avoid rate limiting
@@ -358,7 +535,9 @@ class SMSSender(QObject):
         Returns:
             List of message dictionaries
         """
-        return [message.to_dict() for message in self.message_history]
+        with self._lock:
+            messages = list(self.message_history)
+        return [message.to_dict() for message in messages]
     
     def test_connection(self) -> bool:
         """
@@ -368,7 +547,7 @@ class SMSSender(QObject):
             bool: True if test was successful, False otherwise
         """
         if not self.is_configured:
-            self.status_update.emit("Error: SMS sender not configured")
+            self._emit(ERROR, "config_error", "Error: SMS sender not configured")
             return False
         
         try:
@@ -376,7 +555,7 @@ class SMSSender(QObject):
             test_phone = '5555555555'
             
             # Explicitly add test flag to ensure no real message is sent
-            self.status_update.emit("Running in TEST mode - no actual message will be sent")
+            self._emit(INFO, "connection_test", "Running in TEST mode - no actual message will be sent")
             
             # Prepare test payload that won't actually send an SMS
             payload = {
@@ -387,9 +566,8 @@ class SMSSender(QObject):
             }
             
             # Make the request
-            self.status_update.emit(f"Sending test request to: {self.API_URL}")
-            self.status_update.emit(f"Test payload includes 'test' flag to prevent actual message delivery")
-            response = requests.post(self.API_URL, data=payload)
+            self._emit(DEBUG, "connection_test", "Sending test request to: {url}", url=self.api_url)
+            response = self.session.post(self.api_url, data=payload, timeout=self.request_timeout)
             
             if response.status_code == 200:
                 data = response.json()
@@ -397,25 +575,28 @@ class SMSSender(QObject):
                 if 'success' in data or 'error' in data:
                     # Success could be false if out of quota, but connection still works
                     if data.get('error'):
-                        self.status_update.emit(f"TextBelt connection test successful but returned: {data.get('error')}")
+                        self._emit(WARNING, "connection_test", "TextBelt connection test successful but returned: {error}",
+                                   error=data.get('error'))
                     else:
                         tier_type = "free" if self.is_free_tier else "paid"
-                        self.status_update.emit(f"TextBelt connection test successful! (using {tier_type} tier)")
+                        self._emit(INFO, "connection_test", "TextBelt connection test successful! (using {tier} tier)",
+                                   tier=tier_type)
                     
                     # Show quota if available
                     if 'quotaRemaining' in data:
-                        self.status_update.emit(f"Remaining quota: {data.get('quotaRemaining', 'unknown')}")
+                        self._emit(INFO, "quota", "Remaining quota: {quota}", quota=data['quotaRemaining'])
                     
                     return True
                 else:
-                    self.status_update.emit("TextBelt connection test failed: Invalid response format")
+                    self._emit(ERROR, "connection_test", "TextBelt connection test failed: Invalid response format")
                     return False
             else:
-                self.status_update.emit(f"TextBelt connection test failed: HTTP {response.status_code}")
+                self._emit(ERROR, "connection_test", "TextBelt connection test failed: HTTP {status_code}",
+                           status_code=response.status_code)
                 return False
                 
         except Exception as e:
-            self.status_update.emit(f"TextBelt connection test failed: {str(e)}")
+            self._emit(ERROR, "connection_test", "TextBelt connection test failed: {error}", error=str(e))
             return False
     
     def is_using_free_tier(self) -> bool:
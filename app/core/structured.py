@@ -0,0 +1,394 @@
+"""
+Field conditions on structured (JSON lines or logfmt) log lines.
+
+A pattern starting with "where:" is a condition on the fields of a line
+rather than a substring, for example:
+
+    where: level == ERROR and latency_ms > 2000
+    where: service == "billing" and (status >= 500 or error exists)
+    where: not env == staging and message contains "timed out"
+
+Any other pattern, including one that merely begins with the word "where", is
+a plain substring.
+
+Conditions are compiled once, when the pattern set is configured. Each one
+also yields literal prefilter strings that any line it can match must
+contain; these are searched as ordinary patterns by PatternMatcher, so only
+the few lines that pass are decoded and parsed. A JSON encoder may escape
+quotes, backslashes, slashes and non-ASCII characters, so text containing
+them is not used as a literal.
+
+Comparisons on a missing field are false. Numbers compare numerically, words
+and quoted strings compare as text, case-sensitively.
+"""
+
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from app.core.matcher import Match, PatternMatcher, decode_line
+
+RULE_PREFIX = "where:"
+
+# Prefilter for conditions with no required literal: every JSON or logfmt line contains one of these
+_STRUCTURED_MARKERS = ["{", "="]
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<number>-?\d+(?:\.\d+)?)(?![\w.])
+      | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<op>==|!=|>=|<=|>|<|\(|\))
+      | (?P<word>[A-Za-z_@$][\w.\-@$]*)
+    )""", re.VERBOSE)
+
+_LOGFMT_PAIR = re.compile(r'([^\s=]+)=("(?:[^"\\]|\\.)*"|\S*)')
+
+# Text that appears the same in a line whatever JSON or logfmt encoder wrote it
+_VERBATIM = re.compile(r'[ !#-.0-\[\]-~]*')
+
+_KEYWORDS = {"and", "or", "not", "contains", "exists"}
+_CONSTANTS = {"true": True, "false": False, "null": None}
+
+Fields = Dict[str, Any]
+Predicate = Callable[[Fields], bool]
+Value = Union[str, float, bool, None]
+
+_MISSING = object()
+
+
+def is_rule(pattern: str) -> bool:
+    """Check whether a pattern is a field condition rather than a substring."""
+    return pattern.lower().startswith(RULE_PREFIX)
+
+
+def validate_patterns(patterns: Sequence[str]) -> List[str]:
+    """
+    Check the field conditions in a pattern list without building a matcher.
+
+    Args:
+        patterns: Substrings and "where: ..." conditions
+
+    Returns:
+        List of error messages for conditions that could not be parsed
+    """
+    errors = []
+    for pattern in patterns:
+        if is_rule(pattern):
+            try:
+                FieldRule(pattern)
+            except ValueError as e:
+                errors.append(str(e))
+    return errors
+
+
+def parse_fields(line: str) -> Optional[Fields]:
+    """
+    Parse a JSON object or logfmt line into its fields.
+
+    Args:
+        line: The log line
+
+    Returns:
+        Dict of fields, or None if the line is neither JSON nor logfmt
+    """
+    text = line.strip()
+    if text.startswith("{"):
+        try:
+            fields = json.loads(text)
+        except ValueError:
+            return None
+        return fields if isinstance(fields, dict) else None
+
+    pairs = _LOGFMT_PAIR.findall(text)
+    if not pairs:
+        return None
+    return {key: _unquote(value) for key, value in pairs}
+
+
+def _unquote(value: str) -> str:
+    """Remove the quotes and escapes of a quoted logfmt or rule string."""
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return re.sub(r"\\(.)", r"\1", value[1:-1])
+    return value
+
+
+def _lookup(fields: Fields, name: str) -> Any:
+    """Get a field by name, following dots into nested objects when there is no such key."""
+    if name in fields:
+        return fields[name]
+    value: Any = fields
+    for part in name.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _compare(actual: Any, op: str, expected: Value) -> bool:
+    """Compare a field value with a rule value."""
+    if isinstance(expected, bool) or expected is None:
+        if isinstance(actual, str):
+            actual = _CONSTANTS.get(actual, actual)
+        if op == "==":
+            return actual == expected
+        if op == "!=":
+            return actual != expected
+        return False
+
+    if isinstance(expected, float):
+        if isinstance(actual, bool):
+            return False
+        try:
+            actual = float(actual)
+        except (TypeError, ValueError):
+            return False
+    elif not isinstance(actual, str):
+        actual = json.dumps(actual) if isinstance(actual, (dict, list)) else str(actual)
+
+    if op == "==":
+        return actual == expected
+    if op == "!=":
+        return actual != expected
+    if op == ">":
+        return actual > expected
+    if op == ">=":
+        return actual >= expected
+    if op == "<":
+        return actual < expected
+    if op == "<=":
+        return actual <= expected
+    return False
+
+
+class FieldRule:
+    """
+    A compiled field condition.
+    """
+
+    def __init__(self, text: str):
+        """
+        Compile a condition.
+
+        Args:
+            text: The pattern, starting with "where:"
+
+        Raises:
+            ValueError: If the condition cannot be parsed
+        """
+        self.text = text
+        self._tokens = self._tokenize(text[len(RULE_PREFIX):])
+        self._position = 0
+        if not self._tokens:
+            raise ValueError(f"Invalid condition '{text}': nothing after '{RULE_PREFIX}'")
+
+        self.predicate, literals = self._parse_or()
+        if self._position < len(self._tokens):
+            raise ValueError(f"Invalid condition '{text}': unexpected '{self._tokens[self._position][1]}'")
+        self.literals = literals or list(_STRUCTURED_MARKERS)
+        del self._tokens
+
+    def matches(self, fields: Fields) -> bool:
+        """Check whether parsed fields satisfy the condition."""
+        return self.predicate(fields)
+
+    def _tokenize(self, text: str) -> List[tuple]:
+        tokens = []
+        position = 0
+        text = text.rstrip()
+        while position < len(text):
+            match = _TOKEN.match(text, position)
+            if not match:
+                raise ValueError(f"Invalid condition '{self.text}' at '{text[position:].strip()}'")
+            kind = match.lastgroup
+            value = match.group(kind)
+            if kind == "word" and value.lower() in _KEYWORDS:
+                kind, value = "keyword", value.lower()
+            tokens.append((kind, value))
+            position = match.end()
+        return tokens
+
+    def _peek(self, kind: str, value: Optional[str] = None) -> bool:
+        if self._position >= len(self._tokens):
+            return False
+        token_kind, token_value = self._tokens[self._position]
+        return token_kind == kind and (value is None or token_value == value)
+
+    def _take(self, kind: str, value: Optional[str] = None) -> str:
+        if not self._peek(kind, value):
+            found = self._tokens[self._position][1] if self._position < len(self._tokens) else "end of condition"
+            raise ValueError(f"Invalid condition '{self.text}': expected {value or kind}, found '{found}'")
+        self._position += 1
+        return self._tokens[self._position - 1][1]
+
+    def _parse_or(self):
+        predicate, literals = self._parse_and()
+        branches = [predicate]
+        alternatives: Optional[List[str]] = literals
+        while self._peek("keyword", "or"):
+            self._position += 1
+            predicate, literals = self._parse_and()
+            branches.append(predicate)
+            # Any branch can match, so the prefilter needs a literal from every one
+            alternatives = alternatives + literals if alternatives is not None and literals is not None else None
+
+        if len(branches) == 1:
+            return branches[0], alternatives
+        return (lambda fields: any(branch(fields) for branch in branches)), alternatives
+
+    def _parse_and(self):
+        predicate, literals = self._parse_not()
+        branches = [predicate]
+        best = literals
+        while self._peek("keyword", "and"):
+            self._position += 1
+            predicate, literals = self._parse_not()
+            branches.append(predicate)
+            # Every branch must match, so the most selective one is enough
+            if literals is not None and (best is None or _selectivity(literals) > _selectivity(best)):
+                best = literals
+
+        if len(branches) == 1:
+            return branches[0], best
+        return (lambda fields: all(branch(fields) for branch in branches)), best
+
+    def _parse_not(self):
+        if self._peek("keyword", "not"):
+            self._position += 1
+            predicate, _ = self._parse_not()
+            return (lambda fields: not predicate(fields)), None
+        return self._parse_primary()
+
+    def _parse_primary(self):
+        if self._peek("op", "("):
+            self._position += 1
+            result = self._parse_or()
+            self._take("op", ")")
+            return result
+
+        name = self._take("word")
+        key = name.rsplit(".", 1)[-1]
+
+        if self._peek("keyword", "exists") or not (self._peek("op") or self._peek("keyword", "contains")):
+            if self._peek("keyword", "exists"):
+                self._position += 1
+            return (lambda fields: _lookup(fields, name) is not _MISSING), _literal(key)
+
+        if self._peek("keyword", "contains"):
+            self._position += 1
+            needle = str(self._parse_value())
+
+            def contains(fields: Fields) -> bool:
+                value = _lookup(fields, name)
+                return value is not _MISSING and needle in (value if isinstance(value, str) else str(value))
+            return contains, _literal(needle) or _literal(key)
+
+        op = self._take("op")
+        if op in "()":
+            raise ValueError(f"Invalid condition '{self.text}': expected a comparison after '{name}'")
+        expected = self._parse_value()
+
+        def compare(fields: Fields) -> bool:
+            value = _lookup(fields, name)
+            return value is not _MISSING and _compare(value, op, expected)
+
+        literals = _literal(expected) if op == "==" and isinstance(expected, str) else None
+        return compare, literals or _literal(key)
+
+    def _parse_value(self) -> Value:
+        if self._peek("number"):
+            return float(self._take("number"))
+        if self._peek("string"):
+            return _unquote(self._take("string"))
+        if not self._peek("word"):
+            found = self._tokens[self._position][1] if self._position < len(self._tokens) else "end of condition"
+            raise ValueError(f"Invalid condition '{self.text}': expected a value, found '{found}'")
+        word = self._take("word")
+        return _CONSTANTS.get(word.lower(), word)
+
+
+def _literal(text: str) -> Optional[List[str]]:
+    """Get text as a prefilter literal, or None if it is empty or may be escaped in the line."""
+    if not text or not _VERBATIM.fullmatch(text):
+        return None
+    return [text]
+
+
+def _selectivity(literals: List[str]) -> tuple:
+    """Rank prefilter alternatives, fewer and longer literals let fewer lines through."""
+    return (-len(literals), min(len(literal) for literal in literals))
+
+
+class PatternSet:
+    """
+    A configured list of patterns, each a substring or a field condition.
+
+    The matcher searches the substrings and the conditions' prefilter
+    literals. resolve turns its hits back into indices of the configured
+    patterns, parsing a line only when a condition needs it.
+    """
+
+    def __init__(self, patterns: Sequence[str]):
+        """
+        Compile the patterns.
+
+        Args:
+            patterns: Substrings and "where: ..." conditions
+
+        Raises:
+            ValueError: If a condition cannot be parsed
+        """
+        self.patterns = list(patterns)
+        self.rules: Dict[int, FieldRule] = {}
+        self.literals: List[str] = []
+        self._owners: List[int] = []  # literal index -> pattern index
+
+        for index, pattern in enumerate(self.patterns):
+            if is_rule(pattern):
+                rule = self.rules[index] = FieldRule(pattern)
+                literals = rule.literals
+            else:
+                literals = [pattern]
+            self.literals.extend(literals)
+            self._owners.extend([index] * len(literals))
+
+        self.matcher = PatternMatcher(self.literals)
+
+    @property
+    def has_rules(self) -> bool:
+        """Check whether any pattern is a field condition."""
+        return bool(self.rules)
+
+    def resolve(self, data, matches: List[Match]) -> List[Match]:
+        """
+        Convert matcher hits to hits of the configured patterns.
+
+        Args:
+            data: The buffer that was scanned
+            matches: Matches from a scan with the literals
+
+        Returns:
+            Matches whose indices refer to self.patterns
+        """
+        if not self.rules:
+            return matches
+
+        resolved = []
+        for start, end, indices in matches:
+            pattern_indices = []
+            checked = set()
+            fields: Any = _MISSING
+            for index in indices:
+                owner = self._owners[index]
+                if owner in checked:
+                    continue
+                checked.add(owner)
+                rule = self.rules.get(owner)
+                if rule is not None:
+                    if fields is _MISSING:
+                        fields = parse_fields(decode_line(data, start, end))
+                    if fields is None or not rule.matches(fields):
+                        continue
+                pattern_indices.append(owner)
+            if pattern_indices:
+                resolved.append((start, end, sorted(pattern_indices)))
+        return resolved
@@ -0,0 +1,268 @@
+"""
+Alert message templates, sized for the provider they are sent through.
+
+A template such as
+
+    [{host}] '{pattern}' x{count} in {file}: {line}
+
+is compiled once into literal text and placeholders, so rendering an alert is
+a join. When the rendered message is too long for its provider, the elastic
+placeholder (the matched line, by default) is shortened and ends with "...",
+keeping the rest of the template intact.
+
+SMS length is counted the way phones and gateways count it: in GSM-7 septets,
+where a few characters such as "{" or "€" take two, or in UTF-16 units when any
+character is outside GSM-7, which cuts a segment from 160 to 70 characters.
+"""
+
+import string
+from typing import Callable, Dict, List, Optional, Tuple
+
+PLACEHOLDERS = ("pattern", "line", "file", "host", "count", "time", "message")
+
+DEFAULT_TEMPLATE = "Alert! Pattern Detected: '{pattern}'\nIn: {line}"
+# Rate and absence alerts already describe themselves
+EVENT_TEMPLATE = "{message}"
+
+DISCORD_MAX_LENGTH = 2000
+
+# Characters of the GSM 03.38 default alphabet, and of its extension table, which cost two septets
+GSM7_BASIC = frozenset(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+GSM7_EXTENDED = frozenset("^{}\\[~]|€\f")
+
+# Units per SMS, for one segment and per segment of a concatenated message
+GSM7_SINGLE, GSM7_CONCATENATED = 160, 153
+UCS2_SINGLE, UCS2_CONCATENATED = 70, 67
+
+ELLIPSIS = "..."
+
+
+def is_gsm7(text: str) -> bool:
+    """Check whether text can be sent in the GSM-7 alphabet."""
+    return all(char in GSM7_BASIC or char in GSM7_EXTENDED for char in text)
+
+
+def sms_length(text: str) -> Tuple[str, int]:
+    """
+    Measure text as an SMS.
+
+    Returns:
+        Tuple of the encoding ("gsm7" or "ucs2") and the length in septets or UTF-16 units
+    """
+    if is_gsm7(text):
+        return "gsm7", len(text) + sum(1 for char in text if char in GSM7_EXTENDED)
+    return "ucs2", len(text) + sum(1 for char in text if ord(char) > 0xFFFF)
+
+
+def sms_segments(text: str) -> int:
+    """Get the number of SMS segments text is sent as."""
+    encoding, length = sms_length(text)
+    single, concatenated = (GSM7_SINGLE, GSM7_CONCATENATED) if encoding == "gsm7" else (UCS2_SINGLE, UCS2_CONCATENATED)
+    if length <= single:
+        return 1
+    return -(-length // concatenated)
+
+
+def _gsm7_cost(char: str) -> int:
+    return 2 if char in GSM7_EXTENDED else 1
+
+
+def _ucs2_cost(char: str) -> int:
+    return 2 if ord(char) > 0xFFFF else 1
+
+
+class MessageLimit:
+    """
+    How much text one message of a provider can hold.
+    """
+
+    def plan(self, text: str) -> Tuple[int, Callable[[str], int]]:
+        """
+        Get the room for a message like text.
+
+        Returns:
+            Tuple of the units available and the cost of a character in units
+        """
+        raise NotImplementedError
+
+    def fits(self, text: str) -> bool:
+        """Check whether text fits in one message."""
+        room, cost = self.plan(text)
+        return sum(cost(char) for char in text) <= room
+
+    def truncate(self, text: str) -> str:
+        """Cut text to fit, ending it with an ellipsis when anything was cut."""
+        room, cost = self.plan(text)
+        return cut(text, room, cost)
+
+
+class LengthLimit(MessageLimit):
+    """
+    A limit in characters, e.g. Discord's 2000.
+    """
+
+    def __init__(self, max_length: int):
+        """Initialize the limit."""
+        self.max_length = max_length
+
+    def plan(self, text: str) -> Tuple[int, Callable[[str], int]]:
+        return self.max_length, _one
+
+    def fits(self, text: str) -> bool:
+        return len(text) <= self.max_length
+
+
+class SMSLimit(MessageLimit):
+    """
+    A limit in SMS segments, counted in GSM-7 septets or UCS-2 units.
+    """
+
+    def __init__(self, max_segments: int = 2):
+        """
+        Initialize the limit.
+
+        Args:
+            max_segments: Segments one alert may use; each is billed as a message
+        """
+        self.max_segments = max(1, max_segments)
+
+    def plan(self, text: str) -> Tuple[int, Callable[[str], int]]:
+        if is_gsm7(text):
+            single, concatenated, cost = GSM7_SINGLE, GSM7_CONCATENATED, _gsm7_cost
+        else:
+            single, concatenated, cost = UCS2_SINGLE, UCS2_CONCATENATED, _ucs2_cost
+        return (single if self.max_segments == 1 else concatenated * self.max_segments), cost
+
+    def fits(self, text: str) -> bool:
+        return sms_segments(text) <= self.max_segments
+
+
+def _one(char: str) -> int:
+    return 1
+
+
+def cut(text: str, room: int, cost: Callable[[str], int]) -> str:
+    """
+    Shorten text to at most room units, ending it with an ellipsis when anything was cut.
+
+    Args:
+        text: The text
+        room: Units available
+        cost: Cost of a character in units
+
+    Returns:
+        The text, or its shortened form
+    """
+    used = 0
+    for char in text:
+        used += cost(char)
+        if used > room:
+            break
+    else:
+        return text
+
+    room -= len(ELLIPSIS)
+    used = 0
+    for index, char in enumerate(text):
+        used += cost(char)
+        if used > room:
+            return text[:index].rstrip() + ELLIPSIS
+    return text + ELLIPSIS
+
+
+# Message limits by provider name; providers not listed are sent as rendered
+MESSAGE_LIMITS: Dict[str, MessageLimit] = {
+    "sms": SMSLimit(2),
+    "discord": LengthLimit(DISCORD_MAX_LENGTH),
+}
+
+
+class AlertTemplate:
+    """
+    A compiled alert template.
+
+    Placeholders are {pattern}, {line}, {file}, {host}, {count}, {time} and
+    {message}. Write {{ and }} for literal braces.
+    """
+
+    def __init__(self, text: str, elastic: str = "line"):
+        """
+        Compile a template.
+
+        Args:
+            text: The template text
+            elastic: The placeholder shortened when a message is too long
+
+        Raises:
+            ValueError: If the template is malformed or uses an unknown placeholder
+        """
+        self.text = text
+        self.elastic = elastic
+        self._parts: List[Tuple[str, Optional[str]]] = []  # (literal text, placeholder or None)
+        try:
+            parsed = list(string.Formatter().parse(text))
+        except ValueError as e:
+            raise ValueError(f"Invalid alert template '{text}': {e}")
+
+        for literal, name, format_spec, conversion in parsed:
+            if name is not None:
+                if name not in PLACEHOLDERS:
+                    raise ValueError(f"Invalid alert template '{text}': unknown placeholder {{{name}}} "
+                                     f"(use: {', '.join('{' + placeholder + '}' for placeholder in PLACEHOLDERS)})")
+                if format_spec or conversion:
+                    raise ValueError(f"Invalid alert template '{text}': placeholders take no format, write {{{name}}}")
+            self._parts.append((literal, name))
+
+    def with_prefix(self, prefix: str) -> 'AlertTemplate':
+        """Get a copy of the template starting with literal text, e.g. the custom message."""
+        template = AlertTemplate.__new__(AlertTemplate)
+        template.text = prefix + self.text
+        template.elastic = self.elastic
+        template._parts = [(prefix, None)] + self._parts
+        return template
+
+    def render(self, values: Dict[str, object], limit: Optional[MessageLimit] = None) -> str:
+        """
+        Render an alert.
+
+        Args:
+            values: Placeholder values; missing ones render empty
+            limit: The provider's message limit, or None to render in full
+
+        Returns:
+            The message, shortened to fit limit
+        """
+        text = self._render(values)
+        if limit is None or limit.fits(text):
+            return text
+
+        occurrences = sum(1 for _, name in self._parts if name == self.elastic)
+        if occurrences:
+            room, cost = limit.plan(text)
+            fixed = self._render(dict(values, **{self.elastic: ""}))
+            share = (room - sum(cost(char) for char in fixed)) // occurrences
+            if share > len(ELLIPSIS):
+                elastic = cut(str(values.get(self.elastic, "")), share, cost)
+                text = self._render(dict(values, **{self.elastic: elastic}))
+                if limit.fits(text):
+                    return text
+
+        # The rest of the template is too long by itself
+        return limit.truncate(text)
+
+    def _render(self, values: Dict[str, object]) -> str:
+        return "".join(
+            literal if name is None else literal + str(values.get(name, ""))
+            for literal, name in self._parts
+        )
+
+
+def fit_message(provider: str, message: str) -> str:
+    """Cut a message to the limit of its provider, if it has one."""
+    limit = MESSAGE_LIMITS.get(provider)
+    if limit is None or limit.fits(message):
+        return message
+    return limit.truncate(message)
@@ -0,0 +1,229 @@
+"""
+Asynchronous TextBelt client.
+
+SMSSender sends one request at a time on a requests session, and each
+concurrent send needs a thread. This client runs on an asyncio event loop,
+such as the one MessageService shares with the Discord bot, so thousands of
+sends can be in flight from one thread.
+
+Connections are pooled and kept alive between requests. The
+number of requests in flight is capped, further sends wait for a free slot,
+and the pool has its own connection limit.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from app.core.providers import ProviderResult
+from app.core.recipients import RecipientRegistry
+from app.core.sms_sender import SMS_REQUEST_SECONDS, SMS_SENT, SMS_STATUS_CHECKS
+from app.core.tracing import TRACER
+
+logger = logging.getLogger(__name__)
+
+API_URL = "https://textbelt.com/text"
+STATUS_URL = "https://textbelt.com/status"
+
+
+class AsyncTextBeltClient:
+    """
+    Sends SMS and checks their delivery status through the TextBelt HTTP API.
+
+    Methods are coroutines. The client belongs to the event loop it is first
+    used on until it is closed; awaiting it on another loop in the meantime
+    raises RuntimeError, since its connections cannot be used or closed there.
+    """
+
+    def __init__(self,
+                 api_key: str = "textbelt",
+                 api_url: Optional[str] = None,
+                 status_url: Optional[str] = None,
+                 request_timeout: float = 10.0,
+                 max_connections: int = 100,
+                 max_concurrency: int = 50,
+                 registry: Optional[RecipientRegistry] = None):
+        """
+        Initialize the client.
+
+        Args:
+            api_key: TextBelt API key ("textbelt" for the free tier)
+            api_url: TextBelt send endpoint, defaults to API_URL
+            status_url: TextBelt status endpoint, defaults to STATUS_URL
+            request_timeout: Seconds to wait for a TextBelt response
+            max_connections: Connections kept open to TextBelt at most
+            max_concurrency: Requests in flight at most, further sends wait
+            registry: Registry to look phone numbers up in, e.g. an SMSSender's
+        """
+        self.api_key = api_key
+        self.api_url = api_url or API_URL
+        self.status_url = status_url or STATUS_URL
+        self.request_timeout = request_timeout
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.registry = registry or RecipientRegistry()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._traces: Dict[str, str] = {}  # text_id -> trace ID, while tracing waits for delivery
+
+    def _connection(self) -> aiohttp.ClientSession:
+        """Get the session, creating it on first use after the client was created or closed."""
+        loop = asyncio.get_running_loop()
+        if self._session is not None and not self._session.closed and self._loop is not loop:
+            raise RuntimeError("AsyncTextBeltClient is in use on another event loop; close it there first")
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._session
+
+    async def send(self, recipient: str, message: str, trace_id: Optional[str] = None) -> ProviderResult:
+        """
+        Send an SMS to one recipient.
+
+        Network errors and TextBelt errors are returned as a failed result
+        rather than raised, retryable when sending again later could succeed.
+
+        Args:
+            recipient: The phone number to send to
+            message: The message content to send
+            trace_id: Correlation ID for tracing, defaults to the current trace
+
+        Returns:
+            ProviderResult: The outcome, with TextBelt's text ID as message ID
+        """
+        formatted_number, error = self.registry.resolve(recipient)
+        if formatted_number is None:
+            SMS_SENT.labels("invalid").inc()
+            return ProviderResult(recipient, False, error=error, retryable=False)
+
+        trace_id = trace_id or TRACER.current_trace_id()
+        payload = {
+            'phone': formatted_number,
+            'message': message,
+            'key': self.api_key
+        }
+
+        session = self._connection()
+        async with self._semaphore:
+            started = time.perf_counter()
+            sent_at = time.time()
+            try:
+                async with session.post(self.api_url, data=payload) as response:
+                    status_code = response.status
+                    try:
+                        data = await response.json(content_type=None)
+                    except ValueError:
+                        data = {"success": False, "error": "Failed to parse response"}
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                SMS_REQUEST_SECONDS.observe(time.perf_counter() - started)
+                TRACER.record(trace_id, "send", sent_at, time.time(), recipient=recipient, error=str(e) or "timeout")
+                SMS_SENT.labels("error").inc()
+                logger.error(f"Failed to send SMS to {recipient}: {str(e) or 'timeout'}")
+                return ProviderResult(recipient, False, error=str(e) or "Request timed out")
+
+        SMS_REQUEST_SECONDS.observe(time.perf_counter() - started)
+        TRACER.record(trace_id, "send", sent_at, time.time(), recipient=recipient, status_code=status_code)
+
+        if data.get('success'):
+            text_id = data.get('textId')
+            SMS_SENT.labels("sent").inc()
+            TRACER.start_span(trace_id, "confirm", str(text_id), recipient=recipient)
+            if trace_id and TRACER.enabled:
+                if len(self._traces) >= TRACER.max_open_spans:
+                    self._traces.pop(next(iter(self._traces)))
+                self._traces[str(text_id)] = trace_id
+            return ProviderResult(recipient, True, message_id=str(text_id) if text_id is not None else None)
+
+        error = data.get('error', 'Unknown error')
+        SMS_SENT.labels("failed").inc()
+        logger.error(f"Failed to send SMS to {recipient}: {error}")
+        # Server errors, rate limiting and exhausted quota may clear up; other rejections will not
+        retryable = status_code >= 500 or status_code == 429 or "quota" in error.lower()
+        return ProviderResult(recipient, False, error=error, retryable=retryable)
+
+    async def send_batch(self, recipients: List[str], message: str,
+                         trace_id: Optional[str] = None) -> List[ProviderResult]:
+        """
+        Send the same SMS to several recipients concurrently, up to max_concurrency at a time.
+
+        Returns:
+            List of results, in the order of recipients
+        """
+        return list(await asyncio.gather(*(self.send(recipient, message, trace_id) for recipient in recipients)))
+
+    async def status(self, text_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Check the delivery status of a message.
+
+        Args:
+            text_id: The text ID returned by send
+
+        Returns:
+            Dict containing the status information, or None if the check failed
+        """
+        session = self._connection()
+        SMS_STATUS_CHECKS.inc()
+        async with self._semaphore:
+            try:
+                async with session.get(self.status_url, params={'textId': text_id, 'key': self.api_key}) as response:
+                    if response.status != 200:
+                        logger.warning(f"Status check for {text_id} failed: HTTP {response.status}")
+                        return None
+                    data = await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                logger.error(f"Error checking message status: {str(e) or 'timeout'}")
+                return None
+
+        if data.get('status') == 'DELIVERED':
+            TRACER.end_span(self._traces.pop(str(text_id), ""), "confirm", str(text_id))
+        elif data.get('status') == 'FAILED':
+            self._traces.pop(str(text_id), None)
+        return data
+
+    async def test_connection(self) -> bool:
+        """
+        Test the TextBelt connection with a request in test mode, which sends no SMS.
+
+        Returns:
+            bool: True if TextBelt answered, even if it reported a problem such as quota
+        """
+        payload = {
+            'phone': '5555555555',
+            'message': 'Test connection',
+            'key': self.api_key,
+            'test': '1'
+        }
+        session = self._connection()
+        async with self._semaphore:
+            try:
+                async with session.post(self.api_url, data=payload) as response:
+                    if response.status != 200:
+                        logger.error(f"TextBelt connection test failed: HTTP {response.status}")
+                        return False
+                    data = await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                logger.error(f"TextBelt connection test failed: {str(e) or 'timeout'}")
+                return False
+
+        if 'success' not in data and 'error' not in data:
+            logger.error("TextBelt connection test failed: Invalid response format")
+            return False
+        if data.get('error'):
+            logger.warning(f"TextBelt connection test successful but returned: {data['error']}")
+        return True
+
+    async def close(self):
+        """Close the pooled connections, on the event loop the client was used on."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
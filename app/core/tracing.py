@@ -0,0 +1,301 @@
+"""
+Per-stage latency tracing from log write to SMS delivery.
+
+Each detected match gets a trace ID, which becomes the alert ID and the
+SMSMessage trace_id, so every stage of one alert shares a correlation ID:
+
+    detect   - last write to the log file (its mtime) until the new data was read
+    match    - new data read until the matching line was found
+    dispatch - alert queued until a dispatcher worker picked it up
+    send     - the TextBelt HTTP POST
+    confirm  - message sent until its status check reported DELIVERED
+
+Tracing is off by default and costs one attribute check per read when off.
+Spans can be written to a JSON lines file and summarized as per-stage
+percentiles, either in the application or from a saved file:
+
+    python -m app.core.tracing traces.jsonl
+"""
+
+import argparse
+import contextvars
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STAGES = ["detect", "match", "dispatch", "send", "confirm"]
+
+# Trace of the work currently running in this thread, so callees such as
+# SMSSender.send_single can pick it up without it being passed through
+_current_trace = contextvars.ContextVar("current_trace", default="")
+
+
+class Span:
+    """
+    A timed stage of one trace.
+    """
+
+    __slots__ = ("trace_id", "stage", "start", "end", "attributes")
+
+    def __init__(self, trace_id: str, stage: str, start: float, end: float, attributes: Dict[str, Any]):
+        """Initialize the span. Times are seconds since the epoch."""
+        self.trace_id = trace_id
+        self.stage = stage
+        self.start = start
+        self.end = end
+        self.attributes = attributes
+
+    @property
+    def duration(self) -> float:
+        """Get the span duration in seconds."""
+        return self.end - self.start
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the span to a dictionary."""
+        return {
+            "trace_id": self.trace_id,
+            "stage": self.stage,
+            "start": self.start,
+            "end": self.end,
+            "duration": self.duration,
+            "attributes": self.attributes
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Span':
+        """Create a span from a dictionary."""
+        return cls(data["trace_id"], data["stage"], data["start"], data["end"], data.get("attributes", {}))
+
+
+class Tracer:
+    """
+    Collects spans in memory, keeping the most recent ones.
+
+    A span is either recorded in one call when both ends are known, or opened
+    with start_span and closed with end_span when it starts and ends in
+    different places (e.g. queued in one thread, picked up in another).
+    """
+
+    def __init__(self, max_spans: int = 100000, max_open_spans: int = 10000):
+        """
+        Initialize the tracer.
+
+        Args:
+            max_spans: Number of finished spans kept, oldest are discarded first
+            max_open_spans: Number of unfinished spans kept, e.g. messages never confirmed
+        """
+        self.enabled = False
+        self.spans = deque(maxlen=max_spans)
+        self.max_open_spans = max_open_spans
+        self._open: Dict[tuple, tuple] = {}  # (trace_id, stage, key) -> (start, attributes)
+        self._lock = threading.Lock()
+
+    def enable(self, enabled: bool = True):
+        """Turn tracing on or off."""
+        self.enabled = enabled
+
+    def new_trace_id(self) -> str:
+        """Get a new trace ID, or an empty string when tracing is off."""
+        return uuid.uuid4().hex if self.enabled else ""
+
+    def record(self, trace_id: str, stage: str, start: float, end: float, **attributes):
+        """
+        Record a finished span.
+
+        Args:
+            trace_id: Correlation ID, nothing is recorded if it is empty
+            stage: Stage name, see STAGES
+            start: Start time, seconds since the epoch
+            end: End time, seconds since the epoch
+            attributes: Extra details, e.g. the recipient
+        """
+        if not trace_id or not self.enabled:
+            return
+        self.spans.append(Span(trace_id, stage, start, end, attributes))
+
+    @contextmanager
+    def span(self, trace_id: str, stage: str, **attributes) -> Iterator[None]:
+        """Record the time spent in a with block as a span."""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.record(trace_id, stage, start, time.time(), **attributes)
+
+    def start_span(self, trace_id: str, stage: str, key: str = "", start: Optional[float] = None, **attributes):
+        """
+        Open a span to be closed later with end_span.
+
+        Args:
+            trace_id: Correlation ID, nothing is recorded if it is empty
+            stage: Stage name
+            key: Distinguishes several spans of one stage, e.g. per recipient
+            start: Start time, defaults to now
+            attributes: Extra details
+        """
+        if not trace_id or not self.enabled:
+            return
+        with self._lock:
+            if len(self._open) >= self.max_open_spans:
+                # Forget the oldest unfinished span
+                self._open.pop(next(iter(self._open)))
+            self._open[(trace_id, stage, key)] = (time.time() if start is None else start, attributes)
+
+    def end_span(self, trace_id: str, stage: str, key: str = "", **attributes):
+        """
+        Close a span opened with start_span. Does nothing if it is not open.
+
+        Args:
+            trace_id: Correlation ID
+            stage: Stage name
+            key: The key given to start_span
+            attributes: Extra details, added to those given to start_span
+        """
+        if not trace_id or not self.enabled:
+            return
+        with self._lock:
+            opened = self._open.pop((trace_id, stage, key), None)
+        if opened:
+            start, start_attributes = opened
+            self.record(trace_id, stage, start, time.time(), **dict(start_attributes, **attributes))
+
+    @contextmanager
+    def activate(self, trace_id: str) -> Iterator[None]:
+        """Make a trace the current one for the duration of a with block."""
+        token = _current_trace.set(trace_id)
+        try:
+            yield
+        finally:
+            _current_trace.reset(token)
+
+    @staticmethod
+    def current_trace_id() -> str:
+        """Get the trace made current with activate, or an empty string."""
+        return _current_trace.get()
+
+    def get_spans(self) -> List[Span]:
+        """Get a copy of the finished spans."""
+        return list(self.spans)
+
+    def clear(self):
+        """Discard all spans."""
+        with self._lock:
+            self.spans.clear()
+            self._open.clear()
+
+    def export(self, path: str) -> int:
+        """
+        Append the finished spans to a JSON lines file and discard them.
+
+        Args:
+            path: File to append to
+
+        Returns:
+            int: Number of spans written
+        """
+        spans = []
+        while self.spans:
+            try:
+                spans.append(self.spans.popleft())
+            except IndexError:
+                break
+
+        with open(path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict()) + "\n")
+        return len(spans)
+
+    def summary(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Summarize the finished spans per stage, see summarize."""
+        return summarize(self.get_spans())
+
+
+# Shared tracer used by the instrumented modules
+TRACER = Tracer()
+
+
+def load_spans(path: str) -> List[Span]:
+    """Load spans from a JSON lines file written by Tracer.export."""
+    spans = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                spans.append(Span.from_dict(json.loads(line)))
+    return spans
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    """Get a percentile of sorted values using linear interpolation."""
+    position = (len(ordered) - 1) * pct / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(spans: List[Span]) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Summarize span durations per stage, plus the end-to-end time of each trace.
+
+    Args:
+        spans: Spans to summarize
+
+    Returns:
+        Dict mapping stage name (and "total") to count and p50/p90/p99/max in milliseconds
+    """
+    durations: Dict[str, List[float]] = {}
+    bounds: Dict[str, List[float]] = {}
+    for span in spans:
+        durations.setdefault(span.stage, []).append(span.duration)
+        trace_bounds = bounds.setdefault(span.trace_id, [span.start, span.end])
+        trace_bounds[0] = min(trace_bounds[0], span.start)
+        trace_bounds[1] = max(trace_bounds[1], span.end)
+    durations["total"] = [end - start for start, end in bounds.values()]
+
+    report = {}
+    stages = [stage for stage in STAGES if stage in durations]
+    stages += sorted(stage for stage in durations if stage not in STAGES and stage != "total")
+    for stage in stages + ["total"]:
+        ordered = sorted(durations[stage])
+        if not ordered:
+            continue
+        report[stage] = {
+            "count": len(ordered),
+            "p50_ms": round(_percentile(ordered, 50) * 1000.0, 3),
+            "p90_ms": round(_percentile(ordered, 90) * 1000.0, 3),
+            "p99_ms": round(_percentile(ordered, 99) * 1000.0, 3),
+            "max_ms": round(ordered[-1] * 1000.0, 3),
+        }
+    return report
+
+
+def format_summary(report: Dict[str, Dict[str, Optional[float]]]) -> str:
+    """Format a summary as a text table."""
+    lines = [f"{'stage':<10} {'count':>8} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'max ms':>10}"]
+    for stage, stats in report.items():
+        lines.append(
+            f"{stage:<10} {stats['count']:>8} {stats['p50_ms']:>10.3f} {stats['p90_ms']:>10.3f} "
+            f"{stats['p99_ms']:>10.3f} {stats['max_ms']:>10.3f}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    """Print the per-stage latency report of a trace file."""
+    parser = argparse.ArgumentParser(description="Per-stage latency report from a trace file")
+    parser.add_argument("path", help="JSON lines file written by the tracer")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = summarize(load_spans(args.path))
+    print(json.dumps(report, indent=2) if args.json else format_summary(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,12 @@ from PyQt5.QtGui import QIcon, QPixmap, QCloseEvent, QFont
 
 from app.core.file_monitor import FileMonitor
 from app.core.sms_sender import SMSSender
+from app.core.alert_dispatcher import AlertDispatcher
+from app.core.escalation import EscalationEngine
+from app.core.providers import TextBeltProvider
+from app.core.message_service import MessageService
+from app.core.oncall import RecipientDirectory
+from app.core.profiler import PROFILER
 from app.utils.config import Config
 from app.ui.monitor_tab import MonitorTab
 from app.ui.settings_tab import SettingsTab
@@ -23,13 +29,36 @@ from app.ui.styles import get_stylesheet
 class MainWindow(QMainWindow):
     """Main application window for the Fast SMS Alert System."""
     
-    def __init__(self):
-        """Initialize the main window."""
+    def __init__(self, message_service: Optional[MessageService] = None):
+        """
+        Initialize the main window.
+        
+        Args:
+            message_service: Optional message service providing additional alert providers
+        """
         super().__init__()
+        self.message_service = message_service
         
         # Set up core components
         self.file_monitor = FileMonitor()
-        self.sms_sender = SMSSender()
+        sms_config = self.message_service.config.get('sms_config', {}) if self.message_service else {}
+        self.sms_sender = SMSSender(**sms_config)
+        self.alert_dispatcher = AlertDispatcher()
+        self.recipient_directory = RecipientDirectory()
+        self.escalation_engine = EscalationEngine(self.alert_dispatcher, self.recipient_directory)
+        sms_provider = TextBeltProvider(sms_sender=self.sms_sender, **sms_config)
+        self.sms_sender.sms_status_updated.connect(self.escalation_engine.handle_status)
+        if self.message_service:
+            if "sms" in self.message_service.providers:
+                # The service sends SMS through the sender the settings configure
+                self.message_service.add_provider(sms_provider)
+            # Alerts are sent on the service's event loop, SMS with its pooled async client
+            for provider in self.message_service.providers.values():
+                self.alert_dispatcher.register_provider(provider, self.message_service.loop)
+                self.escalation_engine.register_provider(provider)
+        if not self.alert_dispatcher.has_sender("sms"):
+            self.alert_dispatcher.register_provider(sms_provider)
+            self.escalation_engine.register_provider(sms_provider)
         self.config = Config()
         
         # Set window properties
@@ -48,6 +77,10 @@ class MainWindow(QMainWindow):
         
         # Connect signals
         self.connect_signals()
+        
+        # Start delivering alerts, including any left queued by a previous run
+        self.alert_dispatcher.start()
+        self.escalation_engine.start()
     
     def create_ui(self):
         """Create the user interface."""
@@ -90,7 +123,11 @@ class MainWindow(QMainWindow):
         # Set up core components in tabs
         self.monitor_tab.set_file_monitor(self.file_monitor)
         self.monitor_tab.set_sms_sender(self.sms_sender)
+        self.monitor_tab.set_alert_dispatcher(self.alert_dispatcher)
+        self.monitor_tab.set_recipient_directory(self.recipient_directory)
+        self.monitor_tab.set_escalation_engine(self.escalation_engine)
         self.settings_tab.set_sms_sender(self.sms_sender)
+        self.settings_tab.set_recipient_directory(self.recipient_directory)
         self.history_tab.set_sms_sender(self.sms_sender)
     
     def create_menu(self):
@@ -110,6 +147,16 @@ class MainWindow(QMainWindow):
         quit_action.triggered.connect(self.close)
         file_menu.addAction(quit_action)
         
+        # Tools menu
+        tools_menu = self.menuBar().addMenu("&Tools")
+        
+        # Profiler toggle in Tools menu
+        self.profiler_action = QAction("&Profile CPU Usage", self)
+        self.profiler_action.setCheckable(True)
+        self.profiler_action.setChecked(PROFILER.running)
+        self.profiler_action.triggered.connect(self.toggle_profiler)
+        tools_menu.addAction(self.profiler_action)
+        
         # Help menu
         help_menu = self.menuBar().addMenu("&Help")
         
@@ -138,6 +185,9 @@ class MainWindow(QMainWindow):
                 sms_settings["sms_recipients"]
             )
         
+        # Compile recipient groups and on-call rotations, checked when they were saved
+        self.recipient_directory.configure_from_rules(sms_settings["recipient_groups"])
+        
         # Load and populate UI
         self.settings_tab.load_settings(sms_settings)
         
@@ -190,7 +240,8 @@ class MainWindow(QMainWindow):
         """
         self.config.save_sms_settings(
             settings["textbelt_api_key"],
-            settings["sms_recipients"]
+            settings["sms_recipients"],
+            settings["recipient_groups"]
         )
     
     def save_monitor_settings(self, settings: Dict[str, Any]):
@@ -203,7 +254,11 @@ class MainWindow(QMainWindow):
         self.config.save_monitor_settings(
             settings["last_file_path"],
             settings["patterns"],
-            settings["custom_message"]
+            settings["custom_message"],
+            settings["routing_rules"],
+            settings["scan_existing"],
+            settings["rate_rules"],
+            settings["escalation_rules"]
         )
     
     def save_ui_settings(self):
@@ -240,10 +295,28 @@ class MainWindow(QMainWindow):
         self.monitor_tab.file_path_input.clear()
         self.monitor_tab.patterns_text.clear()
         self.monitor_tab.custom_message_input.clear()
+        self.monitor_tab.routing_rules_text.clear()
+        self.monitor_tab.escalation_rules_text.clear()
+        self.monitor_tab.scan_existing_checkbox.setChecked(False)
+        self.monitor_tab.rate_rules_text.clear()
         
         # Switch to monitor tab
         self.tab_widget.setCurrentIndex(0)
     
+    def toggle_profiler(self):
+        """Start the sampling profiler, or stop it and save its output."""
+        try:
+            path = PROFILER.toggle()
+        except OSError as e:
+            self.update_status(f"Failed to save profile: {str(e)}")
+            path = None
+        
+        self.profiler_action.setChecked(PROFILER.running)
+        if PROFILER.running:
+            self.update_status("Profiler started")
+        elif path:
+            self.update_status(f"Profile saved to {path}")
+    
     def show_about(self):
         """Show the about dialog."""
         QMessageBox.about(
@@ -268,6 +341,10 @@ class MainWindow(QMainWindow):
         if self.file_monitor.running:
             self.file_monitor.stop()
         
+        # Stop delivering queued alerts
+        self.escalation_engine.stop()
+        self.alert_dispatcher.stop()
+        
         # Save UI settings
         self.save_ui_settings()
         
@@ -4,16 +4,28 @@ Monitor tab UI component.
 
 import os
 import datetime
+import socket
+import threading
 from typing import List, Dict, Any, Optional, Callable
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                             QLineEdit, QTextEdit, QPushButton, QGroupBox, 
                             QListWidget, QListWidgetItem, QSplitter, QFileDialog,
-                            QFormLayout, QSpacerItem, QSizePolicy, QMessageBox)
-from PyQt5.QtCore import Qt, pyqtSignal, QSize
+                            QFormLayout, QSpacerItem, QSizePolicy, QMessageBox, QCheckBox)
+from PyQt5.QtCore import Qt, pyqtSignal, QSize, QTimer
 from PyQt5.QtGui import QColor, QBrush, QFont
 
 from app.core.file_monitor import FileMonitor
 from app.core.sms_sender import SMSSender
+from app.core.alert_router import Alert, AlertRouter
+from app.core.alert_dispatcher import AlertDispatcher
+from app.core.events import StatusEvent
+from app.core.oncall import RecipientDirectory, default_group
+from app.core.deadlines import AbsenceTracker, AbsenceTransition, is_absence_rule
+from app.core.escalation import EscalationEngine, parse_policies
+from app.core.rate_rules import RateRuleEngine, RateTransition
+from app.core.replay import ReplayEngine, format_report
+from app.core.structured import validate_patterns
+from app.core.templates import DEFAULT_TEMPLATE, EVENT_TEMPLATE, MESSAGE_LIMITS, AlertTemplate
 
 
 class MonitorTab(QWidget):
@@ -22,13 +34,33 @@ class MonitorTab(QWidget):
     # Define signals
     settings_saved = pyqtSignal(dict)
     status_update = pyqtSignal(str)
+    replay_finished = pyqtSignal(object, str)  # ReplayResult or None, error message
     
     def __init__(self, parent=None):
         """Initialize the monitor tab."""
         super().__init__(parent)
         self.file_monitor = None
         self.sms_sender = None
+        self.alert_dispatcher = None
+        self.escalation_engine = None
+        self.alert_router = AlertRouter()
+        self.recipient_directory = RecipientDirectory()
+        self.rate_rules = RateRuleEngine()
+        self.absence_rules = AbsenceTracker()
+        self.alert_template = AlertTemplate(DEFAULT_TEMPLATE)
+        self.event_template = AlertTemplate(EVENT_TEMPLATE, elastic="message")
+        self._match_template = self.alert_template
+        self._event_template = self.event_template
+        self.match_counts: Dict[str, int] = {}
+        self.host = socket.gethostname()
+        self.replay_thread = None
         self.setup_ui()
+        self.replay_finished.connect(self.handle_replay_finished)
+        
+        # Slides the rate rule windows and checks absence deadlines
+        self.rate_timer = QTimer(self)
+        self.rate_timer.setInterval(1000)
+        self.rate_timer.timeout.connect(self.check_rules)
     
     def setup_ui(self):
         """Set up the user interface."""
@@ -62,12 +94,19 @@ class MonitorTab(QWidget):
         
         file_layout.addLayout(file_path_layout)
         
+        # Backlog scanning
+        self.scan_existing_checkbox = QCheckBox("Scan existing file content when monitoring starts")
+        self.scan_existing_checkbox.setToolTip(
+            "Match the lines already in the file, not only new ones. Large files are scanned in bulk."
+        )
+        file_layout.addWidget(self.scan_existing_checkbox)
+        
         # Pattern detection
         pattern_label = QLabel("Enter keywords or patterns to trigger alerts (one per line):")
         file_layout.addWidget(pattern_label)
         
         self.patterns_text = QTextEdit()
-        self.patterns_text.setPlaceholderText("Enter patterns here...\nExample:\nerror\nfailure\ncritical")
+        self.patterns_text.setPlaceholderText("Enter patterns here...\nExample:\nerror\nfailure\nwhere: level == ERROR and latency_ms > 2000")
         self.patterns_text.setMaximumHeight(100)
         file_layout.addWidget(self.patterns_text)
         
@@ -85,6 +124,77 @@ class MonitorTab(QWidget):
         help_text.setWordWrap(True)
         file_layout.addWidget(help_text)
         
+        # Alert routing rules
+        routing_label = QLabel("Alert routing rules (optional, one per line):")
+        file_layout.addWidget(routing_label)
+        
+        self.routing_rules_text = QTextEdit()
+        self.routing_rules_text.setPlaceholderText(
+            "priority | patterns | providers | recipients\n"
+            "Example:\n"
+            "critical | outofmemory, fatal | sms, discord | sms:+12125551234, discord:alice\n"
+            "info | retrying"
+        )
+        self.routing_rules_text.setMaximumHeight(80)
+        file_layout.addWidget(self.routing_rules_text)
+        
+        routing_help = QLabel(
+            "Priorities: critical, high, normal, info. Critical alerts are sent first when alerts queue up. "
+            "Empty providers default to SMS. With several providers, prefix each recipient with its provider. "
+            "A provider without recipients sends to everyone configured, or to its default group "
+            "('default' for SMS, e.g. 'discord-default') if there is one. "
+            "Use @name for a recipient group or on-call rotation. "
+            "Patterns without a rule use normal priority."
+        )
+        routing_help.setStyleSheet("font-size: 11px; color: #6c757d;")
+        routing_help.setWordWrap(True)
+        file_layout.addWidget(routing_help)
+        
+        # Escalation rules
+        escalation_label = QLabel("Escalation rules (optional, one per line):")
+        file_layout.addWidget(escalation_label)
+        
+        self.escalation_rules_text = QTextEdit()
+        self.escalation_rules_text.setPlaceholderText(
+            "priority | provider recipients > wait provider recipients > ...\n"
+            "Example:\n"
+            "critical | sms @primary > 5m sms @secondary > 5m discord"
+        )
+        self.escalation_rules_text.setMaximumHeight(60)
+        file_layout.addWidget(self.escalation_rules_text)
+        
+        escalation_help = QLabel(
+            "Alerts of a priority with an escalation rule go to its first step instead of their route. "
+            "If no message is confirmed delivered within the wait, the next step is sent."
+        )
+        escalation_help.setStyleSheet("font-size: 11px; color: #6c757d;")
+        escalation_help.setWordWrap(True)
+        file_layout.addWidget(escalation_help)
+        
+        # Rate rules
+        rate_label = QLabel("Rate and absence rules (optional, one per line):")
+        file_layout.addWidget(rate_label)
+        
+        self.rate_rules_text = QTextEdit()
+        self.rate_rules_text.setPlaceholderText(
+            "pattern > count in window, no pattern for time, log idle for time\n"
+            "Example:\n"
+            "timeout > 50 in 60s\n"
+            "no heartbeat for 5m\n"
+            "log idle for 10m"
+        )
+        self.rate_rules_text.setMaximumHeight(80)
+        file_layout.addWidget(self.rate_rules_text)
+        
+        rate_help = QLabel(
+            "A pattern with a rate rule alerts once when it is seen more often than the count within the window, "
+            "and once when it falls back, instead of on every match. Absence rules alert when a pattern, "
+            "or any new data in the log, has not been seen for the given time, and again when it returns."
+        )
+        rate_help.setStyleSheet("font-size: 11px; color: #6c757d;")
+        rate_help.setWordWrap(True)
+        file_layout.addWidget(rate_help)
+        
         file_group.setLayout(file_layout)
         main_layout.addWidget(file_group)
         
@@ -125,11 +235,22 @@ class MonitorTab(QWidget):
         self.stop_button.setEnabled(False)
         button_layout.addWidget(self.stop_button)
         
+        self.apply_button = QPushButton("Apply Changes")
+        self.apply_button.setToolTip("Use the edited patterns and rules without restarting the monitor")
+        self.apply_button.clicked.connect(self.apply_changes)
+        self.apply_button.setEnabled(False)
+        button_layout.addWidget(self.apply_button)
+        
         self.test_button = QPushButton("Send Test SMS")
         self.test_button.setObjectName("test_button")
         self.test_button.clicked.connect(self.send_test_sms)
         button_layout.addWidget(self.test_button)
         
+        self.replay_button = QPushButton("Replay Archived Logs")
+        self.replay_button.setToolTip("Count the alerts the current patterns would have fired on old logs, without sending")
+        self.replay_button.clicked.connect(self.replay_archives)
+        button_layout.addWidget(self.replay_button)
+        
         main_layout.addLayout(button_layout)
     
     def set_file_monitor(self, file_monitor: FileMonitor):
@@ -144,6 +265,7 @@ class MonitorTab(QWidget):
         # Connect signals
         self.file_monitor.file_updated.connect(self.handle_file_update)
         self.file_monitor.pattern_found.connect(self.handle_pattern_found)
+        self.file_monitor.record_found.connect(self.handle_record_found)
         self.file_monitor.status_update.connect(self.handle_status_update)
     
     def set_sms_sender(self, sms_sender: SMSSender):
@@ -156,9 +278,56 @@ class MonitorTab(QWidget):
         self.sms_sender = sms_sender
         
         # Connect signals
-        self.sms_sender.status_update.connect(self.handle_status_update)
+        self.sms_sender.status_event.connect(self.handle_status_event)
         self.sms_sender.sms_sent.connect(self.handle_sms_sent)
     
+    def set_alert_dispatcher(self, alert_dispatcher: AlertDispatcher):
+        """
+        Set the alert dispatcher instance.
+        
+        Args:
+            alert_dispatcher: The alert dispatcher used to deliver alerts
+        """
+        self.alert_dispatcher = alert_dispatcher
+        
+        # Connect signals
+        self.alert_dispatcher.status_update.connect(self.handle_status_update)
+        self.alert_dispatcher.alert_dispatched.connect(self.handle_alert_dispatched)
+    
+    def set_escalation_engine(self, escalation_engine: EscalationEngine):
+        """
+        Set the escalation engine that sends alerts of priorities with an escalation rule.
+        
+        Args:
+            escalation_engine: The escalation engine, sending through the alert dispatcher
+        """
+        self.escalation_engine = escalation_engine
+        
+        # Connect signals
+        self.escalation_engine.status_update.connect(self.handle_status_update)
+    
+    def set_recipient_directory(self, recipient_directory: RecipientDirectory):
+        """
+        Set the recipient groups and on-call rotations routing rules refer to.
+        
+        Args:
+            recipient_directory: The recipient directory shared with the settings tab
+        """
+        self.recipient_directory = recipient_directory
+    
+    def set_alert_template(self, text: str):
+        """
+        Set the template of pattern alerts.
+        
+        Args:
+            text: Template text, see AlertTemplate
+        
+        Raises:
+            ValueError: If the template is invalid
+        """
+        self.alert_template = AlertTemplate(text)
+        self._match_template = self.alert_template
+    
     def load_settings(self, settings: Dict[str, Any]):
         """
         Load settings into the UI.
@@ -173,6 +342,20 @@ class MonitorTab(QWidget):
             self.patterns_text.setText("\n".join(patterns))
             
         self.custom_message_input.setText(settings.get("custom_message", ""))
+        
+        routing_rules = settings.get("routing_rules", [])
+        if routing_rules:
+            self.routing_rules_text.setText("\n".join(routing_rules))
+        
+        escalation_rules = settings.get("escalation_rules", [])
+        if escalation_rules:
+            self.escalation_rules_text.setText("\n".join(escalation_rules))
+        
+        rate_rules = settings.get("rate_rules", [])
+        if rate_rules:
+            self.rate_rules_text.setText("\n".join(rate_rules))
+        
+        self.scan_existing_checkbox.setChecked(settings.get("scan_existing", False))
     
     def get_settings(self) -> Dict[str, Any]:
         """
@@ -185,10 +368,26 @@ class MonitorTab(QWidget):
         patterns_text = self.patterns_text.toPlainText().strip()
         patterns = [line.strip() for line in patterns_text.split("\n") if line.strip()]
         
+        # Parse routing rules (one per line)
+        rules_text = self.routing_rules_text.toPlainText().strip()
+        routing_rules = [line.strip() for line in rules_text.split("\n") if line.strip()]
+        
+        # Parse escalation rules (one per line)
+        escalation_text = self.escalation_rules_text.toPlainText().strip()
+        escalation_rules = [line.strip() for line in escalation_text.split("\n") if line.strip()]
+        
+        # Parse rate rules (one per line)
+        rate_text = self.rate_rules_text.toPlainText().strip()
+        rate_rules = [line.strip() for line in rate_text.split("\n") if line.strip()]
+        
         return {
             "last_file_path": self.file_path_input.text().strip(),
             "patterns": patterns,
-            "custom_message": self.custom_message_input.text().strip()
+            "custom_message": self.custom_message_input.text().strip(),
+            "routing_rules": routing_rules,
+            "escalation_rules": escalation_rules,
+            "rate_rules": rate_rules,
+            "scan_existing": self.scan_existing_checkbox.isChecked()
         }
     
     def browse_file(self):
@@ -197,7 +396,7 @@ class MonitorTab(QWidget):
             self,
             "Select Log File",
             "",
-            "All Files (*);;Text Files (*.txt);;Log Files (*.log)"
+            "All Files (*);;Text Files (*.txt);;Log Files (*.log);;Compressed Logs (*.gz *.bz2 *.xz)"
         )
         
         if file_path:
@@ -217,8 +416,7 @@ class MonitorTab(QWidget):
             QMessageBox.warning(self, "Missing Information", "Please select a log file to monitor.")
             return False
         
-        if not settings["patterns"]:
-            QMessageBox.warning(self, "Missing Information", "Please enter at least one pattern to detect.")
+        if not self.validate_rules(settings):
             return False
         
         # Check if SMS sender is configured
@@ -237,6 +435,77 @@ class MonitorTab(QWidget):
         
         return True
     
+    def validate_rules(self, settings: Dict[str, Any]) -> bool:
+        """
+        Validate the patterns, routing, escalation and rate rules of the settings.
+        
+        Args:
+            settings: Settings from get_settings
+        
+        Returns:
+            bool: True if they are valid, False otherwise
+        """
+        if not settings["patterns"]:
+            QMessageBox.warning(self, "Missing Information", "Please enter at least one pattern to detect.")
+            return False
+        
+        # Check field conditions
+        errors = validate_patterns(settings["patterns"])
+        if errors:
+            QMessageBox.warning(self, "Invalid Pattern", "\n".join(errors))
+            return False
+        
+        # Check routing rules
+        router = AlertRouter()
+        errors = router.configure_from_rules(settings["routing_rules"])
+        errors += [
+            f"Routing rule for '{route.patterns[0]}' refers to unknown recipient group {group} "
+            f"(define it in the Settings tab)"
+            for route in router.routes for recipients in route.recipients.values()
+            for group in self.recipient_directory.unknown_groups(recipients)
+        ]
+        if errors:
+            QMessageBox.warning(self, "Invalid Routing Rules", "\n".join(errors))
+            return False
+        
+        # Check escalation rules
+        policies, errors = parse_policies(settings["escalation_rules"])
+        for policy in policies:
+            errors += [
+                f"Escalation rule for '{policy.priority}' alerts uses provider '{provider}', which is not available"
+                for provider in policy.providers
+                if self.alert_dispatcher and not self.alert_dispatcher.has_sender(provider)
+            ]
+            errors += [
+                f"Escalation rule for '{policy.priority}' alerts refers to unknown recipient group {group} "
+                f"(define it in the Settings tab)"
+                for step in policy.steps for group in self.recipient_directory.unknown_groups(step.recipients)
+            ]
+        if errors:
+            QMessageBox.warning(self, "Invalid Escalation Rules", "\n".join(errors))
+            return False
+        
+        # Check rate rules
+        rate_rules = RateRuleEngine()
+        absence_rules = AbsenceTracker()
+        errors = rate_rules.configure_from_rules([rule for rule in settings["rate_rules"] if not is_absence_rule(rule)])
+        errors += absence_rules.configure_from_rules([rule for rule in settings["rate_rules"] if is_absence_rule(rule)])
+        patterns = {pattern.lower() for pattern in settings["patterns"]}
+        errors += [
+            f"Rate rule '{rule.description}' is for a pattern that is not in the pattern list"
+            for rule in rate_rules.rules if rule.pattern.lower() not in patterns
+        ]
+        errors += [
+            f"Absence rule '{expectation.description}' is for a pattern that is not in the pattern list"
+            for expectation in absence_rules.expectations
+            if expectation.pattern is not None and expectation.pattern.lower() not in patterns
+        ]
+        if errors:
+            QMessageBox.warning(self, "Invalid Rate Rules", "\n".join(errors))
+            return False
+        
+        return True
+    
     def start_monitoring(self):
         """Start monitoring the selected file."""
         if not self.validate_settings():
@@ -244,10 +513,25 @@ class MonitorTab(QWidget):
         
         settings = self.get_settings()
         
+        # Configure alert routing
+        self.alert_router.configure_from_rules(settings["routing_rules"])
+        if self.escalation_engine:
+            self.escalation_engine.configure_from_rules(settings["escalation_rules"])
+        self.rate_rules.configure_from_rules([rule for rule in settings["rate_rules"] if not is_absence_rule(rule)])
+        self.absence_rules.configure_from_rules([rule for rule in settings["rate_rules"] if is_absence_rule(rule)])
+        
+        # The custom message goes in front of every alert
+        custom_message = settings["custom_message"]
+        self._match_template = self.alert_template.with_prefix(f"{custom_message}\n\n") if custom_message else self.alert_template
+        self._event_template = self.event_template.with_prefix(f"{custom_message}\n\n") if custom_message else self.event_template
+        self.match_counts = {}
+        
         # Configure the file monitor
         if self.file_monitor:
-            self.file_monitor.configure(settings["last_file_path"], settings["patterns"])
+            self.file_monitor.configure(settings["last_file_path"], settings["patterns"], settings["scan_existing"])
             self.file_monitor.start()
+            if self.rate_rules.rules or self.absence_rules.expectations:
+                self.rate_timer.start()
             
             # Save monitor settings
             self.settings_saved.emit(settings)
@@ -255,10 +539,11 @@ class MonitorTab(QWidget):
             # Update UI
             self.start_button.setEnabled(False)
             self.stop_button.setEnabled(True)
+            self.apply_button.setEnabled(True)
             self.file_path_input.setEnabled(False)
-            self.patterns_text.setEnabled(False)
             self.browse_button.setEnabled(False)
             self.custom_message_input.setEnabled(False)
+            self.scan_existing_checkbox.setEnabled(False)
             
             # Add entry to log
             self.add_log_entry(f"Started monitoring {settings['last_file_path']}")
@@ -270,14 +555,16 @@ class MonitorTab(QWidget):
         """Stop monitoring the file."""
         if self.file_monitor:
             self.file_monitor.stop()
+            self.rate_timer.stop()
             
             # Update UI
             self.start_button.setEnabled(True)
             self.stop_button.setEnabled(False)
+            self.apply_button.setEnabled(False)
             self.file_path_input.setEnabled(True)
-            self.patterns_text.setEnabled(True)
             self.browse_button.setEnabled(True)
             self.custom_message_input.setEnabled(True)
+            self.scan_existing_checkbox.setEnabled(True)
             
             # Add entry to log
             self.add_log_entry("Monitoring stopped")
@@ -285,6 +572,35 @@ class MonitorTab(QWidget):
             # Update status
             self.status_update.emit("Monitoring stopped")
     
+    def apply_changes(self):
+        """
+        Apply edited patterns and rules while monitoring.
+        
+        The file monitor compiles the new patterns in the background and keeps
+        reading meanwhile, so no lines are skipped. Rate counts and absence
+        timeouts start over with the new rules.
+        """
+        if not self.file_monitor or not self.file_monitor.running:
+            return
+        
+        settings = self.get_settings()
+        if not self.validate_rules(settings):
+            return
+        
+        self.alert_router.configure_from_rules(settings["routing_rules"])
+        if self.escalation_engine:
+            self.escalation_engine.configure_from_rules(settings["escalation_rules"])
+        self.rate_rules.configure_from_rules([rule for rule in settings["rate_rules"] if not is_absence_rule(rule)])
+        self.absence_rules.configure_from_rules([rule for rule in settings["rate_rules"] if is_absence_rule(rule)])
+        if self.rate_rules.rules or self.absence_rules.expectations:
+            self.rate_timer.start()
+        else:
+            self.rate_timer.stop()
+        
+        generation = self.file_monitor.update_patterns(settings["patterns"])
+        self.settings_saved.emit(settings)
+        self.add_log_entry(f"Applying {len(settings['patterns'])} patterns (generation {generation})")
+    
     def send_test_sms(self):
         """Send a test SMS message."""
         if not self.sms_sender or not self.sms_sender.is_configured:
@@ -348,6 +664,73 @@ class MonitorTab(QWidget):
                     "Failed to connect to TextBelt. Please check your internet connection and SMS settings."
                 )
     
+    def replay_archives(self):
+        """Replay archived log files through the current patterns and routing rules."""
+        settings = self.get_settings()
+        if not settings["patterns"]:
+            QMessageBox.warning(self, "Missing Information", "Please enter at least one pattern to detect.")
+            return
+        
+        router = AlertRouter()
+        errors = router.configure_from_rules(settings["routing_rules"])
+        if errors:
+            QMessageBox.warning(self, "Invalid Routing Rules", "\n".join(errors))
+            return
+        
+        try:
+            engine = ReplayEngine(settings["patterns"], router)
+        except ValueError as e:
+            QMessageBox.warning(self, "Invalid Pattern", str(e))
+            return
+        
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self,
+            "Select Archived Logs",
+            os.path.dirname(settings["last_file_path"]),
+            "All Files (*);;Log Files (*.log *.gz *.bz2 *.xz)"
+        )
+        if not file_paths:
+            return
+        
+        def run():
+            # Replayed as one log, oldest file first
+            try:
+                self.replay_finished.emit(engine.run(sorted(file_paths, key=os.path.getmtime)), "")
+            except Exception as e:
+                self.replay_finished.emit(None, str(e))
+        
+        self.replay_button.setEnabled(False)
+        self.add_log_entry(f"Replaying {len(file_paths)} archived log files...")
+        self.replay_thread = threading.Thread(target=run, name="Replay")
+        self.replay_thread.daemon = True
+        self.replay_thread.start()
+    
+    def handle_replay_finished(self, result, error: str):
+        """
+        Show the outcome of a replay.
+        
+        Args:
+            result: The ReplayResult, or None if the replay failed
+            error: Error message when it failed
+        """
+        self.replay_button.setEnabled(True)
+        self.replay_thread = None
+        
+        if result is None:
+            self.add_log_entry(f"Replay failed: {error}")
+            QMessageBox.warning(self, "Replay Failed", error)
+            return
+        
+        self.add_log_entry(
+            f"Replay: {result.total_hits} matches, {result.total_alerts} alerts after coalescing "
+            f"in {result.lines} lines ({result.lines_per_second:,.0f} lines/s)"
+        )
+        report = QMessageBox(self)
+        report.setWindowTitle("Replay Results")
+        report.setText(f"{result.total_alerts} alerts would have fired ({result.total_hits} matches).")
+        report.setDetailedText(format_report(result))
+        report.exec_()
+    
     def handle_file_update(self, message: str):
         """
         Handle file update event.
@@ -356,30 +739,152 @@ class MonitorTab(QWidget):
             message: Update message
         """
         self.add_log_entry(message)
+        
+        # The file grew, which meets "log idle" absence rules
+        for transition in self.absence_rules.seen(None):
+            self.handle_absence_transition(transition)
     
-    def handle_pattern_found(self, pattern: str, line: str):
+    def handle_pattern_found(self, pattern: str, line: str, trace_id: str = ""):
         """
         Handle pattern found event.
         
         Args:
             pattern: Pattern that was found
             line: Line of text containing the pattern
+            trace_id: Trace ID of the match, empty when tracing is off
         """
         self.add_match_entry(pattern, line)
+        if self.count_match(pattern, line, trace_id):
+            self.send_alert(pattern, line, self._match_template, {"line": line}, trace_id)
+    
+    def handle_record_found(self, patterns: List[str], record: str, trace_id: str = ""):
+        """
+        Handle a multi-line record containing patterns, with one alert for all of them.
         
-        # Get custom message if available
-        custom_message = self.custom_message_input.text().strip()
+        The alert follows the route of the most urgent pattern and names every
+        pattern that alerts on its own.
         
-        # Create alert message
-        if custom_message:
-            alert_message = f"{custom_message}\n\nPattern Detected: '{pattern}'\nIn: {line}"
-        else:
-            alert_message = f"Alert! Pattern Detected: '{pattern}'\nIn: {line}"
+        Args:
+            patterns: Patterns found in the record
+            record: Text of the record
+            trace_id: Trace ID of the match, empty when tracing is off
+        """
+        self.add_match_entry(", ".join(patterns), record)
+        alerting = [pattern for pattern in patterns if self.count_match(pattern, record, trace_id)]
+        if not alerting:
+            return
+        
+        pattern = min(alerting, key=lambda name: self.alert_router.route(name).priority_value)
+        self.send_alert(pattern, record, self._match_template,
+                        {"line": record, "pattern": ", ".join(alerting)}, trace_id)
+    
+    def count_match(self, pattern: str, line: str, trace_id: str = "") -> bool:
+        """
+        Count a match and feed it to the rate and absence rules.
+        
+        Args:
+            pattern: Pattern that was found
+            line: Line or record containing the pattern
+            trace_id: Trace ID of the match, empty when tracing is off
+        
+        Returns:
+            bool: True if the match alerts on its own, False if only its rules may alert
+        """
+        self.match_counts[pattern] = self.match_counts.get(pattern, 0) + 1
+        
+        # Patterns with absence rules are expected to match and only alert when they stop
+        if self.absence_rules.is_expected(pattern):
+            for transition in self.absence_rules.seen(pattern):
+                self.handle_absence_transition(transition)
+            if not self.rate_rules.is_rated(pattern):
+                return False
+        
+        # Patterns with rate rules only alert when a rule starts firing
+        if self.rate_rules.is_rated(pattern):
+            for transition in self.rate_rules.record(pattern, line):
+                self.handle_rate_transition(transition, trace_id)
+            return False
+        
+        return True
+    
+    def check_rules(self):
+        """Resolve rate rules whose matches have fallen back and fire missed absence rules."""
+        for transition in self.rate_rules.check():
+            self.handle_rate_transition(transition)
+        for transition in self.absence_rules.check():
+            self.handle_absence_transition(transition)
+    
+    def handle_rate_transition(self, transition: RateTransition, trace_id: str = ""):
+        """
+        Alert on a rate rule starting or stopping to fire.
+        
+        Args:
+            transition: The rule transition
+            trace_id: Trace ID of the match that made the rule fire, if any
+        """
+        self.add_log_entry(transition.message.split("\n")[0])
+        
+        self.send_alert(transition.rule.pattern, transition.rule.last_line, self._event_template,
+                        {"message": transition.message, "count": transition.count}, trace_id)
+    
+    def handle_absence_transition(self, transition: AbsenceTransition):
+        """
+        Alert on an absence rule being missed, or met again.
         
-        # Send SMS alert if configured
-        if self.sms_sender and self.sms_sender.is_configured:
+        Args:
+            transition: The rule transition
+        """
+        self.add_log_entry(transition.message)
+        
+        self.send_alert(transition.route_pattern, "", self._event_template, {"message": transition.message})
+    
+    def send_alert(self, pattern: str, line: str, template: AlertTemplate, values: Dict[str, Any], trace_id: str = ""):
+        """
+        Send an alert for a pattern through its route, with the message sized for each provider.
+        
+        Args:
+            pattern: Pattern the alert is about
+            line: Line of text that triggered it
+            template: Template of the message
+            values: Placeholder values besides pattern, file, host, count and time
+            trace_id: Trace ID of the match, empty when tracing is off
+        """
+        route = self.alert_router.route(pattern)
+        policy = self.escalation_engine.policy_for(route.priority) if self.escalation_engine else None
+        for provider in route.providers:
+            for group in self.recipient_directory.unknown_groups(route.recipients_for(provider)):
+                self.handle_status_update(f"Recipient group {group} is not defined, not sending '{pattern}' alert to it")
+        recipients = {
+            provider: self.recipient_directory.resolve(route.recipients_for(provider), default=default_group(provider))
+            for provider in route.providers
+        }
+        values = dict({
+            "pattern": pattern,
+            "file": self.file_monitor.file_path if self.file_monitor else "",
+            "host": self.host,
+            "count": self.match_counts.get(pattern, 0),
+            "time": datetime.datetime.now().strftime("%H:%M:%S")
+        }, **values)
+        providers = policy.providers if policy else route.providers
+        messages = {provider: template.render(values, MESSAGE_LIMITS.get(provider)) for provider in providers}
+        alert_message = messages.get("sms") or template.render(values, MESSAGE_LIMITS.get("sms"))
+        
+        # Queue the alert for its providers if any of them can send
+        sms_ready = self.sms_sender and self.sms_sender.is_configured
+        if policy and self.alert_dispatcher:
+            alert = Alert(pattern, line, alert_message, route, alert_id=trace_id, messages=messages)
+            if not self.escalation_engine.escalate(alert, policy):
+                self.add_log_entry(f"No escalation step for '{pattern}' could be sent")
+        elif self.alert_dispatcher and any(
+            (provider != "sms" or sms_ready) and self.alert_dispatcher.has_sender(provider)
+            for provider in route.providers
+        ):
+            self.alert_dispatcher.submit(Alert(pattern, line, alert_message, route, alert_id=trace_id,
+                                               messages=messages, recipients=recipients))
+        elif sms_ready:
             # Always send as a real message in monitoring mode
-            self.sms_sender.send_message(alert_message, force_production=True)
+            self.sms_sender.send_message(alert_message, force_production=True,
+                                         recipients=recipients.get("sms") or None, trace_id=trace_id)
         else:
             self.add_log_entry("Pattern found but SMS notifications are not configured.")
     
@@ -393,6 +898,15 @@ class MonitorTab(QWidget):
         self.add_log_entry(message)
         self.status_update.emit(message)
     
+    def handle_status_event(self, event: StatusEvent):
+        """
+        Handle a structured status event.
+        
+        Args:
+            event: The status event
+        """
+        self.handle_status_update(event.message)
+    
     def handle_sms_sent(self, message: str, recipient_count: int):
         """
         Handle SMS sent event.
@@ -403,6 +917,19 @@ class MonitorTab(QWidget):
         """
         self.add_log_entry(f"SMS alert sent to {recipient_count} recipient(s)")
     
+    def handle_alert_dispatched(self, alert_id: str, provider: str, recipient: str, success: bool):
+        """
+        Handle the final outcome of an alert delivery.
+        
+        Args:
+            alert_id: The alert ID
+            provider: The provider the alert was sent through
+            recipient: The recipient of the delivery
+            success: Whether the delivery succeeded
+        """
+        if success:
+            self.add_log_entry(f"Alert sent via {provider} to {recipient}")
+    
     def add_log_entry(self, message: str):
         """
         Add an entry to the log list.
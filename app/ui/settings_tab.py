@@ -14,6 +14,8 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QColor, QBrush, QTextCharFormat, QTextCursor
 
+from app.core.oncall import RecipientDirectory
+from app.core.recipients import validate_phone_number
 from app.core.sms_sender import SMSSender
 
 
@@ -25,39 +27,17 @@ class PhoneNumberValidator:
         """
         Validate a phone number according to TextBelt's E.164 format.
         
+        Uses the same rules as the SMS sender's recipient registry.
+        
         Args:
             phone: The phone number to validate
             
         Returns:
             Tuple[bool, str, str]: (is_valid, formatted_number, error_message)
         """
-        # Remove all non-digit characters except leading '+'
-        digits_only = ''.join(filter(str.isdigit, phone))
-        
-        # Handle empty or very short phone numbers
-        if not digits_only or len(digits_only) < 8:
-            return False, phone, "Too few digits (min 8)"
-        
-        # Handle very long phone numbers (likely a mistake)
-        if len(digits_only) > 15:
-            return False, phone, "Too many digits (max 15)"
-        
-        # Format the number according to E.164 format
-        if phone.startswith('+'):
-            # Already has a plus, just remove any non-digit characters except the leading +
-            formatted = '+' + digits_only
-        else:
-            # No plus sign, need to add proper country code
-            if digits_only.startswith('1') and len(digits_only) >= 10:
-                # Looks like a US/Canada number with country code
-                formatted = '+' + digits_only
-            elif len(digits_only) == 10:
-                # 10-digit number without country code, assume US/Canada
-                formatted = '+1' + digits_only
-            else:
-                # Not clearly a US number and no country code specified
-                return False, phone, "Missing country code (use +XX format)"
-        
+        is_valid, formatted, error = validate_phone_number(phone)
+        if not is_valid:
+            return False, phone, error[0].upper() + error[1:]
         return True, formatted, "Valid number"
 
 
@@ -187,7 +167,9 @@ class EnhancedRecipientsList(QWidget):
         dialog = PhoneEntryDialog(self)
         if dialog.exec_() == QDialog.Accepted:
             number = dialog.get_validated_number()
-            if number:
+            if number in self.get_numbers():
+                QMessageBox.information(self, "Duplicate Number", f"{number} is already a recipient.")
+            elif number:
                 item = QListWidgetItem(number)
                 item.setData(Qt.UserRole, number)  # Store raw number
                 self.recipients_list.addItem(item)
@@ -244,9 +226,14 @@ class EnhancedRecipientsList(QWidget):
         self.recipients_list.clear()
         valid_count = 0
         
+        seen = set()
         for number in numbers:
             is_valid, formatted, _ = PhoneNumberValidator.validate_phone_number(number)
-            if is_valid:
+            if is_valid and formatted in seen:
+                # Numbers entered in different formats are kept once
+                valid_count += 1
+            elif is_valid:
+                seen.add(formatted)
                 item = QListWidgetItem(formatted)
                 item.setData(Qt.UserRole, formatted)
                 self.recipients_list.addItem(item)
@@ -293,6 +280,7 @@ class SettingsTab(QWidget):
         """Initialize the settings tab."""
         super().__init__(parent)
         self.sms_sender = None
+        self.recipient_directory = None
         self.setup_ui()
     
     def setup_ui(self):
@@ -347,6 +335,34 @@ class SettingsTab(QWidget):
         
         recipients_group.setLayout(recipients_layout)
         main_layout.addWidget(recipients_group)
+        
+        # Recipient groups and on-call rotations
+        groups_group = QGroupBox("Recipient Groups and On-call Rotations")
+        groups_layout = QVBoxLayout()
+        groups_layout.setSpacing(10)
+        groups_layout.setContentsMargins(15, 20, 15, 15)
+        
+        self.groups_text = QTextEdit()
+        self.groups_text.setPlaceholderText(
+            "name = recipients [rotate <shift> from <start>]\n"
+            "Example:\n"
+            "ops = +12125551234, +13105550123\n"
+            "primary = +12125551234, +13105550123 rotate 7d from 2026-01-05 09:00"
+        )
+        self.groups_text.setMaximumHeight(80)
+        groups_layout.addWidget(self.groups_text)
+        
+        groups_help = QLabel(
+            "Refer to a group or rotation as @name in the recipients of a routing rule. "
+            "A rotation sends to one member at a time, taking turns every shift (h, d or w). "
+            "A group named 'default' receives alerts whose routing rule names no recipients."
+        )
+        groups_help.setStyleSheet("font-size: 11px; color: #6c757d;")
+        groups_help.setWordWrap(True)
+        groups_layout.addWidget(groups_help)
+        
+        groups_group.setLayout(groups_layout)
+        main_layout.addWidget(groups_group)
 
         # API Information group
         info_group = QGroupBox("TextBelt Information")
@@ -438,6 +454,15 @@ class SettingsTab(QWidget):
         """
         self.sms_sender = sms_sender
     
+    def set_recipient_directory(self, recipient_directory: RecipientDirectory):
+        """
+        Set the recipient directory the groups are compiled into.
+        
+        Args:
+            recipient_directory: The recipient directory shared with the monitor tab
+        """
+        self.recipient_directory = recipient_directory
+    
     def load_settings(self, settings: Dict[str, Any]):
         """
         Load settings into the UI.
@@ -452,6 +477,8 @@ class SettingsTab(QWidget):
         recipients = settings.get("sms_recipients", [])
         if recipients:
             self.recipients_widget.set_numbers(recipients)
+        
+        self.groups_text.setText("\n".join(settings.get("recipient_groups", [])))
     
     def get_settings(self) -> Dict[str, Any]:
         """
@@ -463,9 +490,14 @@ class SettingsTab(QWidget):
         # Get recipients from enhanced widget
         recipients = self.recipients_widget.get_numbers()
         
+        # Parse group definitions (one per line)
+        groups_text = self.groups_text.toPlainText().strip()
+        recipient_groups = [line.strip() for line in groups_text.split("\n") if line.strip()]
+        
         return {
             "textbelt_api_key": self.api_key_input.text().strip(),
-            "sms_recipients": recipients
+            "sms_recipients": recipients,
+            "recipient_groups": recipient_groups
         }
     
     def validate_settings(self) -> bool:
@@ -496,7 +528,13 @@ class SettingsTab(QWidget):
             )
             return False
         
-        # All validation handled by the EnhancedRecipientsList widget
+        # Check recipient groups
+        errors = RecipientDirectory().configure_from_rules(self.get_settings()["recipient_groups"])
+        if errors:
+            QMessageBox.warning(self, "Invalid Recipient Groups", "\n".join(errors))
+            return False
+        
+        # Phone numbers are validated by the EnhancedRecipientsList widget
         return True
     
     def test_connection(self):
@@ -513,8 +551,8 @@ class SettingsTab(QWidget):
         # Create a temporary SMS sender for testing
         temp_sender = SMSSender()
         
-        # Connect the status update signal
-        temp_sender.status_update.connect(self.status_update.emit)
+        # Forward the sender's status events
+        temp_sender.status_event.connect(lambda event: self.status_update.emit(event.message))
         
         # Configure the sender
         success = temp_sender.configure(
@@ -603,6 +641,9 @@ class SettingsTab(QWidget):
                 )
                 return
         
+        if self.recipient_directory:
+            self.recipient_directory.configure_from_rules(settings["recipient_groups"])
+        
         # Emit settings saved signal
         self.settings_saved.emit(settings)
         
@@ -21,11 +21,16 @@ class Config:
             # TextBelt settings
             "textbelt_api_key": "textbelt",  # Default is free tier
             "sms_recipients": [],
+            "recipient_groups": [],
             
             # File monitor settings
             "last_file_path": "",
             "patterns": [],
             "custom_message": "",
+            "routing_rules": [],
+            "rate_rules": [],
+            "escalation_rules": [],
+            "scan_existing": False,
             
             # UI settings
             "theme": "dark",
@@ -35,16 +40,19 @@ class Config:
     
     def save_sms_settings(self, 
                           textbelt_api_key: str,
-                          sms_recipients: List[str]) -> None:
+                          sms_recipients: List[str],
+                          recipient_groups: Optional[List[str]] = None) -> None:
         """
         Save SMS notification settings.
         
         Args:
             textbelt_api_key: TextBelt API key
             sms_recipients: List of phone numbers
+            recipient_groups: Recipient group and on-call rotation definitions, one per entry
         """
         self.settings.setValue("textbelt_api_key", textbelt_api_key)
         self.settings.setValue("sms_recipients", json.dumps(sms_recipients))
+        self.settings.setValue("recipient_groups", json.dumps(recipient_groups or []))
     
     def load_sms_settings(self) -> Dict[str, Any]:
         """
@@ -55,10 +63,14 @@ class Config:
         """
         return {
             "textbelt_api_key": self.settings.value("textbelt_api_key", self.default_values["textbelt_api_key"]),
-            "sms_recipients": json.loads(self.settings.value("sms_recipients", "[]")) if self.settings.value("sms_recipients") else []
+            "sms_recipients": json.loads(self.settings.value("sms_recipients", "[]")) if self.settings.value("sms_recipients") else [],
+            "recipient_groups": json.loads(self.settings.value("recipient_groups", "[]")) if self.settings.value("recipient_groups") else []
         }
     
-    def save_monitor_settings(self, file_path: str, patterns: List[str], custom_message: str = "") -> None:
+    def save_monitor_settings(self, file_path: str, patterns: List[str], custom_message: str = "",
+                              routing_rules: Optional[List[str]] = None, scan_existing: bool = False,
+                              rate_rules: Optional[List[str]] = None,
+                              escalation_rules: Optional[List[str]] = None) -> None:
         """
         Save file monitor settings.
         
@@ -66,10 +78,18 @@ class Config:
             file_path: Path to the file to monitor
             patterns: List of patterns to look for
             custom_message: Custom message to include in SMS alerts
+            routing_rules: Alert routing rules, one rule per entry
+            scan_existing: Whether to match the content already in the file when monitoring starts
+            rate_rules: Rate rules, one rule per entry
+            escalation_rules: Escalation rules, one rule per entry
         """
         self.settings.setValue("last_file_path", file_path)
         self.settings.setValue("patterns", json.dumps(patterns))
         self.settings.setValue("custom_message", custom_message)
+        self.settings.setValue("routing_rules", json.dumps(routing_rules or []))
+        self.settings.setValue("scan_existing", scan_existing)
+        self.settings.setValue("rate_rules", json.dumps(rate_rules or []))
+        self.settings.setValue("escalation_rules", json.dumps(escalation_rules or []))
     
     def load_monitor_settings(self) -> Dict[str, Any]:
         """
@@ -81,7 +101,11 @@ class Config:
         return {
             "last_file_path": self.settings.value("last_file_path", self.default_values["last_file_path"]),
             "patterns": json.loads(self.settings.value("patterns", "[]")) if self.settings.value("patterns") else [],
-            "custom_message": self.settings.value("custom_message", self.default_values["custom_message"])
+            "custom_message": self.settings.value("custom_message", self.default_values["custom_message"]),
+            "routing_rules": json.loads(self.settings.value("routing_rules", "[]")) if self.settings.value("routing_rules") else [],
+            "scan_existing": self.settings.value("scan_existing", self.default_values["scan_existing"], type=bool),
+            "rate_rules": json.loads(self.settings.value("rate_rules", "[]")) if self.settings.value("rate_rules") else [],
+            "escalation_rules": json.loads(self.settings.value("escalation_rules", "[]")) if self.settings.value("escalation_rules") else []
         }
     
     def save_ui_settings(self, theme: str, geometry: bytes, state: bytes) -> None:
@@ -124,10 +148,15 @@ class Config:
         if section == "sms":
             self.settings.remove("textbelt_api_key")
             self.settings.remove("sms_recipients")
+            self.settings.remove("recipient_groups")
         elif section == "monitor":
             self.settings.remove("last_file_path")
             self.settings.remove("patterns")
             self.settings.remove("custom_message")
+            self.settings.remove("routing_rules")
+            self.settings.remove("scan_existing")
+            self.settings.remove("rate_rules")
+            self.settings.remove("escalation_rules")
         elif section == "ui":
             self.settings.remove("theme")
             self.settings.remove("window_geometry")
@@ -0,0 +1,35 @@
+"""
+Filesystem locations for data the Fast SMS Alert System keeps between runs.
+"""
+
+import os
+
+
+def get_data_dir() -> str:
+    """
+    Get the directory for application data, creating it if needed.
+
+    The FAST_SMS_DATA_DIR environment variable overrides the default of
+    ~/.fast_sms.
+
+    Returns:
+        str: Absolute path of the data directory
+    """
+    data_dir = os.environ.get("FAST_SMS_DATA_DIR") or os.path.join(os.path.expanduser("~"), ".fast_sms")
+    os.makedirs(data_dir, exist_ok=True)
+    return data_dir
+
+
+def get_data_path(*parts: str) -> str:
+    """
+    Get the path of a file inside the data directory.
+
+    Args:
+        parts: Path components relative to the data directory
+
+    Returns:
+        str: Absolute path of the file
+    """
+    path = os.path.join(get_data_dir(), *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
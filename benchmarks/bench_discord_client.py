@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Discord client configurations used by DiscordSender.
+
+Compares the default client (all intents, member and message caches) with
+lean mode (minimal intents, no caches, DM-only event handling). Each mode runs
+in its own subprocess so peak RSS numbers are not shared between them.
+
+A synthetic guild is loaded through discord.py's own model constructors and a
+mixed stream of gateway events is fed through the client's parsers. Events the
+mode's intents do not subscribe to are dropped, as the gateway would never
+deliver them.
+
+Usage:
+    python -m benchmarks.bench_discord_client [--members N] [--events N]
+
+Note: this drives discord.py 2.x internals (ConnectionState parsers) and needs
+no network access or bot token.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import discord
+
+from app.core.discord_sender import DiscordSender
+
+GUILD_ID = 100000000000000001
+CHANNEL_ID = 100000000000000002
+DM_CHANNEL_ID = 100000000000000003
+BASE_USER_ID = 200000000000000000
+TIMESTAMP = '2024-01-01T00:00:00+00:00'
+
+# Gateway event -> (intent flag required, share of the synthetic stream)
+EVENT_MIX = [
+    ('PRESENCE_UPDATE', 'presences', 0.45),
+    ('TYPING_START', 'guild_typing', 0.15),
+    ('MESSAGE_CREATE', 'guild_messages', 0.25),
+    ('GUILD_MEMBER_UPDATE', 'members', 0.10),
+    ('DM_MESSAGE_CREATE', 'dm_messages', 0.05),
+]
+
+
+def _user_payload(user_id: int) -> dict:
+    return {
+        'id': str(user_id),
+        'username': f'user{user_id % 100000}',
+        'discriminator': '0',
+        'global_name': None,
+        'avatar': None,
+        'bot': False,
+    }
+
+
+def _member_payload(user_id: int) -> dict:
+    return {
+        'user': _user_payload(user_id),
+        'roles': [],
+        'joined_at': TIMESTAMP,
+        'deaf': False,
+        'mute': False,
+        'flags': 0,
+    }
+
+
+def _guild_payload(member_count: int) -> dict:
+    return {
+        'id': str(GUILD_ID),
+        'name': 'benchmark',
+        'member_count': member_count,
+        'features': [],
+        'emojis': [],
+        'stickers': [],
+        'roles': [{
+            'id': str(GUILD_ID),
+            'name': '@everyone',
+            'permissions': '0',
+            'position': 0,
+            'color': 0,
+            'hoist': False,
+            'managed': False,
+            'mentionable': False,
+        }],
+        'channels': [{
+            'id': str(CHANNEL_ID),
+            'type': 0,
+            'name': 'general',
+            'position': 0,
+            'permission_overwrites': [],
+        }],
+        'members': [_member_payload(BASE_USER_ID + i) for i in range(member_count)],
+    }
+
+
+def _message_payload(message_id: int, user_id: int, in_guild: bool) -> dict:
+    data = {
+        'id': str(message_id),
+        'channel_id': str(CHANNEL_ID if in_guild else DM_CHANNEL_ID),
+        'author': _user_payload(user_id),
+        'content': 'hello from the benchmark',
+        'timestamp': TIMESTAMP,
+        'edited_timestamp': None,
+        'tts': False,
+        'mention_everyone': False,
+        'mentions': [],
+        'mention_roles': [],
+        'attachments': [],
+        'embeds': [],
+        'pinned': False,
+        'type': 0,
+    }
+    if in_guild:
+        data['guild_id'] = str(GUILD_ID)
+        data['member'] = {k: v for k, v in _member_payload(user_id).items() if k != 'user'}
+    return data
+
+
+def _build_event_stream(count: int, member_count: int, seed: int = 1234) -> list:
+    """Build a deterministic list of (event_name, intent, payload) tuples."""
+    rng = random.Random(seed)
+    names = [name for name, _, _ in EVENT_MIX]
+    weights = [weight for _, _, weight in EVENT_MIX]
+    intents = {name: intent for name, intent, _ in EVENT_MIX}
+
+    stream = []
+    for i in range(count):
+        name = rng.choices(names, weights)[0]
+        user_id = BASE_USER_ID + rng.randrange(member_count)
+        if name == 'PRESENCE_UPDATE':
+            payload = {
+                'user': {'id': str(user_id)},
+                'guild_id': str(GUILD_ID),
+                'status': rng.choice(['online', 'idle', 'dnd']),
+                'activities': [],
+                'client_status': {'desktop': 'online'},
+            }
+        elif name == 'TYPING_START':
+            payload = {
+                'channel_id': str(CHANNEL_ID),
+                'guild_id': str(GUILD_ID),
+                'user_id': str(user_id),
+                'timestamp': 1704067200,
+                'member': _member_payload(user_id),
+            }
+        elif name == 'GUILD_MEMBER_UPDATE':
+            payload = dict(_member_payload(user_id), guild_id=str(GUILD_ID), nick=f'n{i}')
+        else:
+            payload = _message_payload(300000000000000000 + i, user_id, name == 'MESSAGE_CREATE')
+        stream.append((name, intents[name], payload))
+    return stream
+
+
+async def _run_mode(lean: bool, member_count: int, event_count: int) -> dict:
+    """Load the synthetic guild and process the event stream for one mode."""
+    tracemalloc.start()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    sender = DiscordSender('benchmark-token', lean_mode=lean)
+    bot = sender.bot
+    await bot._async_setup_hook()
+    state = bot._connection
+
+    guild = discord.Guild(data=_guild_payload(member_count), state=state)
+    state._add_guild(guild)
+    _, cache_peak = tracemalloc.get_traced_memory()
+
+    stream = _build_event_stream(event_count, member_count)
+    intents = bot.intents
+    delivered = 0
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for index, (name, intent, payload) in enumerate(stream):
+        if not getattr(intents, intent):
+            continue
+        delivered += 1
+        parser = state.parsers['MESSAGE_CREATE' if name == 'DM_MESSAGE_CREATE' else name]
+        parser(payload)
+        if index % 256 == 0:
+            # Let the dispatched handler tasks run
+            await asyncio.sleep(0)
+
+    pending = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    _, total_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    cached_messages = len(state._messages) if state._messages is not None else 0
+    return {
+        'mode': 'lean' if lean else 'full',
+        'intents_value': intents.value,
+        'cached_members': len(guild.members),
+        'cached_messages': cached_messages,
+        'events_generated': event_count,
+        'events_delivered': delivered,
+        'wall_seconds': round(wall, 4),
+        'cpu_seconds': round(cpu, 4),
+        'events_per_second': round(delivered / wall, 1) if wall else None,
+        'cache_peak_kib': round(cache_peak / 1024, 1),
+        'alloc_peak_kib': round(total_peak / 1024, 1),
+        'peak_rss_kib': rss_after,
+        'rss_growth_kib': rss_after - rss_before,
+    }
+
+
+def _run_child(mode: str, members: int, events: int) -> dict:
+    """Run one mode in a fresh interpreter and return its JSON result."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.check_output(
+        [sys.executable, '-m', 'benchmarks.bench_discord_client',
+         '--child', mode, '--members', str(members), '--events', str(events)],
+        cwd=root
+    )
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+def main():
+    """Run both client modes and print a comparison."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--members', type=int, default=5000, help='Members in the synthetic guild')
+    parser.add_argument('--events', type=int, default=50000, help='Gateway events in the synthetic stream')
+    parser.add_argument('--child', choices=['full', 'lean'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = asyncio.run(_run_mode(args.child == 'lean', args.members, args.events))
+        print(json.dumps(result))
+        return
+
+    results = [_run_child(mode, args.members, args.events) for mode in ('full', 'lean')]
+    keys = [key for key in results[0] if key != 'mode']
+
+    print(f"{'metric':<20}{'full':>16}{'lean':>16}")
+    for key in keys:
+        print(f"{key:<20}{str(results[0][key]):>16}{str(results[1][key]):>16}")
+
+
+if __name__ == "__main__":
+    main()
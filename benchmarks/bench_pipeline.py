@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the monitor -> match -> alert pipeline.
+
+A writer thread appends synthetic log lines to a temporary file at a
+configurable rate. FileMonitor watches the file, every match is routed and
+queued on an AlertDispatcher, and deliveries go through SMSSender to a local
+mock TextBelt server. Nothing leaves the machine.
+
+Stages:
+    monitor   - FileMonitor matching only, nothing is sent
+    sender    - SMSSender sending directly to the mock server
+    pipeline  - the full path, file write to SMS delivery
+    backlog   - FileMonitor scanning an existing file: line by line, as bytes in place, and as a backlog
+
+Reports lines/sec, write-to-detect and match-to-send latency percentiles,
+CPU and peak RSS. With --trace, also reports per-stage latency percentiles
+from the tracer (see app/core/tracing.py). With --baseline, exits with
+status 1 when throughput or latency regresses by more than --tolerance
+against a saved report.
+
+Usage:
+    python -m benchmarks.bench_pipeline --stage pipeline --lines 200000 --rate 20000
+    python -m benchmarks.bench_pipeline --output base.json
+    python -m benchmarks.bench_pipeline --baseline base.json
+    python -m benchmarks.bench_pipeline --trace traces.jsonl
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+from PyQt5.QtCore import Qt
+
+from app.core.alert_dispatcher import AlertDispatcher
+from app.core.alert_router import Alert, AlertRouter
+from app.core.file_monitor import FileMonitor
+from app.core.matcher import ParallelMatcher
+from app.core.mock_textbelt import MockTextBeltServer
+from app.core.outbox import Outbox
+from app.core.providers import TextBeltProvider
+from app.core.sms_sender import SMSSender
+from app.core.tracing import TRACER
+from benchmarks.common import (LogWriter, ResourceMeter, SyntheticLog, compare_to_baseline,
+                               latency_summary, make_temp_log, write_report)
+
+RECIPIENT_PREFIX = "+1212555"
+
+
+def make_sms_sender(server: MockTextBeltServer, recipients: int) -> SMSSender:
+    """Create an SMS sender configured against the mock server."""
+    sender = SMSSender(api_url=server.api_url, status_url=server.status_url)
+    sender.configure("benchmark-key", [f"{RECIPIENT_PREFIX}{index:04d}" for index in range(recipients)])
+    return sender
+
+
+def wait_for(condition, timeout: float, interval: float = 0.01) -> bool:
+    """Poll a condition until it holds or the timeout expires."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if condition():
+            return True
+        time.sleep(interval)
+    return condition()
+
+
+def run_monitor_stage(args, log: SyntheticLog, send: bool, server=None) -> dict:
+    """Run the file monitor, optionally sending every match through the dispatcher."""
+    path = make_temp_log()
+    monitor = FileMonitor()
+    monitor.configure(path, log.patterns)
+    parallel_matcher = None
+    if args.match_workers:
+        parallel_matcher = ParallelMatcher(args.match_workers)
+        monitor.set_parallel_matcher(parallel_matcher)
+
+    detect_latencies = []
+    send_latencies = []
+    matched_at = {}
+    lock = threading.Lock()
+    router = AlertRouter()
+    dispatcher = None
+
+    if send:
+        sms_sender = make_sms_sender(server, args.recipients)
+        dispatcher = AlertDispatcher(Outbox(":memory:"), max_queue_size=10 ** 9, worker_count=args.workers)
+        dispatcher.register_provider(TextBeltProvider(sms_sender=sms_sender))
+
+        def on_dispatched(alert_id, provider, recipient, success):
+            if success:
+                now = time.perf_counter()
+                with lock:
+                    send_latencies.append(now - matched_at[alert_id])
+
+        dispatcher.alert_dispatched.connect(on_dispatched, Qt.DirectConnection)
+        dispatcher.start()
+
+    def on_pattern_found(pattern, line, trace_id):
+        detect_latencies.append(time.time() - SyntheticLog.written_at(line))
+        if dispatcher:
+            alert = Alert(pattern, line, f"Alert! Pattern Detected: '{pattern}'\nIn: {line}", router.route(pattern),
+                          alert_id=trace_id)
+            with lock:
+                matched_at[alert.alert_id] = time.perf_counter()
+            dispatcher.submit(alert)
+
+    monitor.pattern_found.connect(on_pattern_found, Qt.DirectConnection)
+
+    writer = LogWriter(path, log, args.lines, rate=args.rate)
+    meter = ResourceMeter().start()
+    monitor.start()
+    writer.start()
+    writer.join()
+    size = os.path.getsize(path)
+    caught_up = wait_for(lambda: monitor.last_position >= size, args.timeout)
+    read_seconds = meter.stop()["wall_seconds"]
+
+    delivered = True
+    if dispatcher:
+        expected = len(detect_latencies) * args.recipients
+        delivered = wait_for(lambda: len(send_latencies) >= expected, args.timeout)
+    usage = meter.stop()
+
+    monitor.stop()
+    if parallel_matcher:
+        parallel_matcher.close()
+    if dispatcher:
+        dispatcher.stop()
+    os.unlink(path)
+
+    result = {
+        "lines": args.lines,
+        "bytes": size,
+        "matches": len(detect_latencies),
+        "caught_up": caught_up,
+        "lines_per_second": round(args.lines / read_seconds, 1) if read_seconds else None,
+        "detect_latency": latency_summary(detect_latencies),
+        "resources": usage,
+    }
+    if dispatcher:
+        result["deliveries"] = len(send_latencies)
+        result["all_delivered"] = delivered
+        result["match_to_send_latency"] = latency_summary(send_latencies)
+    return result
+
+
+def run_backlog_stage(args, log: SyntheticLog) -> dict:
+    """Scan a pre-written log with the line-by-line reader, the in-place bytes reader and the backlog scan."""
+    path = make_temp_log()
+    LogWriter(path, log, args.lines).run()
+    size = os.path.getsize(path)
+
+    result = {"lines": args.lines, "bytes": size}
+    for mode in ("text", "mapped", "mmap"):
+        monitor = FileMonitor()
+        monitor.configure(path, log.patterns, scan_existing=True)
+        if mode != "mmap":
+            monitor.backlog_threshold = size + 1
+        monitor.mapped_reads = mode != "text"
+        matches = []
+        monitor.pattern_found.connect(lambda pattern, line, trace_id: matches.append(pattern), Qt.DirectConnection)
+
+        meter = ResourceMeter().start()
+        monitor.start()
+        caught_up = wait_for(lambda: monitor.last_position >= size, args.timeout, interval=0.001)
+        usage = meter.stop()
+        monitor.stop()
+
+        result[mode] = {
+            "matches": len(matches),
+            "caught_up": caught_up,
+            "lines_per_second": round(args.lines / usage["wall_seconds"], 1) if usage["wall_seconds"] else None,
+            "resources": usage,
+        }
+
+    os.unlink(path)
+    if result["text"]["lines_per_second"]:
+        for mode in ("mapped", "mmap"):
+            if result[mode]["lines_per_second"]:
+                result[f"{mode}_speedup"] = round(result[mode]["lines_per_second"] / result["text"]["lines_per_second"], 2)
+    return result
+
+
+def run_sender_stage(args, server: MockTextBeltServer) -> dict:
+    """Send messages directly through SMSSender to the mock server."""
+    sms_sender = make_sms_sender(server, 1)
+    recipient = sms_sender.recipients[0]
+    latencies = []
+
+    meter = ResourceMeter().start()
+    for index in range(args.messages):
+        start = time.perf_counter()
+        sms_message = sms_sender.send_single(recipient, f"Benchmark message {index}")
+        if sms_message and sms_message.status == "sent":
+            latencies.append(time.perf_counter() - start)
+    usage = meter.stop()
+
+    return {
+        "messages": args.messages,
+        "sent": len(latencies),
+        "messages_per_second": round(args.messages / usage["wall_seconds"], 1) if usage["wall_seconds"] else None,
+        "send_latency": latency_summary(latencies),
+        "resources": usage,
+    }
+
+
+def main():
+    """Run the selected benchmark stage and print the report."""
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of the monitor -> match -> alert pipeline")
+    parser.add_argument("--stage", choices=["monitor", "sender", "pipeline", "backlog"], default="pipeline")
+    parser.add_argument("--lines", type=int, default=100000, help="Log lines to write")
+    parser.add_argument("--rate", type=float, default=0.0, help="Lines per second, 0 for as fast as possible")
+    parser.add_argument("--line-size", type=int, default=120, help="Characters per line")
+    parser.add_argument("--patterns", type=int, default=10, help="Number of alert patterns")
+    parser.add_argument("--match-ratio", type=float, default=0.001, help="Fraction of lines that match")
+    parser.add_argument("--recipients", type=int, default=1, help="SMS recipients per alert")
+    parser.add_argument("--workers", type=int, default=2, help="Dispatcher worker threads")
+    parser.add_argument("--match-workers", type=int, default=0, help="Matching processes, 0 to match in the monitor thread")
+    parser.add_argument("--messages", type=int, default=2000, help="Messages for the sender stage")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mock server response delay")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for the pipeline to drain")
+    parser.add_argument("--trace", help="Trace each alert and save the spans to this JSON lines file")
+    parser.add_argument("--output", help="Save the report as JSON")
+    parser.add_argument("--baseline", help="Compare against a saved JSON report")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    log = SyntheticLog(args.patterns, args.line_size, args.match_ratio)
+    if args.trace:
+        TRACER.enable()
+    
+    server = None
+    if args.stage in ("sender", "pipeline"):
+        server = MockTextBeltServer(latency=args.latency_ms / 1000.0).start()
+
+    try:
+        if args.stage == "sender":
+            stage_result = run_sender_stage(args, server)
+        elif args.stage == "backlog":
+            stage_result = run_backlog_stage(args, log)
+        else:
+            stage_result = run_monitor_stage(args, log, args.stage == "pipeline", server)
+    finally:
+        if server:
+            server.stop()
+
+    if args.trace:
+        stage_result["trace_stages"] = TRACER.summary()
+        TRACER.export(args.trace)
+    
+    results = {"stage": args.stage, "parameters": vars(args), "results": stage_result}
+    write_report(results, args.output)
+
+    if args.baseline:
+        regressions = compare_to_baseline(
+            results, args.baseline,
+            higher_is_better=["results.lines_per_second", "results.messages_per_second",
+                              "results.mapped.lines_per_second", "results.mmap.lines_per_second"],
+            lower_is_better=[
+                "results.detect_latency.p99_ms",
+                "results.match_to_send_latency.p99_ms",
+                "results.send_latency.p99_ms",
+                "results.resources.cpu_seconds",
+                "results.resources.peak_rss_mib",
+            ],
+            tolerance=args.tolerance
+        )
+        if regressions:
+            print("Regressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
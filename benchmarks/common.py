@@ -0,0 +1,213 @@
+"""
+Shared helpers for the benchmark scripts: synthetic logs, resource usage and reporting.
+"""
+
+import json
+import os
+import random
+import resource
+import string
+import threading
+import time
+from typing import Dict, List, Optional, Any
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """
+    Get a percentile using linear interpolation.
+
+    Args:
+        values: Sample values
+        pct: Percentile between 0 and 100
+
+    Returns:
+        The percentile, or None if there are no samples
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def latency_summary(values: List[float]) -> Dict[str, Optional[float]]:
+    """Summarize latencies in seconds as p50/p90/p99/max in milliseconds."""
+    def ms(value):
+        return None if value is None else round(value * 1000.0, 3)
+
+    return {
+        "count": len(values),
+        "p50_ms": ms(percentile(values, 50)),
+        "p90_ms": ms(percentile(values, 90)),
+        "p99_ms": ms(percentile(values, 99)),
+        "max_ms": ms(max(values) if values else None),
+    }
+
+
+class ResourceMeter:
+    """
+    Measures CPU time and peak RSS of this process between start and stop.
+    """
+
+    def start(self) -> 'ResourceMeter':
+        """Take the starting snapshot."""
+        self._usage = resource.getrusage(resource.RUSAGE_SELF)
+        self._wall = time.perf_counter()
+        return self
+
+    def stop(self) -> Dict[str, float]:
+        """
+        Take the final snapshot.
+
+        Returns:
+            Dict with wall and CPU seconds, CPU utilisation and peak RSS in MiB
+        """
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        wall = time.perf_counter() - self._wall
+        cpu = (usage.ru_utime - self._usage.ru_utime) + (usage.ru_stime - self._usage.ru_stime)
+        return {
+            "wall_seconds": round(wall, 3),
+            "cpu_seconds": round(cpu, 3),
+            "cpu_percent": round(100.0 * cpu / wall, 1) if wall else None,
+            # ru_maxrss is KiB on Linux
+            "peak_rss_mib": round(usage.ru_maxrss / 1024.0, 1),
+        }
+
+
+class SyntheticLog:
+    """
+    Generates log lines of a fixed size, a share of which contain an alert pattern.
+
+    Every line carries its sequence number and the time it was written, so a
+    consumer can measure write-to-detect latency.
+    """
+
+    def __init__(self,
+                 pattern_count: int = 10,
+                 line_size: int = 120,
+                 match_ratio: float = 0.01,
+                 seed: int = 42):
+        """
+        Initialize the generator.
+
+        Args:
+            pattern_count: Number of distinct alert patterns
+            line_size: Approximate length of each line in characters
+            match_ratio: Fraction of lines containing a pattern
+            seed: Random seed, for reproducible runs
+        """
+        self.patterns = [f"ALERTPATTERN{index:04d}" for index in range(pattern_count)]
+        self.line_size = line_size
+        self.match_ratio = match_ratio
+        self.rng = random.Random(seed)
+        self.filler = "".join(self.rng.choice(string.ascii_lowercase + " ") for _ in range(4096))
+
+    def line(self, sequence: int) -> str:
+        """Generate one line, without the trailing newline."""
+        head = f"{time.time():.6f} seq={sequence} level=INFO "
+        if self.rng.random() < self.match_ratio:
+            head += self.rng.choice(self.patterns) + " "
+        fill = max(self.line_size - len(head), 0)
+        offset = self.rng.randrange(len(self.filler) - fill) if fill < len(self.filler) else 0
+        return head + self.filler[offset:offset + fill]
+
+    @staticmethod
+    def written_at(line: str) -> float:
+        """Get the write time embedded in a generated line."""
+        return float(line.split(" ", 1)[0])
+
+
+class LogWriter(threading.Thread):
+    """
+    Thread appending synthetic lines to a file at a target rate.
+    """
+
+    def __init__(self, path: str, log: SyntheticLog, line_count: int, rate: float = 0.0, batch: int = 100):
+        """
+        Initialize the writer.
+
+        Args:
+            path: File to append to
+            log: Line generator
+            line_count: Number of lines to write
+            rate: Target lines per second, 0 for as fast as possible
+            batch: Lines written per write call
+        """
+        super().__init__(name="LogWriter", daemon=True)
+        self.path = path
+        self.log = log
+        self.line_count = line_count
+        self.rate = rate
+        self.batch = batch
+        self.written = 0
+
+    def run(self):
+        start = time.perf_counter()
+        with open(self.path, "a", encoding="utf-8") as f:
+            while self.written < self.line_count:
+                count = min(self.batch, self.line_count - self.written)
+                f.write("".join(self.log.line(self.written + i) + "\n" for i in range(count)))
+                f.flush()
+                self.written += count
+                if self.rate:
+                    # Sleep until this batch is due according to the target rate
+                    delay = start + self.written / self.rate - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+
+
+def write_report(results: Dict[str, Any], output: Optional[str]):
+    """Print a report and optionally save it as JSON."""
+    print(json.dumps(results, indent=2))
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def compare_to_baseline(results: Dict[str, Any],
+                        baseline_path: str,
+                        higher_is_better: List[str],
+                        lower_is_better: List[str],
+                        tolerance: float) -> List[str]:
+    """
+    Compare results to a saved baseline report.
+
+    Args:
+        results: Current results
+        baseline_path: Path of a JSON report from a previous run
+        higher_is_better: Dotted keys where a drop is a regression
+        lower_is_better: Dotted keys where a rise is a regression
+        tolerance: Allowed relative change, e.g. 0.2 for 20%
+
+    Returns:
+        List of regression descriptions, empty if none
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    def lookup(data, key):
+        for part in key.split("."):
+            if not isinstance(data, dict) or part not in data:
+                return None
+            data = data[part]
+        return data
+
+    regressions = []
+    for key in higher_is_better + lower_is_better:
+        old, new = lookup(baseline, key), lookup(results, key)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if (key in higher_is_better and change < -tolerance) or (key in lower_is_better and change > tolerance):
+            regressions.append(f"{key}: {old} -> {new} ({change:+.1%})")
+    return regressions
+
+
+def make_temp_log(directory: Optional[str] = None) -> str:
+    """Create an empty log file and return its path."""
+    import tempfile
+    fd, path = tempfile.mkstemp(prefix="fast_sms_bench_", suffix=".log", dir=directory)
+    os.close(fd)
+    return path
@@ -2,15 +2,30 @@
 # -*- coding: utf-8 -*-
 import sys
 import os
+import atexit
 import logging
+import argparse
 import configparser
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import QApplication
 
+from app.core.matcher import ParallelMatcher
 from app.core.message_service import MessageService
-from app.gui.main_window import MainWindow
+from app.core.metrics import MetricsFileWriter, MetricsHTTPServer
+from app.core.profiler import PROFILER, install_signal_handler
+from app.core.records import RecordAssembler
+from app.core.templates import MESSAGE_LIMITS, SMSLimit
+from app.core.tracing import TRACER, format_summary
+from app.ui.app_window import MainWindow
 
 def main():
     """Main entry point for the application."""
+    # Parse our own options and leave the rest to Qt
+    parser = argparse.ArgumentParser(description="Fast SMS Alert System")
+    parser.add_argument("--profile", nargs="?", const="", metavar="PATH",
+                        help="Profile CPU usage from startup and write folded stacks to PATH on exit")
+    args, qt_args = parser.parse_known_args()
+    
     # Load configuration
     config = configparser.ConfigParser()
     config_file = os.path.join(os.path.dirname(__file__), 'config.ini')
@@ -23,7 +38,8 @@ def main():
         config['Messaging'] = {
             'SMSEnabled': 'True',
             'DiscordEnabled': 'False',
-            'DiscordToken': ''
+            'DiscordToken': '',
+            'DiscordLeanMode': 'False'
         }
         with open(config_file, 'w') as f:
             config.write(f)
@@ -39,12 +55,50 @@ def main():
         'sms_enabled': config.getboolean('Messaging', 'SMSEnabled', fallback=True),
         'discord_enabled': config.getboolean('Messaging', 'DiscordEnabled', fallback=False),
         'discord_token': config.get('Messaging', 'DiscordToken', fallback=''),
-        'sms_config': {}  # Add any SMS-specific config here
+        'discord_lean_mode': config.getboolean('Messaging', 'DiscordLeanMode', fallback=False),
+        'sms_config': {
+            'api_url': config.get('Messaging', 'TextBeltURL', fallback=''),
+            'status_url': config.get('Messaging', 'TextBeltStatusURL', fallback=''),
+            'verbosity': config.get('Messaging', 'StatusVerbosity', fallback='INFO'),
+            'max_connections': config.getint('Messaging', 'TextBeltConnections', fallback=100),
+            'max_concurrency': config.getint('Messaging', 'TextBeltConcurrency', fallback=50)
+        },
+        'provider_plugins': config.get('Messaging', 'ProviderPlugins', fallback='').split()
     }
     message_service = MessageService(messaging_config)
+    atexit.register(message_service.close)
+    
+    # Export metrics if configured
+    metrics_port = config.getint('Metrics', 'Port', fallback=0)
+    if metrics_port:
+        try:
+            MetricsHTTPServer(metrics_port, config.get('Metrics', 'Host', fallback='127.0.0.1')).start()
+        except OSError as e:
+            logging.error(f"Failed to start metrics endpoint: {str(e)}")
+    metrics_file = config.get('Metrics', 'File', fallback='')
+    if metrics_file:
+        MetricsFileWriter(metrics_file, config.getfloat('Metrics', 'Interval', fallback=15.0)).start()
+    
+    # Trace alert latency if configured, saving the spans on exit
+    if config.getboolean('Tracing', 'Enabled', fallback=False):
+        TRACER.enable()
+        trace_file = config.get('Tracing', 'File', fallback='traces.jsonl')
+        
+        def save_traces():
+            logging.info(f"Alert latency by stage:\n{format_summary(TRACER.summary())}")
+            TRACER.export(trace_file)
+        
+        atexit.register(save_traces)
+    
+    # Sampling profiler, toggled with SIGUSR2 or from the Tools menu
+    if install_signal_handler():
+        logging.info(f"Send SIGUSR2 to process {os.getpid()} to start or stop the profiler")
+    if args.profile is not None:
+        PROFILER.start()
+        atexit.register(PROFILER.stop, args.profile or None)
     
     # Set application details
-    app = QApplication(sys.argv)
+    app = QApplication(sys.argv[:1] + qt_args)
     app.setStyle('Fusion')  # Modern base style
     app.setApplicationName("Fast SMS")
     app.setApplicationDisplayName("Fast SMS Alert System")
@@ -54,6 +108,47 @@ def main():
     window = MainWindow(message_service)
     window.show()
     
+    # Alert message template and SMS size
+    alert_template = config.get('Alerts', 'Template', raw=True, fallback='')
+    if alert_template:
+        try:
+            window.monitor_tab.set_alert_template(alert_template)
+        except ValueError as e:
+            logging.error(f"Using the default alert template: {str(e)}")
+    MESSAGE_LIMITS['sms'] = SMSLimit(config.getint('Alerts', 'SMSMaxSegments', fallback=2))
+    
+    # How often escalating alerts check whether their SMS was delivered
+    window.escalation_engine.poll_interval = config.getfloat('Alerts', 'DeliveryCheckInterval', fallback=30.0)
+    
+    # Match raw bytes in place instead of decoding every line
+    window.file_monitor.mapped_reads = config.getboolean('Monitor', 'MappedReads', fallback=True)
+    
+    # Assemble multi-line records, such as stack traces, before matching if configured
+    record_start = config.get('Monitor', 'RecordStart', fallback='')
+    indent_continuation = config.getboolean('Monitor', 'IndentContinuation', fallback=False)
+    if record_start or indent_continuation:
+        try:
+            window.file_monitor.set_record_assembler(RecordAssembler(
+                record_start,
+                indent_continuation,
+                config.getint('Monitor', 'RecordMaxLines', fallback=100),
+                config.getint('Monitor', 'RecordMaxBytes', fallback=16384)
+            ))
+        except ValueError as e:
+            logging.error(f"Multi-line records disabled: {str(e)}")
+    
+    # Match in worker processes if configured
+    match_workers = config.getint('Monitor', 'MatchWorkers', fallback=0)
+    if match_workers > 1:
+        parallel_matcher = ParallelMatcher(match_workers)
+        window.file_monitor.set_parallel_matcher(parallel_matcher)
+        atexit.register(parallel_matcher.close)
+    
+    # Return to Python regularly so signal handlers run while Qt is idle
+    signal_timer = QTimer()
+    signal_timer.timeout.connect(lambda: None)
+    signal_timer.start(500)
+    
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
@@ -0,0 +1,209 @@
+"""
+Tests for alert dispatch through the outbox, using fake senders.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("PyQt5")
+
+from app.core.alert_dispatcher import AlertDispatcher, DeliveryError
+from app.core.alert_router import Alert, AlertRoute
+from app.core.outbox import Outbox
+from app.core.providers import MessageProvider, ProviderResult
+
+
+class FakeSender:
+    """Send function that records sends and fails as told."""
+
+    def __init__(self, error: DeliveryError = None):
+        self.error = error
+        self.sent = []
+
+    def __call__(self, message, recipient):
+        if self.error is not None:
+            raise self.error
+        self.sent.append((message, recipient))
+        return f"id-{len(self.sent)}"
+
+
+class LoopProvider(MessageProvider):
+    """Async provider that records the thread each send runs on."""
+
+    name = "sms"
+
+    def __init__(self, success=True):
+        super().__init__()
+        self.success = success
+        self.threads = []
+
+    async def send(self, recipient, message):
+        self.threads.append(threading.current_thread())
+        if not self.success:
+            return ProviderResult(recipient, False, error="rejected", retryable=False)
+        return ProviderResult(recipient, True, message_id="text-1")
+
+    def send_sync(self, recipient, message):
+        raise AssertionError("send_sync used instead of the event loop")
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop, thread
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+def make_alert(priority="normal", providers=None, recipients=None, alert_id=None):
+    route = AlertRoute(["error"], priority, providers, recipients)
+    return Alert("error", "an error line", "Pattern 'error' detected", route, alert_id=alert_id)
+
+
+@pytest.fixture
+def dispatcher(tmp_path):
+    dispatcher = AlertDispatcher(Outbox(str(tmp_path / "outbox.db"), base_delay=60.0), max_queue_size=10)
+    yield dispatcher
+    dispatcher.outbox.close()
+
+
+def deliver_next(dispatcher):
+    """Deliver the next due delivery on the calling thread, as a worker would."""
+    entry = dispatcher.outbox.claim_next()
+    assert entry is not None
+    dispatcher._deliver(entry)
+    return entry
+
+
+def test_submit_queues_one_delivery_per_provider_and_recipient(dispatcher):
+    dispatcher.register_sender("sms", FakeSender(), lambda: ["+1", "+2"])
+    dispatcher.register_sender("discord", FakeSender())
+    alert = make_alert(providers=["sms", "discord"], recipients={"discord": ["alice"]})
+
+    assert dispatcher.submit(alert) == 3
+    assert dispatcher.queue_depth() == 3
+    # Submitting the same alert again queues nothing
+    assert dispatcher.submit(alert) == 0
+    assert dispatcher.queue_depth() == 3
+
+
+def test_unknown_provider_is_reported(dispatcher):
+    dispatched = []
+    dispatcher.alert_dispatched.connect(lambda *args: dispatched.append(args))
+    alert = make_alert(providers=["pager"], recipients={"pager": ["bob"]})
+
+    assert dispatcher.submit(alert) == 0
+    assert dispatched == [(alert.alert_id, "pager", "", False)]
+
+
+def test_successful_delivery_is_marked_sent(dispatcher):
+    sender = FakeSender()
+    sent = []
+    dispatcher.register_sender("sms", sender)
+    dispatcher.alert_sent.connect(lambda *args: sent.append(args))
+    alert = make_alert(recipients={"sms": ["+1"]})
+    dispatcher.submit(alert)
+
+    entry = deliver_next(dispatcher)
+
+    assert entry.status == Outbox.STATUS_SENT
+    assert sender.sent == [("Pattern 'error' detected", "+1")]
+    assert sent == [(alert.alert_id, "sms", "+1", "id-1")]
+    assert dispatcher.queue_depth() == 0
+
+
+def test_provider_sends_on_the_given_event_loop(dispatcher, loop):
+    event_loop, loop_thread = loop
+    provider = LoopProvider()
+    dispatcher.register_provider(provider, event_loop)
+    sent = []
+    dispatcher.alert_sent.connect(lambda *args: sent.append(args))
+    alert = make_alert(recipients={"sms": ["+1"]})
+    dispatcher.submit(alert)
+
+    entry = deliver_next(dispatcher)
+
+    assert entry.status == Outbox.STATUS_SENT
+    assert provider.threads == [loop_thread]
+    assert sent == [(alert.alert_id, "sms", "+1", "text-1")]
+
+
+def test_provider_failure_on_event_loop_is_dead_lettered(dispatcher, loop):
+    dispatcher.register_provider(LoopProvider(success=False), loop[0])
+    dispatcher.submit(make_alert(recipients={"sms": ["+1"]}))
+
+    entry = deliver_next(dispatcher)
+
+    assert entry.status == Outbox.STATUS_DEAD
+    assert entry.last_error == "rejected"
+
+
+def test_retryable_failure_is_retried_later(dispatcher):
+    dispatcher.register_sender("sms", FakeSender(DeliveryError("timeout", retryable=True)))
+    dispatcher.submit(make_alert(recipients={"sms": ["+1"]}))
+
+    entry = deliver_next(dispatcher)
+
+    assert entry.status == Outbox.STATUS_PENDING
+    assert entry.last_error == "timeout"
+    assert dispatcher.queue_depth() == 1
+    # Backing off, so not due yet
+    assert dispatcher.outbox.claim_next() is None
+
+
+def test_non_retryable_failure_is_dead_lettered(dispatcher):
+    dispatched = []
+    dispatcher.register_sender("sms", FakeSender(DeliveryError("invalid number", retryable=False)))
+    dispatcher.alert_dispatched.connect(lambda *args: dispatched.append(args))
+    alert = make_alert(recipients={"sms": ["+1"]})
+    dispatcher.submit(alert)
+
+    entry = deliver_next(dispatcher)
+
+    assert entry.status == Outbox.STATUS_DEAD
+    assert dispatched == [(alert.alert_id, "sms", "+1", False)]
+    assert dispatcher.queue_depth() == 0
+
+
+def test_full_queue_drops_less_urgent_delivery(dispatcher):
+    dispatcher.max_queue_size = 2
+    dispatcher.register_sender("sms", FakeSender())
+    dispatcher.submit(make_alert("info", recipients={"sms": ["+1"]}, alert_id="info-1"))
+    dispatcher.submit(make_alert("info", recipients={"sms": ["+1"]}, alert_id="info-2"))
+
+    assert dispatcher.submit(make_alert("critical", recipients={"sms": ["+1"]}, alert_id="critical")) == 1
+    assert dispatcher.queue_depth() == 2
+    assert [deliver_next(dispatcher).alert_id for _ in range(2)] == ["critical", "info-1"]
+
+
+def test_full_queue_rejects_equally_urgent_alert(dispatcher):
+    dispatcher.max_queue_size = 1
+    dispatcher.register_sender("sms", FakeSender())
+    dispatcher.submit(make_alert(recipients={"sms": ["+1"]}))
+
+    assert dispatcher.submit(make_alert(recipients={"sms": ["+1"]})) == 0
+    assert dispatcher.queue_depth() == 1
+
+
+def test_concurrent_submits_respect_queue_size(dispatcher):
+    dispatcher.max_queue_size = 5
+    dispatcher.register_sender("sms", FakeSender())
+    barrier = threading.Barrier(8)
+
+    def submit_many():
+        barrier.wait()
+        for _ in range(10):
+            dispatcher.submit(make_alert(recipients={"sms": ["+1"]}))
+
+    threads = [threading.Thread(target=submit_many) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert dispatcher.queue_depth() == 5
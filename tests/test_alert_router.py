@@ -0,0 +1,87 @@
+"""
+Tests for routing rule parsing and pattern routing.
+"""
+
+import pytest
+
+from app.core.alert_router import Alert, AlertRoute, AlertRouter, DEFAULT_PRIORITY
+
+
+def test_parse_full_rule():
+    route = AlertRoute.parse("critical | OutOfMemory, fatal | sms | +12125551234, +12125550000")
+
+    assert route.patterns == ["OutOfMemory", "fatal"]
+    assert route.priority == "critical"
+    assert route.priority_value == 0
+    assert route.providers == ["sms"]
+    assert route.recipients_for("sms") == ["+12125551234", "+12125550000"]
+
+
+def test_parse_defaults():
+    route = AlertRoute.parse("high | timeout")
+
+    assert route.providers == ["sms"]
+    assert route.recipients == {}
+    assert route.recipients_for("sms") == []
+
+
+def test_parse_empty_priority_uses_default():
+    assert AlertRoute.parse(" | timeout").priority == DEFAULT_PRIORITY
+
+
+def test_recipients_are_kept_per_provider():
+    route = AlertRoute.parse("critical | fatal | sms, Discord | sms:+12125551234, discord:alice, sms:+12125550000")
+
+    assert route.providers == ["sms", "discord"]
+    assert route.recipients_for("sms") == ["+12125551234", "+12125550000"]
+    assert route.recipients_for("discord") == ["alice"]
+
+
+def test_provider_without_recipients_sends_to_everyone():
+    route = AlertRoute.parse("critical | fatal | sms, discord | sms:+12125551234")
+
+    assert route.recipients_for("discord") == []
+
+
+@pytest.mark.parametrize("rule", [
+    "critical",
+    "critical | | sms",
+    "urgent | fatal",
+    "critical | fatal | sms | discord:alice",
+    "critical | fatal | sms, discord | +12125551234",
+    "critical | fatal | sms | a | b",
+])
+def test_parse_rejects_invalid_rules(rule):
+    with pytest.raises(ValueError):
+        AlertRoute.parse(rule)
+
+
+def test_router_matches_case_insensitively_and_first_route_wins():
+    router = AlertRouter()
+    errors = router.configure_from_rules([
+        "critical | fatal | sms",
+        "info | fatal, retrying | discord",
+    ])
+
+    assert errors == []
+    assert router.route("FATAL").priority == "critical"
+    assert router.route("retrying").providers == ["discord"]
+    assert router.route("unknown") is router.default_route
+
+
+def test_router_reports_invalid_rules_and_keeps_valid_ones():
+    router = AlertRouter()
+    errors = router.configure_from_rules(["critical | fatal", "bogus | timeout"])
+
+    assert len(errors) == 1
+    assert "bogus" in errors[0]
+    assert router.route("fatal").priority == "critical"
+
+
+def test_alert_recipients_override_route():
+    route = AlertRoute.parse("critical | fatal | sms | +12125551234")
+
+    assert Alert("fatal", "", "", route).recipients_for("sms") == ["+12125551234"]
+    alert = Alert("fatal", "", "", route, recipients={"sms": ["+12125550000"]})
+    assert alert.recipients_for("sms") == ["+12125550000"]
+    assert alert.recipients_for("discord") == []
@@ -0,0 +1,169 @@
+"""
+Tests for escalation rules and the escalation engine, using fake senders.
+"""
+
+import time
+
+import pytest
+
+pytest.importorskip("PyQt5")
+
+from app.core.alert_dispatcher import AlertDispatcher, DeliveryError
+from app.core.alert_router import Alert, AlertRoute
+from app.core.escalation import (DELIVERED_STATE, EXHAUSTED, EscalationEngine, EscalationPolicy,
+                                 parse_policies)
+from app.core.oncall import RecipientDirectory
+from app.core.outbox import Outbox
+
+RULE = "critical | sms @primary > 5m discord alice"
+
+
+class FakeSender:
+    """Send function returning message IDs, or failing for some recipients."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.sent = []
+
+    def __call__(self, message, recipient):
+        if recipient in self.failing:
+            raise DeliveryError("invalid recipient", retryable=False)
+        self.sent.append(recipient)
+        return f"msg-{len(self.sent)}"
+
+
+@pytest.fixture
+def dispatcher(tmp_path):
+    dispatcher = AlertDispatcher(Outbox(str(tmp_path / "outbox.db")))
+    yield dispatcher
+    dispatcher.outbox.close()
+
+
+@pytest.fixture
+def engine(dispatcher):
+    directory = RecipientDirectory()
+    directory.configure_from_rules(["primary = +1, +2"])
+    engine = EscalationEngine(dispatcher, directory)
+    engine.configure_from_rules([RULE])
+    return engine
+
+
+def deliver_all(dispatcher):
+    """Deliver every due delivery on the calling thread, as the workers would."""
+    while True:
+        entry = dispatcher.outbox.claim_next()
+        if entry is None:
+            return
+        dispatcher._deliver(entry)
+
+
+def make_alert():
+    return Alert("fatal", "fatal error", "Pattern 'fatal' detected", AlertRoute(["fatal"], "critical"))
+
+
+def test_parse_rule():
+    policy = EscalationPolicy.parse(RULE)
+
+    assert policy.priority == "critical"
+    assert [(step.provider, step.recipients, step.delay) for step in policy.steps] == [
+        ("sms", ["@primary"], 0), ("discord", ["alice"], 300)
+    ]
+    assert policy.providers == ["sms", "discord"]
+    assert policy.wait_after(0) == 300
+    assert policy.wait_after(1) == 300
+
+
+@pytest.mark.parametrize("rule", [
+    "critical",
+    "urgent | sms",
+    "critical | 5m sms",
+    "critical | sms > discord",
+    "critical | sms > 5x discord",
+])
+def test_parse_rejects_invalid_rules(rule):
+    with pytest.raises(ValueError):
+        EscalationPolicy.parse(rule)
+
+
+def test_one_rule_per_priority():
+    policies, errors = parse_policies(["critical | sms", "CRITICAL | discord"])
+
+    assert len(policies) == 1
+    assert len(errors) == 1
+
+
+def test_confirmed_delivery_ends_escalation(dispatcher, engine):
+    sms = FakeSender()
+    dispatcher.register_sender("sms", sms)
+    dispatcher.register_sender("discord", FakeSender())
+    engine.register_status("sms", lambda message_id: "DELIVERED")
+    alert = make_alert()
+
+    assert engine.escalate(alert)
+    deliver_all(dispatcher)
+    assert sms.sent == ["+1", "+2"]
+    assert alert.alert_id in engine.escalations
+
+    engine.check(time.time() + engine.poll_interval + 1)
+
+    assert alert.alert_id not in engine.escalations
+
+
+def test_unconfirmed_step_escalates_after_its_wait(dispatcher, engine):
+    discord = FakeSender()
+    dispatcher.register_sender("sms", FakeSender())
+    dispatcher.register_sender("discord", discord)
+    engine.register_status("sms", lambda message_id: None)
+    alert = make_alert()
+    engine.escalate(alert)
+    deliver_all(dispatcher)
+
+    engine.check(time.time() + 299)
+    deliver_all(dispatcher)
+    assert discord.sent == []
+
+    engine.check(time.time() + 301)
+    deliver_all(dispatcher)
+
+    assert discord.sent == ["alice"]
+    # Discord does not report delivery, so being sent ends the escalation
+    assert alert.alert_id not in engine.escalations
+
+
+def test_failed_step_escalates_at_once(dispatcher, engine):
+    discord = FakeSender()
+    dispatcher.register_sender("sms", FakeSender(failing=["+1", "+2"]))
+    dispatcher.register_sender("discord", discord)
+    engine.register_status("sms", lambda message_id: None)
+    engine.escalate(make_alert())
+    escalation = next(iter(engine.escalations.values()))
+
+    # Both SMS fail, so the Discord step is queued without waiting and delivered in the same pass
+    deliver_all(dispatcher)
+
+    assert escalation.step == 1
+    assert discord.sent == ["alice"]
+    assert escalation.state == DELIVERED_STATE
+
+
+def test_step_waits_only_for_queued_deliveries(dispatcher, engine):
+    dispatcher.max_queue_size = 1
+    dispatcher.register_sender("sms", FakeSender(failing=["+1"]))
+    dispatcher.register_sender("discord", FakeSender(failing=["alice"]))
+    engine.register_status("sms", lambda message_id: None)
+    engine.escalate(make_alert())
+    escalation = next(iter(engine.escalations.values()))
+
+    # Only +1 fit in the queue, so its failure is the whole step failing
+    assert escalation.outstanding == 1
+    deliver_all(dispatcher)
+
+    assert escalation.step == 1
+    assert escalation.state == EXHAUSTED
+    assert engine.escalations == {}
+
+
+def test_priority_without_rule_is_not_escalated(engine):
+    alert = Alert("retrying", "", "", AlertRoute(["retrying"], "info"))
+
+    assert not engine.escalate(alert)
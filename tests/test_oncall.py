@@ -0,0 +1,109 @@
+"""
+Tests for recipient groups and on-call rotations.
+"""
+
+import datetime
+import time
+
+import pytest
+
+from app.core.oncall import RecipientDirectory, default_group, parse_definition
+
+
+@pytest.fixture
+def new_york(monkeypatch):
+    """Run a test in a time zone with daylight saving time."""
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def local(*args) -> float:
+    return datetime.datetime(*args).timestamp()
+
+
+@pytest.fixture
+def directory():
+    directory = RecipientDirectory()
+    errors = directory.configure_from_rules([
+        "ops = +1, +2",
+        "Primary = +3, +4, +5 rotate 1d from 2026-01-05 09:00",
+        "default = +9",
+    ])
+    assert errors == []
+    return directory
+
+
+def test_parse_group_and_rotation():
+    assert parse_definition("ops = +1, +2") == ("ops", ["+1", "+2"], None)
+
+    name, members, rotation = parse_definition("primary = +1, +2 rotate 2w")
+    assert name == "primary"
+    assert rotation.shift == 2 * 604800
+    assert rotation.start == datetime.datetime(2024, 1, 1)
+
+
+@pytest.mark.parametrize("line", [
+    "ops",
+    "ops =",
+    "ops = @other",
+    "primary = +1 rotate 0d",
+    "primary = +1 rotate 1d from 2026-13-01",
+])
+def test_parse_rejects_invalid_definitions(line):
+    with pytest.raises(ValueError):
+        parse_definition(line)
+
+
+def test_duplicate_names_are_reported():
+    errors = RecipientDirectory().configure_from_rules(["ops = +1", "OPS = +2"])
+
+    assert len(errors) == 1
+
+
+def test_rotation_hands_over_each_shift(directory):
+    assert directory.resolve(["@primary"], local(2026, 1, 5, 9, 0)) == ["+3"]
+    assert directory.resolve(["@primary"], local(2026, 1, 6, 8, 59)) == ["+3"]
+    assert directory.resolve(["@primary"], local(2026, 1, 6, 9, 0)) == ["+4"]
+    assert directory.resolve(["@primary"], local(2026, 1, 8, 9, 0)) == ["+3"]
+
+
+def test_rotation_keeps_handoff_time_across_dst(new_york):
+    _, _, rotation = parse_definition("primary = +1, +2 rotate 1d from 2026-03-01 09:00")
+
+    # Daylight saving time starts on 2026-03-08, and ends on 2026-11-01
+    assert rotation.on_call(local(2026, 3, 9, 8, 30)) == "+2"
+    assert rotation.on_call(local(2026, 3, 9, 9, 30)) == "+1"
+    assert rotation.on_call(local(2026, 11, 2, 8, 30)) == "+2"
+    assert rotation.on_call(local(2026, 11, 2, 9, 30)) == "+1"
+
+
+def test_groups_expand_and_merge(directory):
+    now = local(2026, 1, 5, 10, 0)
+
+    assert directory.resolve(["@OPS", "+3", "@primary"], now) == ["+1", "+2", "+3"]
+    assert directory.resolve(["+7"], now) == ["+7"]
+
+
+def test_empty_recipients_use_default_group(directory):
+    assert directory.resolve([]) == ["+9"]
+    assert directory.resolve([], default=default_group("discord")) == []
+
+
+def test_unknown_group_is_never_a_recipient(directory):
+    assert directory.unknown_groups(["@ops", "@oncall", "+1"]) == ["@oncall"]
+    assert directory.resolve(["@oncall", "+1"]) == ["+1"]
+    # Nothing left, so the default group
+    assert directory.resolve(["@oncall"]) == ["+9"]
+    assert directory.resolve(["@oncall"], default=default_group("discord")) == []
+
+
+def test_reconfigure_forgets_compiled_lists(directory):
+    assert directory.resolve(["@ops"]) == ["+1", "+2"]
+
+    directory.configure_from_rules(["ops = +8"])
+
+    assert directory.resolve(["@ops"]) == ["+8"]
+    assert directory.resolve([]) == []
@@ -0,0 +1,144 @@
+"""
+Tests for the SQLite alert outbox.
+"""
+
+import time
+
+import pytest
+
+from app.core.outbox import Outbox
+
+
+@pytest.fixture
+def outbox_path(tmp_path):
+    return str(tmp_path / "outbox.db")
+
+
+@pytest.fixture
+def outbox(outbox_path):
+    outbox = Outbox(outbox_path, max_attempts=3, base_delay=2.0, max_delay=10.0)
+    yield outbox
+    outbox.close()
+
+
+def test_claims_most_urgent_first(outbox):
+    outbox.enqueue("a1", "sms", "+1", "info", 3)
+    outbox.enqueue("a2", "sms", "+1", "critical", 0)
+    outbox.enqueue("a3", "sms", "+1", "normal", 2)
+
+    claimed = [outbox.claim_next().alert_id for _ in range(3)]
+
+    assert claimed == ["a2", "a3", "a1"]
+    assert outbox.claim_next() is None
+
+
+def test_recovers_inflight_deliveries_after_crash(outbox_path):
+    outbox = Outbox(outbox_path)
+    outbox.enqueue("a1", "sms", "+1", "message", 2)
+    entry = outbox.claim_next()
+    assert outbox.pending_count() == 0
+    # Simulate a crash: the delivery is never marked sent or failed
+    outbox.close()
+
+    reopened = Outbox(outbox_path)
+    try:
+        assert reopened.claim_next() is None
+        assert reopened.recover() == 1
+        assert reopened.pending_count() == 1
+
+        resumed = reopened.claim_next()
+        assert resumed.entry_id == entry.entry_id
+        assert resumed.attempts == 2
+    finally:
+        reopened.close()
+
+
+def test_duplicate_idempotency_key_is_ignored(outbox):
+    assert outbox.enqueue("a1", "sms", "+1", "message", 2)
+    assert not outbox.enqueue("a1", "sms", "+1", "message again", 2)
+    assert outbox.pending_count() == 1
+
+    # Other recipients and providers of the same alert are separate deliveries
+    assert outbox.enqueue("a1", "sms", "+2", "message", 2)
+    assert outbox.enqueue("a1", "discord", "+1", "message", 2)
+    assert outbox.pending_count() == 3
+
+
+def test_sent_delivery_is_not_queued_again(outbox):
+    outbox.enqueue("a1", "sms", "+1", "message", 2)
+    outbox.mark_sent(outbox.claim_next(), "text-1")
+
+    assert not outbox.enqueue("a1", "sms", "+1", "message", 2)
+    assert outbox.pending_count() == 0
+    assert outbox.claim_next() is None
+
+
+def test_retry_waits_for_backoff(outbox):
+    outbox.enqueue("a1", "sms", "+1", "message", 2)
+    entry = outbox.claim_next()
+
+    before = time.time()
+    assert outbox.mark_failed(entry, "timeout", retryable=True)
+
+    assert entry.status == Outbox.STATUS_PENDING
+    assert before + 2.0 * 0.8 <= entry.next_attempt_at <= time.time() + 2.0 * 1.2
+    assert outbox.pending_count() == 1
+    assert outbox.claim_next() is None
+    assert outbox.next_due_time() == pytest.approx(entry.next_attempt_at)
+
+
+def test_backoff_doubles_up_to_max_delay(outbox):
+    for attempts, delay in [(1, 2.0), (2, 4.0), (3, 8.0), (4, 10.0), (10, 10.0)]:
+        assert delay * 0.8 <= outbox.backoff_delay(attempts) <= delay * 1.2
+
+
+def test_non_retryable_failure_is_dead(outbox):
+    outbox.enqueue("a1", "sms", "+1", "message", 2)
+    entry = outbox.claim_next()
+
+    assert not outbox.mark_failed(entry, "invalid number", retryable=False)
+
+    assert entry.status == Outbox.STATUS_DEAD
+    assert outbox.pending_count() == 0
+    assert outbox.claim_next() is None
+
+
+def test_delivery_is_dead_after_max_attempts(tmp_path):
+    # No backoff, so each retry is due at once
+    outbox = Outbox(str(tmp_path / "outbox.db"), max_attempts=3, base_delay=0.0)
+    try:
+        outbox.enqueue("a1", "sms", "+1", "message", 2)
+        entry = outbox.claim_next()
+        for _ in range(outbox.max_attempts - 1):
+            assert outbox.mark_failed(entry, "timeout")
+            entry = outbox.claim_next()
+
+        assert entry.attempts == outbox.max_attempts
+        assert not outbox.mark_failed(entry, "timeout")
+        assert entry.status == Outbox.STATUS_DEAD
+        assert outbox.claim_next() is None
+    finally:
+        outbox.close()
+
+
+def test_drop_least_urgent_drops_newest_of_lowest_priority(outbox):
+    outbox.enqueue("normal-old", "sms", "+1", "message", 2)
+    outbox.enqueue("info-old", "sms", "+1", "message", 3)
+    outbox.enqueue("critical", "sms", "+1", "message", 0)
+    outbox.enqueue("info-new", "sms", "+1", "message", 3)
+    outbox.enqueue("normal-new", "sms", "+1", "message", 2)
+
+    dropped = [outbox.drop_least_urgent(1) for _ in range(5)]
+
+    assert [entry.alert_id if entry else None for entry in dropped] == [
+        "info-new", "info-old", "normal-new", "normal-old", None
+    ]
+    assert outbox.pending_count() == 1
+    assert outbox.claim_next().alert_id == "critical"
+
+
+def test_drop_least_urgent_keeps_equal_priority(outbox):
+    outbox.enqueue("a1", "sms", "+1", "message", 2)
+
+    assert outbox.drop_least_urgent(2) is None
+    assert outbox.pending_count() == 1
@@ -0,0 +1,86 @@
+"""
+Tests for multi-line record assembly and record matching in the file monitor.
+"""
+
+import os
+
+import pytest
+
+from app.core.matcher import PatternMatcher
+from app.core.records import RecordAssembler
+
+LOG = (
+    b"2026-01-05 09:00:00 ERROR java.lang.NullPointerException\n"
+    b"    at com.example.Service.handle(Service.java:42)\n"
+    b"    at com.example.Server.run(Server.java:7)\n"
+    b"2026-01-05 09:00:01 INFO request done\n"
+    b"2026-01-05 09:00:02 ERROR java.lang.IllegalStateException\n"
+    b"    at com.example.Service.handle(Service.java:50)\n"
+)
+
+
+def test_split_by_start_pattern_holds_back_last_record():
+    assembler = RecordAssembler(r"\d{4}-\d{2}-\d{2}")
+
+    records, pending = assembler.split(LOG)
+
+    assert [LOG[start:end].count(b"\n") for start, end in records] == [3, 1]
+    assert LOG[pending:].startswith(b"2026-01-05 09:00:02")
+
+
+def test_split_final_includes_last_record():
+    records, pending = RecordAssembler(r"\d{4}-\d{2}-\d{2}").split(LOG, final=True)
+
+    assert len(records) == 3
+    assert pending == len(LOG)
+
+
+def test_indent_continuation_without_start_pattern():
+    records, _ = RecordAssembler().split(LOG, final=True)
+
+    assert len(records) == 3
+
+
+def test_long_records_are_split():
+    data = b"start\n" + b"    line\n" * 10
+    records, _ = RecordAssembler(max_lines=4).split(data, final=True)
+
+    assert [data[start:end].count(b"\n") for start, end in records] == [4, 4, 3]
+
+
+def test_scan_reports_each_record_once_with_all_patterns():
+    matcher = PatternMatcher(["Exception", "com.example.Service"])
+
+    matches, consumed, _ = RecordAssembler(r"\d{4}").scan(matcher, LOG, final=True)
+
+    assert consumed == len(LOG)
+    assert [indices for _, _, indices in matches] == [[0, 1], [0, 1]]
+    start, end, _ = matches[0]
+    assert LOG[start:end].endswith(b"(Server.java:7)")
+
+
+def test_file_monitor_emits_one_event_per_record(tmp_path):
+    pytest.importorskip("PyQt5")
+    from app.core.file_monitor import FileMonitor
+
+    path = tmp_path / "app.log"
+    path.write_bytes(LOG)
+    monitor = FileMonitor()
+    monitor.configure(str(path), ["Exception", "com.example.Service"], scan_existing=True)
+    monitor.set_record_assembler(RecordAssembler(r"\d{4}-\d{2}-\d{2}"))
+    records, lines = [], []
+    monitor.record_found.connect(lambda patterns, record, trace_id: records.append((patterns, record)))
+    monitor.pattern_found.connect(lambda pattern, line, trace_id: lines.append(pattern))
+
+    # Read on the test thread instead of starting the monitor thread
+    monitor.running = True
+    stat = os.stat(path)
+    monitor._process_new_data(stat, stat.st_size)
+    assert len(records) == 1
+    # The last record is held back until the file is idle
+    monitor._flush_record(stat)
+
+    assert lines == []
+    assert [patterns for patterns, _ in records] == [["Exception", "com.example.Service"]] * 2
+    assert records[0][1].count("\n") == 2
+    assert records[1][1].startswith("2026-01-05 09:00:02")
@@ -0,0 +1,92 @@
+"""
+Tests for field conditions on JSON lines and logfmt logs.
+"""
+
+import json
+
+import pytest
+
+from app.core.structured import FieldRule, PatternSet, is_rule, parse_fields, validate_patterns
+
+
+def find(patterns, lines):
+    """Get the configured patterns found in each of the lines."""
+    data = "".join(line + "\n" for line in lines).encode("utf-8")
+    pattern_set = PatternSet(patterns)
+    found = pattern_set.resolve(data, pattern_set.matcher.scan(data))
+    line_starts = [0]
+    for line in lines[:-1]:
+        line_starts.append(line_starts[-1] + len(line.encode("utf-8")) + 1)
+    return {line_starts.index(start): [patterns[index] for index in indices] for start, _, indices in found}
+
+
+def test_only_where_colon_prefix_makes_a_rule():
+    assert is_rule("where: level == ERROR")
+    assert is_rule("WHERE:level == ERROR")
+    assert not is_rule("where level == ERROR")
+    assert not is_rule("where did the connection go")
+
+
+def test_plain_pattern_starting_with_where_stays_literal():
+    lines = ["where did the connection go", '{"level": "ERROR"}']
+
+    assert find(["where did the connection go"], lines) == {0: ["where did the connection go"]}
+    assert validate_patterns(["where did the connection go"]) == []
+
+
+def test_parse_json_and_logfmt():
+    assert parse_fields('{"level": "ERROR", "http": {"status": 502}}') == {"level": "ERROR", "http": {"status": 502}}
+    assert parse_fields('level=ERROR msg="timed out" latency_ms=2500') == {
+        "level": "ERROR", "msg": "timed out", "latency_ms": "2500"
+    }
+    assert parse_fields("plain text") is None
+
+
+@pytest.mark.parametrize("condition, fields, expected", [
+    ("level == ERROR and latency_ms > 2000", {"level": "ERROR", "latency_ms": 2500}, True),
+    ("level == ERROR and latency_ms > 2000", {"level": "ERROR", "latency_ms": "900"}, False),
+    ("level == ERROR", {"level": "error"}, False),
+    ("http.status >= 500", {"http": {"status": 502}}, True),
+    ("status >= 500 or error exists", {"error": None}, True),
+    ("not env == staging", {"env": "prod"}, True),
+    ("message contains \"timed out\"", {"message": "request timed out"}, True),
+    ("missing != 1", {}, False),
+    ("ok == true", {"ok": "true"}, True),
+])
+def test_conditions(condition, fields, expected):
+    assert FieldRule("where: " + condition).matches(fields) is expected
+
+
+@pytest.mark.parametrize("condition", ["where:", "where: level ==", "where: (level == ERROR", "where: level == ERROR )"])
+def test_invalid_conditions(condition):
+    with pytest.raises(ValueError):
+        FieldRule(condition)
+
+
+def test_prefilter_uses_most_selective_literal():
+    rule = FieldRule('where: service == "billing" and status >= 500')
+
+    assert rule.literals == ["billing"]
+
+
+def test_condition_matches_only_its_field():
+    rule = 'where: service == "billing"'
+    lines = [
+        json.dumps({"service": "billing", "status": 500}),
+        json.dumps({"service": "search", "message": "billing unavailable"}),
+    ]
+
+    assert find([rule], lines) == {0: [rule]}
+
+
+@pytest.mark.parametrize("value", ['say "hi"', "C:\\temp", "/api/v1", "ошибка", "café"])
+def test_escaped_json_values_are_found(value):
+    lines = [
+        json.dumps({"message": value}),
+        json.dumps({"message": value}, ensure_ascii=False),
+        json.dumps({"message": "other"}),
+    ]
+
+    for condition in ("where: message == {}", "where: message contains {}"):
+        rule = condition.format('"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"')
+        assert find([rule], lines) == {0: [rule], 1: [rule]}
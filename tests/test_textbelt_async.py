@@ -0,0 +1,68 @@
+"""
+Tests for the asynchronous TextBelt client, against the bundled mock server.
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("PyQt5")
+
+from app.core.mock_textbelt import MockTextBeltServer
+from app.core.textbelt_async import AsyncTextBeltClient
+
+
+@pytest.fixture
+def server():
+    server = MockTextBeltServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(server):
+    return AsyncTextBeltClient(api_key="key", api_url=server.api_url, status_url=server.status_url)
+
+
+def test_send_and_status(client):
+    async def send_and_check():
+        result = await client.send("+12125551234", "hello")
+        status = await client.status(result.message_id)
+        await client.close()
+        return result, status
+
+    result, status = asyncio.run(send_and_check())
+
+    assert result.success
+    assert status["status"] == "DELIVERED"
+
+
+def test_invalid_number_is_not_sent(client, server):
+    result = asyncio.run(client.send("not a number", "hello"))
+
+    assert not result.success
+    assert not result.retryable
+    assert server.request_count == 0
+
+
+def test_use_from_another_loop_while_open_is_refused(client):
+    async def send():
+        return await client.send("+12125551234", "hello")
+
+    async def send_and_close():
+        result = await send()
+        await client.close()
+        return result
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(send()).success
+        with pytest.raises(RuntimeError):
+            asyncio.run(send())
+
+        # Once closed on its loop, the client can be used on another one
+        loop.run_until_complete(client.close())
+        assert asyncio.run(send_and_close()).success
+    finally:
+        loop.close()